@@ -0,0 +1,87 @@
+"""
+.. module:: bench_abilities
+   :platform: Unix, Windows
+   :synopsis: ScoreBlock against Qt AbilityScores construction and memory
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Usage: python benchmarks/bench_abilities.py [--count 1000000]
+
+Each case runs in a fresh interpreter so its resident memory growth is not
+muddied by the other; memory is the RSS growth while the stat blocks are
+alive, which includes the C++ side of every QObject.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                "..")))
+
+from take10 import abilities  # noqa: E402
+
+SCORES = (10, 12, 14, 8, 13, 15)
+
+
+def rss_bytes() -> int:
+    """Returns the resident set size of this process (Linux only)"""
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def run_case(case: str, count: int) -> dict:
+    """Builds count stat blocks of the given case and measures them"""
+    if case == "ScoreBlock":
+        cls = abilities.ScoreBlock
+    else:
+        from take10.qtabilities import AbilityScores as cls
+    before = rss_bytes()
+    start = time.perf_counter()
+    blocks = [cls(*SCORES) for _ in range(count)]
+    elapsed = time.perf_counter() - start
+    memory = rss_bytes() - before
+    start = time.perf_counter()
+    for block in blocks:
+        block.strength = 11
+    setter = time.perf_counter() - start
+    return {
+        "case": case,
+        "construct_ns": elapsed / count * 1e9,
+        "setter_ns": setter / count * 1e9,
+        "bytes": memory / count,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1000000)
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.count)))
+        return
+
+    results = []
+    for case in ("ScoreBlock", "AbilityScores"):
+        out = subprocess.check_output([
+            sys.executable, __file__, "--count", str(args.count),
+            "--case", case])
+        results.append(json.loads(out.decode()))
+    print("{:>14} {:>14} {:>11} {:>11}".format(
+        "type", "construct (ns)", "setter (ns)", "bytes/obj"))
+    for r in results:
+        print("{case:>14} {construct_ns:>14.0f} {setter_ns:>11.0f} "
+              "{bytes:>11.0f}".format(**r))
+    light, qt = results
+    print("construction {:.1f}x faster, {:.1f}x less memory".format(
+        qt["construct_ns"] / light["construct_ns"],
+        qt["bytes"] / max(light["bytes"], 1)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+.. module:: bench_dice
+   :platform: Unix, Windows
+   :synopsis: Per-die roll() against batched roll_many() throughput
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Usage: python benchmarks/bench_dice.py [--sizes 1e3,1e6,1e8]
+
+Both sides roll 4d6 and total each roll; the legacy side makes one roll()
+call per 4d6, the batch side a single roll_many() call for all of them.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                "..")))
+
+from take10 import dice  # noqa: E402
+from take10._compat import numpy  # noqa: E402
+
+DICE_PER_ROLL = 4
+SIDES = 6
+
+
+def bench_roll(total_dice: int) -> float:
+    """Sums total_dice d6 through one roll() call per 4d6"""
+    start = time.perf_counter()
+    for _ in range(total_dice // DICE_PER_ROLL):
+        sum(dice.roll(DICE_PER_ROLL, SIDES))
+    return time.perf_counter() - start
+
+
+def bench_roll_many(total_dice: int) -> float:
+    """Sums total_dice d6 through a single roll_many() call"""
+    start = time.perf_counter()
+    dice.roll_many(DICE_PER_ROLL, SIDES, total_dice // DICE_PER_ROLL).sum()
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1e3,1e6,1e8",
+                        help="comma separated total dice counts")
+    args = parser.parse_args(argv)
+
+    backend = "numpy" if numpy is not None else "getrandbits"
+    print("backend: {}".format(backend))
+    print("{:>12} {:>12} {:>13} {:>9}".format(
+        "dice", "roll (s)", "roll_many (s)", "speedup"))
+    for size in args.sizes.split(","):
+        total = int(float(size))
+        legacy = bench_roll(total)
+        batch = bench_roll_many(total)
+        print("{:>12} {:>12.4f} {:>13.4f} {:>8.1f}x".format(
+            total, legacy, batch, legacy / batch if batch else float("inf")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+.. module:: bench_encounter
+   :platform: Unix, Windows
+   :synopsis: Encounter simulation throughput and scaling with cores
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Usage: python benchmarks/bench_encounter.py [--encounters 400000]
+       [--workers 1 2 4]
+
+Simulates a party of four against six goblins with each worker count and
+reports encounters per second and the speedup over one worker.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                "..")))
+
+from take10.encounter import Combatant, Encounter, simulate  # noqa: E402
+from take10.rng import RollStream  # noqa: E402
+from take10.skills import SkillSet  # noqa: E402
+
+
+def build_encounter() -> Encounter:
+    party = [
+        Combatant("Fighter", (16, 12, 10, 10, 8, 14), 13, 18, "1d10+4", 1),
+        Combatant("Rogue", (10, 17, 12, 12, 13, 10), 9, 15, "1d6+3", 0,
+                  skills=SkillSet(PERCEPTION=1, STEALTH=1)),
+        Combatant("Cleric", (14, 10, 10, 16, 12, 12), 10, 16, "1d8+2", 0),
+        Combatant("Wizard", (8, 14, 17, 12, 10, 12), 7, 12, "1d6", 0),
+    ]
+    goblin = Combatant("Goblin", (11, 15, 10, 9, 6, 12), 6, 16, "1d6", 1,
+                       skills=SkillSet(STEALTH=4))
+    return Encounter(party, [goblin] * 6)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--encounters", type=int, default=400000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--chunk", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    fight = build_encounter()
+    print("{} encounters, {} cores".format(args.encounters, os.cpu_count()))
+    print("{:>8} {:>14} {:>9} {:>9}".format(
+        "workers", "encounters/s", "speedup", "win rate"))
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        stats = simulate(fight, args.encounters, RollStream(1), workers,
+                         args.chunk)
+        rate = args.encounters / (time.perf_counter() - start)
+        baseline = baseline or rate
+        print("{:>8} {:>14.0f} {:>8.2f}x {:>9.3f}".format(
+            workers, rate, rate / baseline, stats.win_rate()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+.. module:: bench_expression
+   :platform: Unix, Windows
+   :synopsis: Compiled dice expression evaluation against raw draws
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Usage: python benchmarks/bench_expression.py [--trials 1000000]
+
+Evaluates an already compiled expression for many trials and compares it to
+drawing the same dice with roll_many alone; the ratio is the cost of the plan
+on top of the random numbers themselves.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                "..")))
+
+from take10 import dice  # noqa: E402
+
+
+def best_of(repeat: int, func, *args) -> float:
+    """Returns the fastest of repeat timed calls to func"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def draw_only(plan: dice.DicePlan, trials: int):
+    """Draws the dice of every group in plan without reducing them"""
+    for group in plan.groups():
+        dice.roll_many(group.count, group.sides, trials)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trials", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("expressions", nargs="*",
+                        default=["4d6kh3+2d8+5", "3d6", "1d20+7", "2d6!+1d4"])
+    args = parser.parse_args(argv)
+
+    print("{:>16} {:>11} {:>11} {:>7} {:>12}".format(
+        "expression", "draw (s)", "plan (s)", "ratio", "compile (us)"))
+    for text in args.expressions:
+        plan = dice.compile_expression(text)
+        draw = best_of(args.repeat, draw_only, plan, args.trials)
+        evaluate = best_of(args.repeat, plan.roll, args.trials)
+        cached = best_of(args.repeat, dice.compile_expression, text)
+        print("{:>16} {:>11.4f} {:>11.4f} {:>6.2f}x {:>12.2f}".format(
+            text, draw, evaluate, evaluate / draw, cached * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+.. module:: bench_import
+   :platform: Unix, Windows
+   :synopsis: Import time regression check
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Usage: python benchmarks/bench_import.py [--module take10.dice]
+       [--budget 25] [--runs 7]
+
+Imports the module in fresh interpreters under ``python -X importtime``,
+with bytecode cached in a temporary directory after a warm-up run, and
+reports the median time spent in take10 and the heaviest modules it
+pulled in. Exits with status 1 if the median exceeds the budget (in
+milliseconds) or if an optional dependency that must load lazily (numpy,
+PyQt5, concurrent.futures) was imported.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+#: Modules that must not be imported just by importing take10.dice
+LAZY_MODULES = ("numpy", "PyQt5", "concurrent.futures")
+
+
+def import_times(module: str, env: dict) -> list:
+    """
+    Imports a module in a fresh interpreter.
+
+    :returns [(name, self us, cumulative us, depth)] in import order
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        cwd=ROOT, env=env, stderr=subprocess.PIPE, universal_newlines=True,
+        check=True)
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        times.append((name.strip(), int(own), int(cumulative), depth))
+    return times
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="take10.dice")
+    parser.add_argument("--budget", type=float, default=25.0,
+                        help="Median milliseconds allowed in take10")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as cache:
+        env = dict(os.environ, PYTHONPYCACHEPREFIX=cache)
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        import_times(args.module, env)
+        runs = [import_times(args.module, env) for _ in range(args.runs)]
+
+    totals = [sum(c for name, _, c, depth in run
+                  if depth == 0 and name.split(".")[0] == "take10") / 1000
+              for run in runs]
+    median = statistics.median(totals)
+    last = runs[-1]
+    print("import {}: median {:.1f} ms over {} runs (budget {:.1f} ms)"
+          .format(args.module, median, args.runs, args.budget))
+    print("{:>10} {:>10}  {}".format("self ms", "total ms", "module"))
+    for name, own, cumulative, _ in sorted(
+            last, key=lambda t: -t[1])[:args.top]:
+        print("{:>10.2f} {:>10.2f}  {}".format(
+            own / 1000, cumulative / 1000, name))
+
+    failed = False
+    loaded = {name for name, _, _, _ in last}
+    for module in LAZY_MODULES:
+        if module in loaded:
+            print("FAIL: {} imported {}".format(args.module, module))
+            failed = True
+    if median > args.budget:
+        print("FAIL: {:.1f} ms is over the {:.1f} ms budget".format(
+            median, args.budget))
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
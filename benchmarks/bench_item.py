@@ -0,0 +1,75 @@
+"""
+.. module:: bench_item
+   :platform: Unix, Windows
+   :synopsis: Item against interned ItemType/ItemStack memory use
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Usage: python benchmarks/bench_item.py [--stacks 1000000] [--kinds 500]
+
+Records are generated the way a loader sees them: every record carries its
+own copy of the name and description strings, as if decoded from a file or
+database row.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                "..")))
+
+from take10 import item  # noqa: E402
+
+DESCRIPTION = "A sturdy piece of adventuring gear, description #{0}. " * 6
+
+
+def records(stacks: int, kinds: int):
+    """Yields (name, weight, quantity, desc) with freshly built strings"""
+    for i in range(stacks):
+        kind = i % kinds
+        yield ("Item #{}".format(kind), kind * 0.25,
+               float(i % 50 + 1), DESCRIPTION.format(kind))
+
+
+def measure(build, stacks: int, kinds: int) -> (float, float):
+    """Returns (bytes per stack, seconds) to build and hold every stack"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    held = build(records(stacks, kinds))
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return size / stacks, elapsed
+
+
+def build_items(rows) -> list:
+    return [item.Item(name, weight, quantity, desc)
+            for name, weight, quantity, desc in rows]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stacks", type=int, default=1000000)
+    parser.add_argument("--kinds", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    print("{:>16} {:>12} {:>10}".format("representation", "bytes/stack",
+                                         "load (s)"))
+    results = {}
+    for label, build in (("Item", build_items),
+                         ("ItemStack", item.load_item_stacks)):
+        per_stack, elapsed = measure(build, args.stacks, args.kinds)
+        results[label] = per_stack
+        print("{:>16} {:>12.1f} {:>10.3f}".format(label, per_stack, elapsed))
+    print("ItemStack uses {:.1f}x less memory".format(
+        results["Item"] / results["ItemStack"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+.. module:: bench_rollserver
+   :platform: Unix, Windows
+   :synopsis: Load generator for the dice roll service
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Usage: python benchmarks/bench_rollserver.py [--rate 50000]
+       [--duration 5] [--connections 8] [--expression 1d20+5]
+       [--count 1] [--address host:port|path] [--p99 10]
+
+Starts ``python -m take10.rollserver`` in a subprocess (or uses the server
+at --address) and sends it --rate requests per second, spread over
+--connections connections, for --duration seconds. Requests are sent on a
+fixed schedule whether or not earlier replies arrived, and latency is
+measured from the time each request was due, so a server falling behind
+shows up as latency rather than as a lower request rate.
+
+Reports the achieved rate and the latency percentiles, and exits with
+status 1 if the 99th percentile exceeds --p99 milliseconds or fewer than
+99% of the requests were answered.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+#: Seconds between two bursts of requests on one connection
+TICK = 0.001
+
+
+class LoadProtocol(asyncio.Protocol):
+    """One load generating connection, recording reply latencies"""
+
+    def __init__(self, latencies: list):
+        self.latencies = latencies
+        self.due = {}
+        self.errors = 0
+        self.buffer = b""
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data: bytes):
+        now = time.perf_counter()
+        *lines, self.buffer = (self.buffer + data).split(b"\n")
+        for line in lines:
+            reply = json.loads(line)
+            due = self.due.pop(reply.get("id"), None)
+            if "error" in reply or due is None:
+                self.errors += 1
+            else:
+                self.latencies.append(now - due)
+
+
+async def _connect(address, latencies: list) -> LoadProtocol:
+    loop = asyncio.get_running_loop()
+    factory = lambda: LoadProtocol(latencies)  # noqa: E731
+    if isinstance(address, str):
+        _, protocol = await loop.create_unix_connection(factory, address)
+    else:
+        _, protocol = await loop.create_connection(factory, *address)
+    return protocol
+
+
+async def _send(protocol: LoadProtocol, rate: float, duration: float,
+                request: str, offset: int) -> int:
+    """Sends requests at rate per second, returns how many were sent"""
+    start = time.perf_counter()
+    sent = 0
+    while True:
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            break
+        due = int(elapsed * rate) + 1
+        lines = []
+        while sent < due:
+            request_id = offset + sent
+            protocol.due[request_id] = start + sent / rate
+            lines.append('{{"id":{},{}'.format(request_id, request))
+            sent += 1
+        if lines:
+            protocol.transport.write("".join(lines).encode("utf-8"))
+        await asyncio.sleep(TICK)
+    return sent
+
+
+async def load(address, rate: float, duration: float, connections: int,
+               expression: str, count: int) -> dict:
+    """
+    Runs the load against a server.
+
+    :returns dict with sent, answered, errors, seconds and the sorted
+        latencies in seconds
+    """
+    latencies = []
+    protocols = [await _connect(address, latencies)
+                 for _ in range(connections)]
+    # Every request is '{"id":<id>,' followed by the same fields
+    request = json.dumps({"roll": expression, "count": count},
+                         separators=(",", ":"))[1:] + "\n"
+    start = time.perf_counter()
+    sent = sum(await asyncio.gather(*(
+        _send(p, rate / connections, duration, request, i << 32)
+        for i, p in enumerate(protocols))))
+    deadline = time.perf_counter() + max(1.0, duration)
+    while any(p.due for p in protocols) and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+    seconds = time.perf_counter() - start
+    for protocol in protocols:
+        protocol.transport.close()
+    return {
+        "sent": sent,
+        "answered": len(latencies),
+        "errors": sum(p.errors for p in protocols),
+        "seconds": seconds,
+        "latencies": sorted(latencies),
+    }
+
+
+def percentile(values: list, p: float) -> float:
+    """Returns the p-th percentile of sorted values"""
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def _address(text: str):
+    host, _, port = text.rpartition(":")
+    return (host, int(port)) if port.isdigit() and host else text
+
+
+def _spawn(directory: str):
+    """Starts a server subprocess, returns (process, address)"""
+    if hasattr(socket, "AF_UNIX"):
+        arguments = ["--unix", os.path.join(directory, "roll.sock")]
+    else:
+        arguments = ["--port", "0"]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "take10.rollserver"] + arguments, cwd=ROOT,
+        stdout=subprocess.PIPE, universal_newlines=True)
+    line = process.stdout.readline()
+    if not line.startswith("listening on "):
+        process.kill()
+        raise RuntimeError("Roll server did not start")
+    address = line[len("listening on "):].strip()
+    if address.startswith("("):
+        host, port = address.strip("()").split(", ")
+        return process, (host.strip("'"), int(port))
+    return process, address
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--rate", type=float, default=50000,
+                        help="requests per second")
+    parser.add_argument("--duration", type=float, default=5.0,
+                        help="seconds to send for")
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--expression", default="1d20+5")
+    parser.add_argument("--count", type=int, default=1,
+                        help="rolls per request")
+    parser.add_argument("--address",
+                        help="host:port or Unix socket of a running server")
+    parser.add_argument("--p99", type=float, default=10.0,
+                        help="99th percentile latency budget in ms")
+    args = parser.parse_args(argv)
+
+    process = None
+    with tempfile.TemporaryDirectory() as directory:
+        if args.address:
+            address = _address(args.address)
+        else:
+            process, address = _spawn(directory)
+        try:
+            result = asyncio.run(load(
+                address, args.rate, args.duration, args.connections,
+                args.expression, args.count))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    latencies = result["latencies"]
+    print("{} requests to {} over {} connections: {:.0f} answered/s "
+          "(target {:.0f}/s), {} errors, {} unanswered".format(
+              result["sent"], address, args.connections,
+              result["answered"] / result["seconds"], args.rate,
+              result["errors"],
+              result["sent"] - result["answered"] - result["errors"]))
+    for p in (50, 90, 99, 99.9):
+        print("p{:<5} {:>10.3f} ms".format(
+            p, percentile(latencies, p) * 1000))
+    print("max    {:>10.3f} ms".format(
+        (latencies[-1] if latencies else float("nan")) * 1000))
+
+    failed = False
+    p99 = percentile(latencies, 99) * 1000
+    if not p99 <= args.p99:
+        print("FAIL: p99 {:.3f} ms is over the {:.3f} ms budget".format(
+            p99, args.p99))
+        failed = True
+    if result["answered"] < 0.99 * result["sent"]:
+        print("FAIL: only {} of {} requests answered".format(
+            result["answered"], result["sent"]))
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
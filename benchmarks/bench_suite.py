@@ -0,0 +1,480 @@
+"""
+.. module:: bench_suite
+   :platform: Unix, Windows
+   :synopsis: Seeded benchmark suite over every take10 subsystem
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Usage: python benchmarks/bench_suite.py [--output results.json]
+       [--filter dice] [--repeat 5] [--min-time 0.2] [--root path]
+       python benchmarks/bench_suite.py --compare base.json head.json
+       [--threshold 0.1]
+       python benchmarks/bench_suite.py --commits main HEAD
+       [--threshold 0.1]
+
+Every case builds its inputs from fixed seeds, then is timed in rounds of
+as many operations as fit in --min-time; the result is the median time per
+operation over --repeat rounds, with the fastest round for reference.
+
+--compare reads two result files and flags every case whose median got
+more than --threshold slower; --commits checks both commits out into
+temporary git worktrees, runs this suite against each and compares them.
+Both exit with status 1 if anything got slower. Cases whose setup cannot
+import what they need (e.g. a subsystem an older tree does not have yet)
+are skipped; any other error fails the case, and a case that ran on the
+base but fails or is skipped on the head fails the comparison.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+#: Seed of every random input
+SEED = 1729
+
+#: (name, setup) of every case; setup returns the callable to time
+CASES = []
+
+
+def case(name: str):
+    """Registers a setup function as a benchmark case"""
+    def register(setup):
+        CASES.append((name, setup))
+        return setup
+    return register
+
+
+@case("dice.roll.d20")
+def roll_d20():
+    from take10.dice import roll
+    return lambda: roll(1, 20)
+
+
+@case("dice.roll.4d6")
+def roll_4d6():
+    from take10.dice import roll
+    return lambda: sum(roll(4, 6))
+
+
+@case("dice.roll_many.4d6x10000")
+def roll_many_4d6():
+    from take10.dice import roll_many
+    from take10.rng import RollStream
+    stream = RollStream(SEED)
+    return lambda: roll_many(4, 6, 10000, stream).sum()
+
+
+@case("dice.roll.4d6.stream")
+def roll_4d6_stream():
+    from take10.dice import roll
+    from take10.rng import RollStream
+    stream = RollStream(SEED)
+    return lambda: sum(roll(4, 6, stream))
+
+
+@case("dice.expression.4d6dl1+2x10000")
+def expression_batch():
+    from take10.dice import compile_expression
+    from take10.rng import RollStream
+    plan = compile_expression("4d6dl1+2")
+    stream = RollStream(SEED)
+    return lambda: plan.roll(10000, stream)
+
+
+def _generator_case(name: str):
+    @case("abilities.generate_scores." + name)
+    def generate():
+        from take10.abilities import SCORE_GENERATORS
+        return SCORE_GENERATORS[name]
+
+
+for _name in ("StandardScoreGenerator", "ClassicScoreGenerator",
+              "HeroicScoreGenerator", "PointBuyScoreGenerator"):
+    _generator_case(_name)
+
+
+@case("abilities.generate_population.10000")
+def generate_population():
+    from take10.abilities import generate_population
+    from take10.rng import RollStream
+    stream = RollStream(SEED)
+    return lambda: generate_population("StandardScoreGenerator", 10000,
+                                       rng=stream)
+
+
+@case("abilities.ScoreBlock.construct")
+def construct_block():
+    from take10.abilities import ScoreBlock
+    return lambda: ScoreBlock(10, 12, 14, 8, 13, 15)
+
+
+@case("abilities.AbilityScores.construct")
+def construct_scores():
+    from take10.abilities import AbilityScores
+    return lambda: AbilityScores(10, 12, 14, 8, 13, 15)
+
+
+@case("abilities.AbilityScores.setter")
+def scores_setter():
+    from take10.abilities import AbilityScores
+    scores = AbilityScores(10, 12, 14, 8, 13, 15)
+    received = []
+    scores.strength_changed.connect(received.append)
+    state = {"i": 0}
+
+    def run():
+        # The setter only emits on a change, so alternate two values
+        state["i"] ^= 1
+        scores.strength = 11 + state["i"]
+        received.clear()
+    return run
+
+
+@case("skills.get_skill_ability_class.all")
+def skill_lookup():
+    from take10.skills import SkillClass, get_skill_ability_class
+    skills = list(SkillClass)
+    return lambda: [get_skill_ability_class(s) for s in skills]
+
+
+@case("builds.best_build.uncached")
+def best_build_uncached():
+    from take10.abilities import AbilityClass
+    from take10.builds import Concept, best_build, clear_cache
+    from take10.races import Race
+
+    class Human(Race):
+        """+2 to any one ability"""
+
+        def get_starting_ability_bonus(self):
+            for ability in AbilityClass:
+                yield tuple(2 if a is ability else 0 for a in AbilityClass)
+
+        def get_starting_skill_bonus(self):
+            return ()
+
+    concept = Concept({a: i + 1 for i, a in enumerate(AbilityClass)})
+
+    def run():
+        clear_cache()
+        return best_build(Human, [18, 17, 14, 12, 9, 7], concept)
+    return run
+
+
+@case("item.total_weight.after_change")
+def total_weight():
+    from take10.inventory import Inventory
+    from take10.item import Item
+    rng = random.Random(SEED)
+    character = Inventory("Character")
+    leaves = []
+    for b in range(10):
+        bag = Inventory("Bag {}".format(b), 1.0)
+        character.add(bag)
+        for i in range(100):
+            item = Item("Item {}-{}".format(b, i), rng.uniform(0.01, 10.0),
+                        rng.randint(1, 50))
+            bag.add(item)
+            leaves.append(item)
+    picks = [rng.choice(leaves) for _ in range(1024)]
+    state = {"i": 0}
+
+    def run():
+        state["i"] = (state["i"] + 1) % len(picks)
+        picks[state["i"]].quantity += 1
+        return character.total_weight()
+    return run
+
+
+def _sheets(count: int) -> list:
+    from take10.abilities import AbilityScores
+    from take10.charactersheet import CharacterSheet
+    from take10.skills import SkillSet
+    rng = random.Random(SEED)
+    return [CharacterSheet(
+        "Hero {}".format(i), "Seeded sheet {}".format(i),
+        CharacterSheet.Alignment(rng.randrange(9)), None,
+        CharacterSheet.Sex(rng.randrange(3)),
+        AbilityScores(*(rng.randint(3, 18) for _ in range(6))),
+        SkillSet(*(rng.randint(0, 5) for _ in range(35))))
+        for i in range(count)]
+
+
+@case("serialization.encode_sheet")
+def encode():
+    from take10.serialization import encode_sheet
+    sheet = _sheets(1)[0]
+    return lambda: encode_sheet(sheet)
+
+
+@case("serialization.decode_sheet")
+def decode():
+    from take10.serialization import decode_sheet, encode_sheet
+    data = encode_sheet(_sheets(1)[0])
+    return lambda: decode_sheet(data)
+
+
+@case("serialization.SheetFile.ability_column.1000")
+def sheet_file():
+    from take10.abilities import AbilityClass
+    from take10.serialization import SheetFile, write_sheets
+    directory = tempfile.TemporaryDirectory()
+    path = os.path.join(directory.name, "sheets.t10")
+    write_sheets(path, _sheets(1000))
+
+    def run(directory=directory):
+        with SheetFile(path) as sheets:
+            return sum(sheets.ability_column(AbilityClass.STRENGTH))
+    return run
+
+
+def _content(count: int) -> tuple:
+    """Returns a content file of count seeded creatures and its directory"""
+    from take10.content import ContentFile, Creature, write_content
+    from take10.sizes import SizeClass
+    rng = random.Random(SEED)
+    directory = tempfile.TemporaryDirectory()
+    path = os.path.join(directory.name, "content.t10")
+    write_content(path, creatures=(Creature(
+        "Creature {}".format(i), SizeClass(rng.randint(1, 9)),
+        rng.randint(1, 30), [rng.randint(3, 30) for _ in range(6)],
+        rng.randint(1, 400), rng.randint(10, 40),
+        "{}d6".format(rng.randint(1, 8))) for i in range(count)))
+    return ContentFile(path), directory
+
+
+@case("content.by_name.prefix.10000")
+def content_by_name():
+    content, directory = _content(10000)
+
+    def run(directory=directory):
+        return len(content.by_name("creature", "creature 12"))
+    return run
+
+
+@case("content.by_cr.range.10000")
+def content_by_cr():
+    content, directory = _content(10000)
+
+    def run(directory=directory):
+        return len(content.by_cr(5, 8))
+    return run
+
+
+@case("content.creature.10000")
+def content_creature():
+    content, directory = _content(10000)
+
+    def run(directory=directory):
+        return content.creature(5000)
+    return run
+
+
+def measure(run, repeat: int, min_time: float) -> dict:
+    """Times a callable, returns nanoseconds per call"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 5 or number >= 1 << 24:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(
+            10, int(min_time / 5 / elapsed) + 1))
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        rounds.append((time.perf_counter() - start) / number * 1e9)
+    return {
+        "ns_per_op": statistics.median(rounds),
+        "min_ns_per_op": min(rounds),
+        "ops_per_round": number,
+        "rounds": rounds,
+    }
+
+
+def commit_of(root: str) -> str:
+    """Returns the commit checked out at root, or None outside git"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=root,
+            stderr=subprocess.DEVNULL, universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(root: str, pattern: str, repeat: int, min_time: float) -> dict:
+    """Runs every case matching pattern against the take10 at root"""
+    sys.path.insert(0, root)
+    try:
+        from take10._compat import numpy
+    except ImportError:
+        # Older trees import numpy directly, if at all
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+    results, skipped, failed = {}, {}, {}
+    for name, setup in CASES:
+        if pattern and pattern not in name:
+            continue
+        random.seed(SEED)
+        try:
+            run = setup()
+        except (ImportError, AttributeError) as e:
+            # The tree does not have the subsystem (yet)
+            skipped[name] = "{}: {}".format(type(e).__name__, e)
+            print("{:<48} skipped ({})".format(name, skipped[name]))
+            continue
+        except Exception as e:
+            failed[name] = "{}: {}".format(type(e).__name__, e)
+            print("{:<48} FAILED ({})".format(name, failed[name]))
+            continue
+        try:
+            run()
+        except Exception as e:
+            failed[name] = "{}: {}".format(type(e).__name__, e)
+            print("{:<48} FAILED ({})".format(name, failed[name]))
+            continue
+        results[name] = measure(run, repeat, min_time)
+        print("{:<48} {:>14.1f} ns/op".format(
+            name, results[name]["ns_per_op"]))
+    return {
+        "meta": {
+            "commit": commit_of(root),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "numpy": getattr(numpy, "__version__", None),
+            "seed": SEED,
+            "repeat": repeat,
+            "min_time": min_time,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+        "skipped": skipped,
+        "failed": failed,
+    }
+
+
+def compare(base: dict, head: dict, threshold: float) -> list:
+    """
+    Compares two result sets.
+
+    :returns [(case, base ns, head ns, ratio, slower)] of the shared cases
+    """
+    rows = []
+    for name in sorted(set(base["results"]) & set(head["results"])):
+        before = base["results"][name]["ns_per_op"]
+        after = head["results"][name]["ns_per_op"]
+        ratio = after / before if before else float("inf")
+        rows.append((name, before, after, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def report(base: dict, head: dict, threshold: float) -> int:
+    """Prints a comparison, returns the exit status"""
+    print("base {}  head {}".format(
+        (base["meta"]["commit"] or "?")[:10],
+        (head["meta"]["commit"] or "?")[:10]))
+    print("{:<48} {:>12} {:>12} {:>8}".format(
+        "case", "base ns", "head ns", "ratio"))
+    rows = compare(base, head, threshold)
+    for name, before, after, ratio, slower in rows:
+        print("{:<48} {:>12.1f} {:>12.1f} {:>7.2f}x{}".format(
+            name, before, after, ratio, "  SLOWER" if slower else ""))
+    head_failed = head.get("failed", {})
+    for name in sorted(set(head["results"]) - set(base["results"])):
+        print("{:<48} only in head".format(name))
+    broken = sorted(set(base["results"]) - set(head["results"]) |
+                    set(head_failed))
+    for name in broken:
+        print("{:<48} BROKEN in head ({})".format(
+            name, head_failed.get(name) or head["skipped"].get(name) or
+            "not run"))
+    slower = [row[0] for row in rows if row[4]]
+    if slower:
+        print("{} case(s) more than {:.0%} slower".format(
+            len(slower), threshold))
+    if broken:
+        print("{} case(s) broken in head".format(len(broken)))
+    return 1 if slower or broken else 0
+
+
+def run_commit(commit: str, args) -> dict:
+    """Runs this suite against a commit checked out in a worktree"""
+    with tempfile.TemporaryDirectory() as directory:
+        tree = os.path.join(directory, "tree")
+        output = os.path.join(directory, "results.json")
+        subprocess.check_call(["git", "worktree", "add", "--detach", "-q",
+                               tree, commit], cwd=ROOT)
+        try:
+            # Exits with 1 if a case failed, which report() then flags
+            subprocess.call([
+                sys.executable, os.path.abspath(__file__), "--root", tree,
+                "--output", output, "--repeat", str(args.repeat),
+                "--min-time", str(args.min_time)] +
+                (["--filter", args.filter] if args.filter else []))
+            with open(output) as f:
+                return json.load(f)
+        finally:
+            subprocess.call(["git", "worktree", "remove", "--force", tree],
+                            cwd=ROOT)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--output", help="JSON file to write results to")
+    parser.add_argument("--filter", help="only run cases containing this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="seconds per timed round")
+    parser.add_argument("--root", default=ROOT,
+                        help="tree to import take10 from")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"),
+                        help="compare two result files")
+    parser.add_argument("--commits", nargs=2, metavar=("BASE", "HEAD"),
+                        help="run and compare two commits")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="slowdown ratio flagged, 0.1 is 10%%")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            base = json.load(f)
+        with open(args.compare[1]) as f:
+            head = json.load(f)
+        return report(base, head, args.threshold)
+    if args.commits:
+        base = run_commit(args.commits[0], args)
+        head = run_commit(args.commits[1], args)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({"base": base, "head": head}, f, indent=1)
+        return report(base, head, args.threshold)
+
+    results = run_suite(os.path.abspath(args.root), args.filter,
+                        args.repeat, args.min_time)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+    return 1 if results["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+.. module:: bench_sync
+   :platform: Unix, Windows
+   :synopsis: Delta sync throughput, latency and wire size
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Usage: python benchmarks/bench_sync.py [--peers 6] [--changes 100000]
+
+Every peer tracks one AbilityScores per player on a loopback network.
+Throughput pushes bursts of changes through manual flushes; latency paces
+changes against the running tick loop and times each one from the setter
+to the signal on a remote peer.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                "..")))
+
+from take10 import serialization, sync  # noqa: E402
+from take10.charactersheet import CharacterSheet  # noqa: E402
+from take10.qtabilities import AbilityScores  # noqa: E402
+from take10.skills import SkillSet  # noqa: E402
+
+FIELDS = ("strength", "dexterity", "intelligence", "wisdom", "charisma",
+          "constitution")
+SCORES = (10, 12, 14, 8, 13, 15)
+
+
+def build_table(peers: int, interval: float, latency: float=0.0):
+    """Returns (network, sessions, scores[peer][player])"""
+    network = sync.LoopbackNetwork(latency)
+    sessions = []
+    scores = []
+    for peer in range(peers):
+        session = network.session(peer + 1, interval)
+        row = [AbilityScores(*SCORES) for _ in range(peers)]
+        for player, sheet in enumerate(row):
+            session.track(player, sheet)
+        sessions.append(session)
+        scores.append(row)
+    return network, sessions, scores
+
+
+async def throughput(peers: int, changes: int, per_tick: int) -> dict:
+    network, sessions, scores = build_table(peers, sync.TICK_INTERVAL)
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for i in range(changes):
+        player = rng.randrange(peers)
+        setattr(scores[player][player], FIELDS[i % 6], i % 100 + 1)
+        if i % per_tick == per_tick - 1:
+            for session in sessions:
+                session.flush()
+            await asyncio.sleep(0)
+    for session in sessions:
+        session.flush()
+    for _ in range(3):
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    sent = sum(s.deltas_sent for s in sessions)
+    return {
+        "changes_per_s": changes / elapsed,
+        "deltas_sent": sent,
+        "bytes_per_delta": sum(s.bytes_sent for s in sessions) / sent,
+        "applied": sum(s.deltas_applied for s in sessions),
+    }
+
+
+async def latency(peers: int, changes: int, interval: float,
+                  wire_latency: float) -> list:
+    network, sessions, scores = build_table(peers, interval, wire_latency)
+    stamps = {}
+    delays = []
+
+    def received(player: int, field: int, value: int):
+        sent = stamps.pop((player, field, value), None)
+        if sent is not None:
+            delays.append(time.perf_counter() - sent)
+
+    observer = scores[0]
+    for player in range(1, peers):
+        for field, name in enumerate(FIELDS):
+            getattr(observer[player], name + "_changed").connect(
+                lambda value, p=player, f=field: received(p, f, value))
+    for session in sessions:
+        session.start()
+    rng = random.Random(2)
+    for i in range(changes):
+        player = rng.randrange(1, peers)
+        field = rng.randrange(6)
+        value = i % 100 + 1
+        stamps[(player, field, value)] = time.perf_counter()
+        setattr(scores[player][player], FIELDS[field], value)
+        await asyncio.sleep(rng.uniform(0, 2 * interval / peers))
+    await asyncio.sleep(interval * 2 + wire_latency)
+    for session in sessions:
+        session.stop()
+    return delays
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--peers", type=int, default=6)
+    parser.add_argument("--changes", type=int, default=100000)
+    parser.add_argument("--per-tick", type=int, default=60,
+                        help="changes per flush in the throughput run")
+    parser.add_argument("--interval", type=float, default=sync.TICK_INTERVAL)
+    parser.add_argument("--paced", type=int, default=2000,
+                        help="changes in the latency run")
+    parser.add_argument("--wire-latency", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    sheet = CharacterSheet(
+        "Gimble", "Stout and grumpy",
+        CharacterSheet.Alignment.NEUTRAL_GOOD, None,
+        CharacterSheet.Sex.MALE, AbilityScores(*SCORES), SkillSet())
+    full = len(serialization.encode_sheet(sheet))
+
+    result = asyncio.run(throughput(args.peers, args.changes, args.per_tick))
+    print("{} peers, {} changes, {} per tick".format(
+        args.peers, args.changes, args.per_tick))
+    print("throughput     {:>12.0f} changes/s".format(result["changes_per_s"]))
+    print("wire size      {:>12.1f} bytes/delta (whole sheet: {} bytes)".format(
+        result["bytes_per_delta"], full))
+    print("coalesced      {:>12} of {} changes sent".format(
+        result["deltas_sent"], args.changes))
+
+    delays = asyncio.run(latency(args.peers, args.paced, args.interval,
+                                 args.wire_latency))
+    delays.sort()
+    print("latency (ms)   median {:.2f}, p99 {:.2f}, max {:.2f} "
+          "({} samples, tick {} ms)".format(
+              statistics.median(delays) * 1e3,
+              delays[int(len(delays) * 0.99)] * 1e3, delays[-1] * 1e3,
+              len(delays), args.interval * 1e3))
+
+
+if __name__ == "__main__":
+    main()
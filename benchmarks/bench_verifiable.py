@@ -0,0 +1,75 @@
+"""
+.. module:: bench_verifiable
+   :platform: Unix, Windows
+   :synopsis: Per-roll cost of commit-reveal dice rolls
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Usage: python benchmarks/bench_verifiable.py [--size 1024] [--per-reveal 4]
+
+Rolls a whole commitment, revealing every few rolls as a combat round
+would, and reports the time and wire bytes per roll on both sides.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                "..")))
+
+from take10.dice import compile_expression  # noqa: E402
+from take10.dice.verifiable import RollCommitment, RollVerifier  # noqa: E402
+from take10.rng import RollStream  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1024)
+    parser.add_argument("--per-reveal", type=int, default=4)
+    parser.add_argument("--expression", default="1d20+5")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    commitment = RollCommitment(args.size, RollStream(1))
+    setup = time.perf_counter() - start
+    verifier = RollVerifier(commitment.commitment())
+
+    nonces = [i.to_bytes(4, "little") for i in range(commitment.size)]
+    start = time.perf_counter()
+    messages = []
+    for i in range(commitment.size):
+        commitment.roll(args.expression, nonces[i])
+        if (i + 1) % args.per_reveal == 0:
+            messages.append(commitment.reveal().to_bytes())
+    messages.append(commitment.reveal().to_bytes())
+    expressions = [args.expression] * commitment.size
+    rolling = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i, message in enumerate(messages):
+        first = i * args.per_reveal
+        end = min(first + args.per_reveal, commitment.size)
+        verifier.verify(message, nonces[first:end], expressions[first:end])
+    verifying = time.perf_counter() - start
+
+    plan = compile_expression(args.expression)
+    start = time.perf_counter()
+    for _ in range(commitment.size):
+        plan.roll_one()
+    plain = time.perf_counter() - start
+
+    n = commitment.size
+    print("{} rolls of {}, revealed {} at a time".format(
+        n, args.expression, args.per_reveal))
+    print("commit         {:>8.2f} us/roll".format(setup / n * 1e6))
+    print("roll + reveal  {:>8.2f} us/roll (plain roll {:.2f} us)".format(
+        rolling / n * 1e6, plain / n * 1e6))
+    print("verify         {:>8.2f} us/roll".format(verifying / n * 1e6))
+    print("wire           {:>8.1f} bytes/roll".format(
+        sum(map(len, messages)) / n))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+.. module:: _compat
+   :platform: Unix, Windows
+   :synopsis: Optional dependency and platform handling
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Optional dependencies are looked up when take10 is imported but only
+loaded on first use, so that e.g. rolling a few dice never pays for
+importing numpy.
+"""
+
+import sys
+from array import array
+from importlib import import_module
+from importlib.machinery import PathFinder
+
+
+class LazyModule(object):
+    """
+    Stands in for a module until one of its attributes is first used.
+
+    On first use the module is imported and its attributes are copied into
+    the stand-in, so later lookups cost the same as on the module itself.
+    Attributes the module only creates on access (e.g. numpy.random) are
+    still forwarded to it.
+    """
+
+    def __init__(self, name: str):
+        """
+        :param str name: Absolute name of the module
+        """
+        self.__dict__["_LazyModule__name"] = name
+        self.__dict__["_LazyModule__module"] = None
+
+    def __repr__(self) -> str:
+        return "<lazy module {!r}{}>".format(
+            self.__name, "" if self.__module is None else " (loaded)")
+
+    def _load(self):
+        """Imports the module now and returns it"""
+        if self.__module is None:
+            module = import_module(self.__name)
+            self.__dict__.update(module.__dict__)
+            self.__dict__["_LazyModule__module"] = module
+        return self.__module
+
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name: str, value):
+        setattr(self._load(), name, value)
+        self.__dict__[name] = value
+
+
+def optional_module(name: str):
+    """
+    Returns a LazyModule for an installed module, or None if it is missing.
+
+    :param str name: Absolute name of the module
+    """
+    # PathFinder rather than importlib.util.find_spec, whose import pulls
+    # in contextlib and adds a few milliseconds to every startup
+    if name not in sys.modules and \
+            PathFinder.find_spec(name.partition(".")[0]) is None:
+        return None
+    return LazyModule(name)
+
+
+#: numpy, imported on first use; None if it is not installed
+numpy = optional_module("numpy")
+
+
+def require_numpy(feature: str):
+    """
+    Returns the numpy module, or raises if it is not installed.
+
+    :param str feature: Name of the feature that needs numpy, for the error
+    :returns numpy module
+    :raises: ImportError
+    """
+    if numpy is None:
+        raise ImportError("{} requires numpy to be installed".format(feature))
+    return numpy._load()
+
+
+def little_endian(values: array) -> bytes:
+    """Returns the bytes of an array in little-endian order"""
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def typed_view(view: memoryview, typecode: str):
+    """Returns a typed, little-endian view (a copy on big-endian hosts)"""
+    if sys.byteorder == "little":
+        return view.cast(typecode)
+    values = array(typecode, view.tobytes())
+    values.byteswap()
+    return values
@@ -0,0 +1,360 @@
+"""
+.. module:: _scoretable
+   :platform: Unix, Windows
+   :synopsis: Precomputed exact score generator statistics
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Generated by ``python -m take10.scorestats``; do not edit.
+"""
+
+#: {generator name: (expression, minimum, score pmf, pmfs of the
+#: sorted array positions from highest to lowest)}
+TABLE = {
+    "ClassicScoreGenerator": ("3d6", 3, (
+        0.004629629629629629,
+        0.013888888888888888,
+        0.027777777777777776,
+        0.046296296296296294,
+        0.06944444444444443,
+        0.09722222222222221,
+        0.11574074074074073,
+        0.12499999999999999,
+        0.12499999999999997,
+        0.11574074074074074,
+        0.09722222222222224,
+        0.06944444444444442,
+        0.046296296296296294,
+        0.027777777777777776,
+        0.013888888888888888,
+        0.004629629629629629,
+    ), (
+        (
+            9.846400420048509e-15,
+            4.032100972009864e-11,
+            9.80606956392799e-09,
+            6.203232264630561e-07,
+            1.7470129795277635e-05,
+            0.00028557233364810507,
+            0.002477241673570359,
+            0.012844085693359375,
+            0.043979644775390625,
+            0.10559054189425393,
+            0.18102225453979937,
+            0.21201352141686386,
+            0.19422452755628605,
+            0.14145216951432227,
+            0.0786340868804698,
+            0.027458253422613432,
+        ),
+        (
+            1.2711702942282626e-11,
+            1.2852831399503184e-08,
+            1.213995949235599e-06,
+            3.645728219527161e-05,
+            0.0005420425892335958,
+            0.004929762467067904,
+            0.025080568173057767,
+            0.07878494262695312,
+            0.16480636596679688,
+            0.2379237127091014,
+            0.2358011064782044,
+            0.15209883622300602,
+            0.07161226206255178,
+            0.023487469807850325,
+            0.00457769323436108,
+            0.00031755351812812194,
+        ),
+        (
+            6.839959594193419e-09,
+            1.7053662061463072e-06,
+            6.219093256037434e-05,
+            0.0008816033694492953,
+            0.006895247686412016,
+            0.034853139054821985,
+            0.10376759356699683,
+            0.19728851318359375,
+            0.25229644775390625,
+            0.21960478642746395,
+            0.12644149845979136,
+            0.04509954862135568,
+            0.011022307184068825,
+            0.0016636126099150994,
+            0.00011983495914380526,
+            1.9639843550356417e-06,
+        ),
+        (
+            1.9639843550861855e-06,
+            0.00011983495914374357,
+            0.0016636126099150211,
+            0.011022307184068821,
+            0.04509954862135565,
+            0.12644149845979133,
+            0.2196047864274641,
+            0.25229644775390625,
+            0.19728851318359375,
+            0.10376759356699672,
+            0.03485313905482201,
+            0.0068952476864120316,
+            0.0008816033694493131,
+            6.219093256043529e-05,
+            1.7053662061394803e-06,
+            6.839959598714529e-09,
+        ),
+        (
+            0.0003175535181281699,
+            0.0045776932343609585,
+            0.02348746980785024,
+            0.07161226206255167,
+            0.15209883622300613,
+            0.23580110647820435,
+            0.23792371270910162,
+            0.16480636596679688,
+            0.07878494262695312,
+            0.025080568173057705,
+            0.0049297624670678886,
+            0.0005420425892336267,
+            3.64572821952569e-05,
+            1.2139959493229213e-06,
+            1.2852831354770444e-08,
+            1.2711720565050655e-11,
+        ),
+        (
+            0.027458253422613377,
+            0.07863408688047009,
+            0.1414521695143222,
+            0.1942245275562863,
+            0.21201352141686414,
+            0.18102225453979903,
+            0.10559054189425421,
+            0.043979644775390625,
+            0.012844085693359375,
+            0.0024772416735703295,
+            0.0002855723336480098,
+            1.7470129795360556e-05,
+            6.203232264523351e-07,
+            9.806069622975144e-09,
+            4.032096878603397e-11,
+            9.880984919163893e-15,
+        ),
+    )),
+    "HeroicScoreGenerator": ("2d6+6", 8, (
+        0.027777777777777776,
+        0.05555555555555555,
+        0.08333333333333333,
+        0.1111111111111111,
+        0.13888888888888887,
+        0.16666666666666669,
+        0.13888888888888887,
+        0.1111111111111111,
+        0.08333333333333333,
+        0.05555555555555555,
+        0.027777777777777776,
+    ), (
+        (
+            4.5939365799778324e-10,
+            3.344385830223862e-07,
+            2.109857253086419e-05,
+            0.0004379601874902389,
+            0.004773387227633215,
+            0.034167631172839476,
+            0.10251353629139323,
+            0.1929840283305202,
+            0.2583942177854939,
+            0.2511953753744537,
+            0.15551243015966854,
+        ),
+        (
+            9.693206183753226e-08,
+            2.2341232375748196e-05,
+            0.0006419994212962961,
+            0.006961497137029324,
+            0.04156220560216819,
+            0.15907118055555547,
+            0.261148354430601,
+            0.26736787338575696,
+            0.18013057002314836,
+            0.07235074880725234,
+            0.01074313247275449,
+        ),
+        (
+            8.5382905275468e-06,
+            0.0006217397015849358,
+            0.008071711033950617,
+            0.04550646261767534,
+            0.14882344671874437,
+            0.3067611882716048,
+            0.2745124030627928,
+            0.15340884500819496,
+            0.05274040316358042,
+            0.009142793779083558,
+            0.00040246835226065425,
+        ),
+        (
+            0.00040246835226064596,
+            0.009142793779083658,
+            0.052740403163580245,
+            0.15340884500819474,
+            0.2745124030627929,
+            0.3067611882716049,
+            0.14882344671874426,
+            0.04550646261767555,
+            0.008071711033950768,
+            0.0006217397015847448,
+            8.538290527604353e-06,
+        ),
+        (
+            0.0107431324727545,
+            0.07235074880725234,
+            0.1801305700231482,
+            0.2673678733857568,
+            0.26114835443060114,
+            0.15907118055555558,
+            0.041562205602168056,
+            0.0069614971370295375,
+            0.0006419994212963909,
+            2.234123237554453e-05,
+            9.693206193261972e-08,
+        ),
+        (
+            0.15551243015966845,
+            0.2511953753744536,
+            0.258394217785494,
+            0.19298402833052009,
+            0.10251353629139337,
+            0.0341676311728395,
+            0.004773387227633097,
+            0.0004379601874904271,
+            2.1098572530964255e-05,
+            3.3443858282744543e-07,
+            4.5939374526682286e-10,
+        ),
+    )),
+    "StandardScoreGenerator": ("4d6dl1", 3, (
+        0.0007716049382716048,
+        0.0030864197530864187,
+        0.007716049382716048,
+        0.016203703703703703,
+        0.029320987654320986,
+        0.047839506172839504,
+        0.07021604938271604,
+        0.0941358024691358,
+        0.11419753086419754,
+        0.12885802469135801,
+        0.13271604938271603,
+        0.12345679012345678,
+        0.10108024691358024,
+        0.07253086419753085,
+        0.041666666666666664,
+        0.0162037037037037,
+    ), (
+        (
+            2.1104253300858412e-19,
+            3.2973285357261166e-15,
+            2.4006088129726444e-12,
+            4.569897516452323e-10,
+            3.4195159965194464e-08,
+            1.3007210601464817e-06,
+            2.7539833226503336e-05,
+            0.00035247373905285956,
+            0.0027992456955004265,
+            0.014906902144444317,
+            0.053958135210397884,
+            0.13398226110072992,
+            0.22639978829784965,
+            0.2668730371085859,
+            0.20733139796703293,
+            0.0933678835275652,
+        ),
+        (
+            1.6400115240097073e-15,
+            5.110205842693287e-12,
+            1.2290536755454168e-09,
+            9.569789631613262e-08,
+            3.371333129153844e-06,
+            6.620692124510868e-05,
+            0.0007750836765958518,
+            0.005745256909872009,
+            0.027270198026281785,
+            0.08752214416256963,
+            0.18851727441343097,
+            0.26846782656528356,
+            0.243130026304057,
+            0.1355307707935779,
+            0.03920044606219408,
+            0.003771297899701098,
+        ),
+        (
+            5.310494070304824e-12,
+            3.297369288883413e-09,
+            2.609125905509982e-07,
+            8.274075257212848e-06,
+            0.00013668241381425272,
+            0.0013817004481586981,
+            0.008923340203162563,
+            0.03825728653246478,
+            0.10845757388629915,
+            0.21000922512526454,
+            0.2699167931710609,
+            0.22165249796723585,
+            0.10861187038813436,
+            0.029250072171672636,
+            0.0033123926754157207,
+            8.202672678903067e-05,
+        ),
+        (
+            9.17193183556518e-09,
+            1.1293734697595102e-06,
+            2.9070451670061505e-05,
+            0.0003722593551889894,
+            0.0028638601114016494,
+            0.014833193871531352,
+            0.05266370327669648,
+            0.13032370303313173,
+            0.22038569540228964,
+            0.2576305120266283,
+            0.19803281028064101,
+            0.09420856682297307,
+            0.02517397178532077,
+            0.0033284817577453607,
+            0.00015202584109408335,
+            1.0074382859048825e-06,
+        ),
+        (
+            8.912252909762467e-06,
+            0.00021206604557075,
+            0.001727193972965859,
+            0.008794960201308127,
+            0.03117853736141097,
+            0.08219375712560935,
+            0.15966946866282036,
+            0.22740935446249538,
+            0.22896302333249463,
+            0.1616179199885739,
+            0.07442230578086284,
+            0.02058395867567475,
+            0.00301689158645424,
+            0.0001979440277417588,
+            3.6999113264268857e-06,
+            6.611780900556141e-09,
+        ),
+        (
+            0.004620708199475897,
+            0.018305319796995213,
+            0.04453976972761553,
+            0.0880466324355818,
+            0.14174344051100987,
+            0.18856087794943238,
+            0.19923716064379493,
+            0.1627267401377981,
+            0.09730944884231896,
+            0.04146144470066804,
+            0.01144897743990203,
+            0.001845629608844046,
+            0.0001489331196646848,
+            4.879325861795181e-06,
+            3.754293631530459e-08,
+            1.8100410059673777e-11,
+        ),
+    )),
+}
@@ -9,28 +9,50 @@
 
 from enum import Enum, unique
 from abc import ABC, abstractmethod
+from functools import lru_cache
 
-from PyQt5.QtCore import QObject, Q_ENUMS, pyqtProperty, pyqtSignal
+from ._compat import require_numpy
+from .dice import RollBlock, roll
+from .pointbuy import POINT_BUY_BUDGETS, PointBuy
+from .rng import RollStream
 
-from .dice import roll
+#: Rows generated per independently seeded chunk by generate_population
+POPULATION_CHUNK = 250000
 
+#: Populations at least this large are generated across worker processes
+PARALLEL_THRESHOLD = 2000000
 
-class AbilityScores(QObject):
+
+@unique
+class AbilityClass(Enum):
+    """Standard Pathfinder ability classes"""
+    STRENGTH = 0
+    DEXTERITY = 1
+    INTELLIGENCE = 2
+    WISDOM = 3
+    CHARISMA = 4
+    CONSTITUTION = 5
+
+
+class ScoreBlock(object):
     """
-    AbilityScores are the core statistics for a character.
+    Compact, Qt-free ability scores for headless and server-side use.
+
+    ScoreBlock exposes the same properties as AbilityScores without a QObject
+    behind it, so millions of them can be built cheaply. AbilityScores wraps
+    a ScoreBlock when Qt change notifications are needed.
     """
 
-    @unique
-    class AbilityClass(Enum):
-        """Standard Pathfinder ability classes"""
-        STRENGTH = 0
-        DEXTERITY = 1
-        INTELLIGENCE = 2
-        WISDOM = 3
-        CHARISMA = 4
-        CONSTITUTION = 5
+    __slots__ = (
+        "_strength",
+        "_dexterity",
+        "_intelligence",
+        "_wisdom",
+        "_charisma",
+        "_constitution",
+    )
 
-    Q_ENUMS(AbilityClass)
+    AbilityClass = AbilityClass
 
     def __init__(
         self,
@@ -41,8 +63,6 @@ class AbilityScores(QObject):
         CHARISMA: int,
         CONSTITUTION: int
     ):
-        QObject.__init__(self)
-
         self._strength = STRENGTH
         self._dexterity = DEXTERITY
         self._intelligence = INTELLIGENCE
@@ -50,18 +70,19 @@ class AbilityScores(QObject):
         self._charisma = CHARISMA
         self._constitution = CONSTITUTION
 
-    # Qt Signals for monitoring property changes
-    strength_changed = pyqtSignal(int)
-    dexterity_changed = pyqtSignal(int)
-    intelligence_changed = pyqtSignal(int)
-    wisdom_changed = pyqtSignal(int)
-    charisma_changed = pyqtSignal(int)
-    constitution_changed = pyqtSignal(int)
+    def __repr__(self) -> str:
+        return "ScoreBlock({})".format(", ".join(
+            "{}={}".format(k, v) for k, v in self.scores_as_dict().items()))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ScoreBlock):
+            return NotImplemented
+        return self.as_tuple() == other.as_tuple()
 
-    # Properties for gated acess to stat fields
+    __hash__ = None
 
-    @pyqtProperty(int, notify=strength_changed)
-    def strength(self):
+    @property
+    def strength(self) -> int:
         return self._strength
 
     @strength.setter
@@ -70,8 +91,8 @@ class AbilityScores(QObject):
             raise ValueError("AbilityScores cannot be negative")
         self._strength = score
 
-    @pyqtProperty(int, notify=dexterity_changed)
-    def dexterity(self):
+    @property
+    def dexterity(self) -> int:
         return self._dexterity
 
     @dexterity.setter
@@ -80,8 +101,8 @@ class AbilityScores(QObject):
             raise ValueError("AbilityScores cannot be negative")
         self._dexterity = score
 
-    @pyqtProperty(int, notify=intelligence_changed)
-    def intelligence(self):
+    @property
+    def intelligence(self) -> int:
         return self._intelligence
 
     @intelligence.setter
@@ -90,8 +111,8 @@ class AbilityScores(QObject):
             raise ValueError("AbilityScores cannot be negative")
         self._intelligence = score
 
-    @pyqtProperty(int, notify=wisdom_changed)
-    def wisdom(self):
+    @property
+    def wisdom(self) -> int:
         return self._wisdom
 
     @wisdom.setter
@@ -100,8 +121,8 @@ class AbilityScores(QObject):
             raise ValueError("AbilityScores cannot be negative")
         self._wisdom = score
 
-    @pyqtProperty(int, notify=charisma_changed)
-    def charisma(self):
+    @property
+    def charisma(self) -> int:
         return self._charisma
 
     @charisma.setter
@@ -110,8 +131,8 @@ class AbilityScores(QObject):
             raise ValueError("AbilityScores cannot be negative")
         self._charisma = score
 
-    @pyqtProperty(int, notify=constitution_changed)
-    def constitution(self):
+    @property
+    def constitution(self) -> int:
         return self._constitution
 
     @constitution.setter
@@ -124,6 +145,17 @@ class AbilityScores(QObject):
     def get_ability_class_names(cls):
         return cls.AbilityClass.__members__.keys()
 
+    def as_tuple(self) -> tuple:
+        """Returns the ability scores as a tuple in AbilityClass order"""
+        return (
+            self._strength,
+            self._dexterity,
+            self._intelligence,
+            self._wisdom,
+            self._charisma,
+            self._constitution,
+        )
+
     def scores_as_dict(self) -> dict:
         """Returns the ability scores as a dict"""
         return {
@@ -136,28 +168,126 @@ class AbilityScores(QObject):
         }
 
 
+@lru_cache(maxsize=None)
+def _ability_scores_type():
+    """Returns AbilityScores, or ScoreBlock when Qt is not installed"""
+    try:
+        import PyQt5.QtCore  # noqa: F401
+    except ImportError:
+        return ScoreBlock
+    from .qtabilities import AbilityScores
+    return AbilityScores
+
+
+def __getattr__(name: str):
+    # AbilityScores lives in qtabilities so that importing this module does
+    # not pull in PyQt5; it is resolved (and cached) on first access.
+    if name == "AbilityScores":
+        AbilityScores = _ability_scores_type()
+        globals()["AbilityScores"] = AbilityScores
+        return AbilityScores
+    raise AttributeError("module {!r} has no attribute {!r}".format(
+        __name__, name))
+
+
 class AbilityScoreGenerator(ABC):
     """
     Abstract base class for algorithms that generate ability scores.
     """
 
+    #: Dice expression of a single score, if every score is an independent
+    #: roll of it; lets scorestats compute exact statistics
+    expression = None
+
     @staticmethod
     @abstractmethod
-    def generate_scores(**kwargs) -> AbilityScores:
+    def generate_scores(**kwargs) -> "AbilityScores":
         """
         Generates a single AbilityScores tuple using a specified algorithm with
         arbitrary parameters.
 
+        Every generator accepts ``rng``, a RollStream to draw the dice from,
+        for reproducible scores.
+
         :param AbilityScores kwargs: Optional parameters for score generation.
         :returns AbilityScores
         """
         ...
 
+    @classmethod
+    def generate_array(cls, n: int, generator):
+        """
+        Generates n rows of ability scores as an N x 6 int8 array, with
+        columns in AbilityClass order.
+
+        Subclasses should override this with a vectorized draw from the given
+        generator's integers(); this fallback calls generate_scores once per
+        row, drawing from the generator only if it is a RollStream.
+
+        :param int n: Number of rows to generate
+        :param generator: numpy random Generator or RollStream to draw from
+        :returns numpy.ndarray
+        """
+        numpy = require_numpy("generate_array")
+        rng = generator if isinstance(generator, RollStream) else None
+        rows = [
+            list(cls.generate_scores(rng=rng).scores_as_dict().values())
+            for _ in range(n)
+        ]
+        return numpy.array(rows, dtype=numpy.int8).reshape(n, 6)
+
+
+#: All score generator classes, by name
+SCORE_GENERATOR_CLASSES = {}
+
+#: List of all score generator functions
+SCORE_GENERATORS = {}
+
+
+def register_generator(cls: type) -> type:
+    """
+    Adds a score generator to SCORE_GENERATOR_CLASSES and SCORE_GENERATORS
+    under its class name, making it available to generate_population and
+    scorestats. Returns the class, so it can be used as a class decorator::
+
+        @register_generator
+        class FourD6RerollOnesScoreGenerator(AbilityScoreGenerator):
+            ...
+
+    :param type cls: AbilityScoreGenerator subclass
+    :returns cls
+    :raises: ValueError if another class is registered under the name
+    """
+    if not (isinstance(cls, type) and
+            issubclass(cls, AbilityScoreGenerator)):
+        raise ValueError("{!r} is not an AbilityScoreGenerator".format(cls))
+    registered = SCORE_GENERATOR_CLASSES.get(cls.__name__)
+    if registered is not None and registered is not cls:
+        raise ValueError("Score generator {} is already registered".format(
+            cls.__name__))
+    SCORE_GENERATOR_CLASSES[cls.__name__] = cls
+    SCORE_GENERATORS[cls.__name__] = cls.generate_scores
+    return cls
+
+
+def unregister_generator(name: str):
+    """
+    Removes a score generator from the registry.
+
+    :param str name: Class name of the generator
+    :raises: KeyError
+    """
+    del SCORE_GENERATOR_CLASSES[name]
+    del SCORE_GENERATORS[name]
 
+
+@register_generator
 class StandardScoreGenerator(AbilityScoreGenerator):
 
+    expression = "4d6dl1"
+
     @staticmethod
-    def generate_scores(**kwargs) -> AbilityScores:
+    def generate_scores(**kwargs) -> "AbilityScores":
         """
         #TODO: Assign these totals to your ability scores as you see fit.
 
@@ -170,16 +300,27 @@ class StandardScoreGenerator(AbilityScoreGenerator):
         :param dict kwargs: Optional parameters for score generation.
         :returns AbilityScores
         """
-        return AbilityScores(**{
-            ability: sum(sorted(roll(4, 6))[1:])
-            for ability in AbilityScores.get_ability_class_names()
+        return _ability_scores_type()(**{
+            ability: sum(sorted(roll(4, 6, kwargs.get("rng")))[1:])
+            for ability in ScoreBlock.get_ability_class_names()
         })
 
+    @classmethod
+    def generate_array(cls, n: int, generator):
+        numpy = require_numpy("generate_array")
+        values = generator.integers(
+            1, 6, endpoint=True, size=(4, n * 6), dtype=numpy.uint8)
+        totals = RollBlock(values.T, n * 6, 4).drop_lowest(1)
+        return totals.astype(numpy.int8).reshape(n, 6)
+
 
+@register_generator
 class ClassicScoreGenerator(AbilityScoreGenerator):
 
+    expression = "3d6"
+
     @staticmethod
-    def generate_scores(**kwargs) -> AbilityScores:
+    def generate_scores(**kwargs) -> "AbilityScores":
         """
         #TODO: Assign these totals to your ability scores as you see fit.
 
@@ -198,16 +339,26 @@ class ClassicScoreGenerator(AbilityScoreGenerator):
         :param dict kwargs: Optional parameters for score generation.
         :returns AbilityScores
         """
-        return AbilityScores(**{
-            ability: sum(roll(3, 6))
-            for ability in AbilityScores.get_ability_class_names()
+        return _ability_scores_type()(**{
+            ability: sum(roll(3, 6, kwargs.get("rng")))
+            for ability in ScoreBlock.get_ability_class_names()
         })
 
+    @classmethod
+    def generate_array(cls, n: int, generator):
+        numpy = require_numpy("generate_array")
+        values = generator.integers(
+            1, 6, endpoint=True, size=(3, n * 6), dtype=numpy.int8)
+        return values.sum(axis=0, dtype=numpy.int8).reshape(n, 6)
+
 
+@register_generator
 class HeroicScoreGenerator(AbilityScoreGenerator):
 
+    expression = "2d6+6"
+
     @staticmethod
-    def generate_scores(**kwargs) -> AbilityScores:
+    def generate_scores(**kwargs) -> "AbilityScores":
         """
         #TODO: Assign these totals to your ability scores as you see fit.
 
@@ -222,18 +373,123 @@ class HeroicScoreGenerator(AbilityScoreGenerator):
         :param dict kwargs: Optional parameters for score generation.
         :returns AbilityScores
         """
-        return AbilityScores(**{
-            ability: sum(roll(2, 6)) + 6
-            for ability in AbilityScores.get_ability_class_names()
+        return _ability_scores_type()(**{
+            ability: sum(roll(2, 6, kwargs.get("rng"))) + 6
+            for ability in ScoreBlock.get_ability_class_names()
         })
 
+    @classmethod
+    def generate_array(cls, n: int, generator):
+        numpy = require_numpy("generate_array")
+        values = generator.integers(
+            1, 6, endpoint=True, size=(2, n * 6), dtype=numpy.int8)
+        return (values.sum(axis=0, dtype=numpy.int8) + 6).reshape(n, 6)
 
-#: List of all score generator functions
-SCORE_GENERATORS = {
-    c.__name__: c.generate_scores
-    for c in [
-        StandardScoreGenerator,
-        HeroicScoreGenerator,
-        ClassicScoreGenerator,
-    ]
-}
+
+@register_generator
+class PointBuyScoreGenerator(AbilityScoreGenerator):
+
+    @staticmethod
+    def generate_scores(**kwargs) -> "AbilityScores":
+        """
+        Point-buy: every score starts at 10 and is raised or lowered for the
+        points in POINT_BUY_COSTS, spending a campaign's whole budget.
+
+        Draws uniformly among the allocations spending exactly ``budget``
+        (15, standard fantasy, by default), optionally within ``minimums``
+        and ``maximums`` by AbilityClass or with a custom ``costs`` table.
+        Use :class:`take10.pointbuy.PointBuy` to list the allocations.
+
+        :param dict kwargs: Optional parameters for score generation.
+        :returns AbilityScores
+        :raises: ValueError if no allocation meets the constraints
+        """
+        buy = PointBuy(
+            kwargs.get("budget", POINT_BUY_BUDGETS["standard fantasy"]),
+            kwargs.get("costs"), exact=True)
+        return _ability_scores_type()(*buy.random(
+            kwargs.get("rng"), kwargs.get("minimums"), kwargs.get("maximums")))
+
+    @classmethod
+    def generate_array(cls, n: int, generator):
+        arrays = _point_buy_arrays(POINT_BUY_BUDGETS["standard fantasy"])
+        return arrays[generator.integers(0, len(arrays), size=n)]
+
+
+@lru_cache(maxsize=None)
+def _point_buy_arrays(budget: int):
+    numpy = require_numpy("generate_array")
+    arrays = numpy.array(list(PointBuy(budget, exact=True).allocations()),
+                         dtype=numpy.int8)
+    arrays.flags.writeable = False
+    return arrays
+
+
+def _population_chunk(generator_name: str, rows: int, source):
+    numpy = require_numpy("generate_population")
+    if isinstance(source, RollStream):
+        generator = source
+    else:
+        generator = numpy.random.Generator(numpy.random.PCG64(source))
+    return SCORE_GENERATOR_CLASSES[generator_name].generate_array(
+        rows, generator)
+
+
+def generate_population(
+        generator_name: str,
+        n: int,
+        seed: int=None,
+        as_scores: bool=False,
+        workers: int=None,
+        rng: RollStream=None):
+    """
+    Generates ability scores for a whole population at once.
+
+    Rows are produced in chunks of POPULATION_CHUNK, each drawn from its own
+    stream spawned from seed, so the result for a given seed does not depend
+    on how many worker processes were used. Populations of at least
+    PARALLEL_THRESHOLD rows are spread over a process pool.
+
+    Given a RollStream, chunk i draws from ``rng.split("population", i)``
+    instead of a numpy PCG64 stream, so the population can be replayed by
+    anyone holding the stream's key, with or without the same numpy.
+
+    :param str generator_name: Key of the generator in SCORE_GENERATORS
+    :param int n: Number of rows (creatures) to generate
+    :param int seed: Seed for reproducible populations (optional)
+    :param bool as_scores: Wrap every row in an AbilityScores
+    :param int workers: Worker processes, defaults to one per core; 1 runs
+        everything in the calling process
+    :param RollStream rng: Stream to derive the chunk streams from, instead
+        of seed
+    :returns N x 6 int8 array in AbilityClass column order, or a list of
+        AbilityScores if as_scores is set
+    :raises: ValueError, KeyError
+    """
+    numpy = require_numpy("generate_population")
+    if n < 0:
+        raise ValueError("Population size cannot be negative")
+    if generator_name not in SCORE_GENERATOR_CLASSES:
+        raise KeyError("Unknown score generator: {}".format(generator_name))
+    sizes = [POPULATION_CHUNK] * (n // POPULATION_CHUNK)
+    if n % POPULATION_CHUNK:
+        sizes.append(n % POPULATION_CHUNK)
+    if rng is not None:
+        if seed is not None:
+            raise ValueError("Pass either seed or rng, not both")
+        seeds = [rng.split("population", i) for i in range(len(sizes))]
+    else:
+        seeds = numpy.random.SeedSequence(seed).spawn(len(sizes))
+    names = [generator_name] * len(sizes)
+    if n >= PARALLEL_THRESHOLD and workers != 1 and len(sizes) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_population_chunk, names, sizes, seeds))
+    else:
+        chunks = list(map(_population_chunk, names, sizes, seeds))
+    scores = numpy.concatenate(chunks) if chunks else \
+        numpy.empty((0, 6), dtype=numpy.int8)
+    if as_scores:
+        AbilityScores = _ability_scores_type()
+        return [AbilityScores(*row) for row in scores.tolist()]
+    return scores
@@ -0,0 +1,277 @@
+"""
+.. module:: abilitytable
+   :platform: Unix, Windows
+   :synopsis: Columnar ability score storage for large rosters
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+from typing import Iterable
+
+from ._compat import require_numpy
+from .abilities import AbilityClass
+
+_ABILITIES = tuple(AbilityClass)
+
+
+class AbilityScoreRow(object):
+    """
+    A zero-copy view of one row of an AbilityScoreTable.
+
+    Rows expose the same properties as AbilityScores; reads and writes go
+    straight to the table's columns.
+    """
+
+    __slots__ = ("table", "index")
+
+    AbilityClass = AbilityClass
+
+    def __init__(self, table: "AbilityScoreTable", index: int):
+        """
+        :param AbilityScoreTable table: Table the row belongs to
+        :param int index: Row number within the table
+        """
+        self.table = table
+        self.index = index
+
+    def __repr__(self) -> str:
+        return "AbilityScoreRow({}, {})".format(self.index, self.as_tuple())
+
+    def _get(self, ability: AbilityClass) -> int:
+        return int(self.table.data[ability.value, self.index])
+
+    def _set(self, ability: AbilityClass, score: int):
+        data = self.table.data
+        if score < 0:
+            raise ValueError("AbilityScores cannot be negative")
+        if score > require_numpy("AbilityScoreRow").iinfo(data.dtype).max:
+            raise ValueError("Score does not fit in {}".format(data.dtype))
+        data[ability.value, self.index] = score
+
+    @classmethod
+    def get_ability_class_names(cls):
+        return cls.AbilityClass.__members__.keys()
+
+    def as_tuple(self) -> tuple:
+        """Returns the ability scores as a tuple in AbilityClass order"""
+        return tuple(self.table.data[:, self.index].tolist())
+
+    def scores_as_dict(self) -> dict:
+        """Returns the ability scores as a dict"""
+        return dict(zip(self.get_ability_class_names(), self.as_tuple()))
+
+
+def _row_property(ability: AbilityClass) -> property:
+    return property(
+        lambda self: self._get(ability),
+        lambda self, score: self._set(ability, score),
+        doc="{} score of the row".format(ability.name.capitalize())
+    )
+
+
+for _ability in _ABILITIES:
+    setattr(AbilityScoreRow, _ability.name.lower(), _row_property(_ability))
+
+
+class AbilityScoreTable(object):
+    """
+    Ability scores of many creatures, stored column-wise.
+
+    The scores live in a single (6, capacity) array so that each AbilityClass
+    column is contiguous; filters and modifiers are computed over whole
+    columns at once. Tables can be saved to and memory-mapped from ``.npy``
+    files.
+    """
+
+    def __init__(self, size: int=0, dtype: str="int8"):
+        """
+        :param int size: Number of zeroed rows to start with
+        :param str dtype: Column type, int8 or int16
+        :raises: ValueError
+        """
+        numpy = require_numpy("AbilityScoreTable")
+        if numpy.dtype(dtype) not in (numpy.int8, numpy.int16):
+            raise ValueError("dtype must be int8 or int16")
+        self._data = numpy.zeros((len(_ABILITIES), size), dtype=dtype)
+        self._length = size
+
+    @classmethod
+    def from_array(cls, scores, dtype: str="int8") -> "AbilityScoreTable":
+        """
+        Builds a table from an N x 6 array, e.g. from generate_population.
+
+        :param scores: N x 6 array of scores in AbilityClass column order
+        :param str dtype: Column type, int8 or int16
+        :returns AbilityScoreTable
+        """
+        table = cls(0, dtype)
+        table.extend(scores)
+        return table
+
+    @classmethod
+    def from_scores(cls, scores: Iterable, dtype: str="int8") \
+            -> "AbilityScoreTable":
+        """
+        Builds a table by copying AbilityScores-like objects.
+
+        :param scores: Objects with a scores_as_dict() method
+        :param str dtype: Column type, int8 or int16
+        :returns AbilityScoreTable
+        """
+        numpy = require_numpy("AbilityScoreTable")
+        rows = [list(s.scores_as_dict().values()) for s in scores]
+        return cls.from_array(
+            numpy.array(rows, dtype=dtype).reshape(len(rows), 6), dtype)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: str="r") -> "AbilityScoreTable":
+        """
+        Loads a table saved with save(), memory-mapping it by default.
+
+        :param str path: File to load
+        :param str mmap_mode: numpy mmap mode ("r", "r+", "c") or None to
+            read the file into memory
+        :returns AbilityScoreTable
+        """
+        numpy = require_numpy("AbilityScoreTable")
+        data = numpy.load(path, mmap_mode=mmap_mode, allow_pickle=False)
+        if data.ndim != 2 or data.shape[0] != len(_ABILITIES):
+            raise ValueError("{} does not hold an AbilityScoreTable".format(
+                path))
+        table = cls.__new__(cls)
+        table._data = data
+        table._length = data.shape[1]
+        return table
+
+    def save(self, path: str):
+        """
+        Saves the table as a ``.npy`` file that load() can memory-map.
+
+        :param str path: File to write
+        """
+        numpy = require_numpy("AbilityScoreTable")
+        numpy.save(path, numpy.ascontiguousarray(self.data),
+                   allow_pickle=False)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> AbilityScoreRow:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("AbilityScoreTable index out of range")
+        return AbilityScoreRow(self, index)
+
+    def __iter__(self):
+        return (AbilityScoreRow(self, i) for i in range(self._length))
+
+    @property
+    def data(self):
+        """The (6, len(table)) score array; column views, not copies"""
+        return self._data[:, :self._length]
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    def column(self, ability: AbilityClass):
+        """
+        Returns a view of the scores of one ability for every row.
+
+        :param AbilityClass ability: Ability to return
+        """
+        return self._data[ability.value, :self._length]
+
+    def append(self, scores) -> AbilityScoreRow:
+        """
+        Appends one row, copied from an AbilityScores-like object.
+
+        :param scores: Object with a scores_as_dict() method
+        :returns AbilityScoreRow view of the new row
+        """
+        self.extend([list(scores.scores_as_dict().values())])
+        return AbilityScoreRow(self, self._length - 1)
+
+    def extend(self, scores):
+        """
+        Appends every row of an N x 6 array.
+
+        :param scores: N x 6 array-like of scores in AbilityClass order
+        :raises: ValueError
+        """
+        numpy = require_numpy("AbilityScoreTable")
+        scores = numpy.asarray(scores)
+        if scores.size == 0:
+            return
+        if scores.ndim != 2 or scores.shape[1] != len(_ABILITIES):
+            raise ValueError("Expected an N x 6 array of scores")
+        if scores.min() < 0:
+            raise ValueError("AbilityScores cannot be negative")
+        if scores.max() > numpy.iinfo(self._data.dtype).max:
+            raise ValueError("Scores do not fit in {}".format(self.dtype))
+        end = self._length + len(scores)
+        if end > self._data.shape[1]:
+            grown = numpy.zeros(
+                (len(_ABILITIES), max(end, 2 * self._data.shape[1])),
+                dtype=self._data.dtype)
+            grown[:, :self._length] = self.data
+            self._data = grown
+        self._data[:, self._length:end] = scores.T
+        self._length = end
+
+    def modifiers(self, ability: AbilityClass=None):
+        """
+        Returns ability modifiers, (score - 10) // 2, for every row.
+
+        :param AbilityClass ability: Single ability to compute, defaults to
+            all six
+        :returns Modifier array, (6, N) for all abilities or (N,) for one
+        """
+        scores = self.data if ability is None else self.column(ability)
+        return (scores.astype("int16") - 10) // 2
+
+    def mask(self, ability: AbilityClass, minimum: int=None,
+             maximum: int=None):
+        """
+        Returns a boolean mask of rows whose score lies within the bounds.
+
+        :param AbilityClass ability: Ability to test
+        :param int minimum: Lowest accepted score (inclusive, optional)
+        :param int maximum: Highest accepted score (inclusive, optional)
+        """
+        numpy = require_numpy("AbilityScoreTable")
+        column = self.column(ability)
+        selected = numpy.ones(self._length, dtype=bool)
+        if minimum is not None:
+            selected &= column >= minimum
+        if maximum is not None:
+            selected &= column <= maximum
+        return selected
+
+    def where(self, **bounds):
+        """
+        Returns the indices of rows matching every bound, e.g.
+        ``where(STRENGTH=(16, None), INTELLIGENCE=(None, 8))``.
+
+        :param bounds: (minimum, maximum) pairs keyed by ability name
+        :returns Row index array
+        """
+        numpy = require_numpy("AbilityScoreTable")
+        selected = numpy.ones(self._length, dtype=bool)
+        for name, (minimum, maximum) in bounds.items():
+            selected &= self.mask(AbilityClass[name], minimum, maximum)
+        return numpy.flatnonzero(selected)
+
+    def take(self, indices) -> "AbilityScoreTable":
+        """
+        Returns a new table holding copies of the given rows.
+
+        :param indices: Row indices or boolean mask
+        :returns AbilityScoreTable
+        """
+        table = AbilityScoreTable(0, self.dtype)
+        table._data = self.data[:, indices].copy()
+        table._length = table._data.shape[1]
+        return table
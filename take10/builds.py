@@ -0,0 +1,301 @@
+"""
+.. module:: builds
+   :platform: Unix, Windows
+   :synopsis: Search over race bonus options for the best character build
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+A race's bonus options are enumerated lazily, once per race class: each
+option is turned into a plain tuple, duplicates are dropped as they
+appear, and later searches replay the cached tuples before pulling more
+from the race. Options another option matches or beats in every ability
+(or skill) are pruned before searching, as no concept can prefer them.
+
+For each remaining ability option, assigning a rolled array to the six
+abilities is solved exactly as a dynamic program over the subsets of array
+values (64 states) rather than by trying all 720 permutations.
+"""
+
+from functools import lru_cache
+from typing import Iterable, NamedTuple
+
+from .abilities import AbilityClass
+from .skills import SkillClass
+
+_ABILITIES = tuple(AbilityClass)
+_FULL = (1 << len(_ABILITIES)) - 1
+
+
+def _race_class(race) -> type:
+    return race if isinstance(race, type) else type(race)
+
+
+def _as_tuple(option) -> tuple:
+    if hasattr(option, "as_tuple"):
+        return option.as_tuple()
+    return tuple(option)
+
+
+_END = object()
+
+
+class _CachedOptions(object):
+    """Replays the distinct options seen so far, then pulls new ones"""
+
+    def __init__(self, source):
+        self._source = iter(source)
+        self._options = []
+        self._seen = set()
+
+    def __iter__(self):
+        index = 0
+        while True:
+            if index < len(self._options):
+                yield self._options[index]
+                index += 1
+                continue
+            if self._source is None:
+                return
+            option = next(self._source, _END)
+            if option is _END:
+                self._source = None
+                return
+            option = _as_tuple(option)
+            if option not in self._seen:
+                self._seen.add(option)
+                self._options.append(option)
+
+
+_ABILITY_OPTIONS = {}
+_SKILL_OPTIONS = {}
+
+
+def ability_bonus_options(race):
+    """
+    Yields the distinct ability bonuses a race offers, as 6-tuples in
+    AbilityClass order.
+
+    A race may give its options as AbilityScores or, since AbilityScores
+    cannot be negative, as plain sequences when an option has a penalty.
+
+    Options are pulled from get_starting_ability_bonus() only as far as
+    they are consumed, and cached per race class.
+
+    :param race: Race subclass or instance
+    :returns Iterator of tuples
+    """
+    cls = _race_class(race)
+    if cls not in _ABILITY_OPTIONS:
+        _ABILITY_OPTIONS[cls] = _CachedOptions(
+            cls().get_starting_ability_bonus())
+    return iter(_ABILITY_OPTIONS[cls])
+
+
+def skill_bonus_options(race):
+    """
+    Yields the distinct skill bonuses a race offers, as 35-tuples of ranks
+    in SkillClass order.
+
+    :param race: Race subclass or instance
+    :returns Iterator of tuples
+    """
+    cls = _race_class(race)
+    if cls not in _SKILL_OPTIONS:
+        _SKILL_OPTIONS[cls] = _CachedOptions(
+            cls().get_starting_skill_bonus())
+    return iter(_SKILL_OPTIONS[cls])
+
+
+def clear_cache():
+    """Forgets every cached option and build, e.g. after redefining races"""
+    _ABILITY_OPTIONS.clear()
+    _SKILL_OPTIONS.clear()
+    _pareto.cache_clear()
+    _best_build.cache_clear()
+
+
+def prune_dominated(options: Iterable[tuple]) -> list:
+    """
+    Drops every option matched or beaten in each position by another one.
+
+    :param options: Equal-length tuples of bonuses
+    :returns The non-dominated options, in their original order
+    """
+    options = list(dict.fromkeys(options))
+    kept = []
+    for i, option in enumerate(options):
+        if not any(
+                j != i and all(o >= p for o, p in zip(other, option))
+                for j, other in enumerate(options)):
+            kept.append(option)
+    return kept
+
+
+@lru_cache(maxsize=None)
+def _pareto(cls: type, skills: bool) -> tuple:
+    options = skill_bonus_options(cls) if skills else \
+        ability_bonus_options(cls)
+    return tuple(prune_dominated(options))
+
+
+class Concept(object):
+    """
+    What a build is for: how much each ability matters, the minimum scores
+    it needs, and how much each skill bonus is worth.
+
+    Builds are ranked by the weighted sum of ability modifiers, then the
+    weighted sum of scores, plus the weighted skill bonus ranks. Weights
+    cannot be negative, which is what makes dominated options safe to
+    prune.
+    """
+
+    __slots__ = ("weights", "minimums", "skill_weights")
+
+    def __init__(self, weights: dict, minimums: dict=None,
+                 skill_weights: dict=None):
+        """
+        :param dict weights: Weight per AbilityClass, missing ones are 0
+        :param dict minimums: Lowest acceptable final score per AbilityClass
+        :param dict skill_weights: Weight per SkillClass of its bonus ranks
+        :raises: ValueError
+        """
+        self.weights = tuple((weights or {}).get(a, 0) for a in _ABILITIES)
+        self.minimums = tuple(
+            (minimums or {}).get(a, -128) for a in _ABILITIES)
+        self.skill_weights = tuple(
+            (skill_weights or {}).get(s, 0) for s in SkillClass)
+        if min(self.weights + self.skill_weights) < 0:
+            raise ValueError("Concept weights cannot be negative")
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Concept):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def _key(self) -> tuple:
+        return self.weights, self.minimums, self.skill_weights
+
+    def score(self, scores: tuple) -> tuple:
+        """
+        Returns the (modifier, score) value of final scores, or None if
+        they miss a minimum.
+
+        :param tuple scores: Final scores in AbilityClass order
+        """
+        if any(s < m for s, m in zip(scores, self.minimums)):
+            return None
+        return (sum(w * ((s - 10) // 2) for w, s in zip(self.weights, scores)),
+                sum(w * s for w, s in zip(self.weights, scores)))
+
+
+class Build(NamedTuple):
+    """
+    The result of a build search.
+
+    Builds are cached and shared between callers, so they are immutable.
+    """
+
+    race: type  #: Race class of the build
+    base: tuple  #: Scores before racial bonuses
+    ability_bonus: tuple  #: Chosen racial ability bonus
+    skill_bonus: tuple  #: Chosen racial skill bonus, or None
+    value: tuple  #: Concept value, higher is better
+
+    def __repr__(self) -> str:
+        return "Build({}, {}, value={})".format(
+            self.race.__name__, self.scores, self.value)
+
+    @property
+    def scores(self) -> tuple:
+        """Final ability scores in AbilityClass order"""
+        return tuple(b + r for b, r in zip(self.base, self.ability_bonus))
+
+
+def _assign(values: tuple, bonus: tuple, concept: Concept):
+    """
+    Assigns array values to abilities to maximize the concept's value.
+
+    :returns (value, base scores) or None if no assignment is legal
+    """
+    weights, minimums = concept.weights, concept.minimums
+    best = {0: ((0, 0), ())}
+    for mask in range(_FULL + 1):
+        if mask not in best:
+            continue
+        value, chosen = best[mask]
+        ability = len(chosen)
+        if ability == len(_ABILITIES):
+            continue
+        seen = set()
+        for j, base in enumerate(values):
+            if mask & 1 << j or base in seen:
+                continue
+            seen.add(base)
+            score = base + bonus[ability]
+            if score < minimums[ability]:
+                continue
+            w = weights[ability]
+            candidate = (value[0] + w * ((score - 10) // 2),
+                         value[1] + w * score)
+            key = mask | 1 << j
+            if key not in best or candidate > best[key][0]:
+                best[key] = (candidate, chosen + (base,))
+    return best.get(_FULL)
+
+
+def _skill_value(bonus: tuple, concept: Concept):
+    return sum(w * r for w, r in zip(concept.skill_weights, bonus))
+
+
+@lru_cache(maxsize=4096)
+def _best_build(cls: type, scores: tuple, assign: bool, concept: Concept):
+    skill_bonus = None
+    skill_value = 0
+    skill_options = _pareto(cls, True)
+    if skill_options:
+        skill_bonus = max(skill_options,
+                          key=lambda o: _skill_value(o, concept))
+        skill_value = _skill_value(skill_bonus, concept)
+    best = None
+    for bonus in _pareto(cls, False) or ((0,) * len(_ABILITIES),):
+        if assign:
+            found = _assign(scores, bonus, concept)
+            if found is None:
+                continue
+            value, base = found
+        else:
+            base = scores
+            value = concept.score(tuple(s + b for s, b in zip(base, bonus)))
+            if value is None:
+                continue
+        value = (value[0] + skill_value, value[1])
+        if best is None or value > best.value:
+            best = Build(cls, base, bonus, skill_bonus, value)
+    return best
+
+
+def best_build(race, scores, concept: Concept, assign: bool=True) -> Build:
+    """
+    Finds the best legal combination of a race's bonus options and a set
+    of scores for a concept.
+
+    Results are cached per race class, scores and concept.
+
+    :param race: Race subclass or instance
+    :param scores: Six scores: a rolled array to assign freely, or
+        AbilityScores (or a tuple in AbilityClass order) with assign=False
+    :param Concept concept: What the build is for
+    :param bool assign: Whether the scores may be rearranged
+    :returns Build, or None if no combination meets the minimums
+    :raises: ValueError
+    """
+    scores = _as_tuple(scores)
+    if len(scores) != len(_ABILITIES):
+        raise ValueError("Expected six scores, got {}".format(len(scores)))
+    if assign:
+        scores = tuple(sorted(scores, reverse=True))
+    return _best_build(_race_class(race), scores, assign, concept)
+
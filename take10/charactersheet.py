@@ -11,9 +11,9 @@ from enum import Enum, unique
 
 from PyQt5.QtCore import QObject, Q_ENUMS
 
-from abilities import AbilityScores
-from races import Race
-from skills import SkillSet
+from .abilities import AbilityScores
+from .races import Race
+from .skills import SkillSet
 
 
 class CharacterSheet(QObject):
@@ -43,7 +43,7 @@ class CharacterSheet(QObject):
     @unique
     class Sex(Enum):
         """Sex refers to a character's biological sex"""
-        FEMALE = 0,
+        FEMALE = 0
         MALE = 1
         ASEXUAL = 2
     Q_ENUMS(Sex)
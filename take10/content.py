@@ -0,0 +1,573 @@
+"""
+.. module:: content
+   :platform: Unix, Windows
+   :synopsis: Memory-mapped race, item and creature database
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Content is compiled once with :func:`write_content` into a single
+read-only file, which any number of processes can then open with
+:class:`ContentFile`. The file is memory-mapped, so every process shares
+one copy of it through the page cache, and lookups read the mapped
+columns and indexes in place; a record is only decoded when asked for.
+
+The file is little-endian::
+
+    magic "T10D", version u8, 3 pad bytes,
+    string, race, item and creature counts u32,
+    (offset u64, length u64) per section, then the 8-byte aligned sections
+
+Every string (names, descriptions, tags, damage expressions) is stored
+once in a string table of u32 offsets into UTF-8 bytes, and records refer
+to strings by their u32 id. Records are stored column by column:
+
+* races: name, race_id u16, size u8, ability bonus options as i8[6] rows
+  (with u32 offsets per race)
+* items: name, desc, weight f64, tags (with u32 offsets per item)
+* creatures: name, size u8, CR f64, hit points u32, armor class u16,
+  base attack i16, attack ability u8, damage, scores u8[6][n]
+
+and indexed by:
+
+* name: record indices sorted by case-folded name, for prefix searches
+* size: record indices grouped by SizeClass, with u32 offsets per size
+* CR: creature indices sorted by CR, next to their sorted CRs
+"""
+
+import mmap
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from fractions import Fraction
+from typing import Iterable
+
+from ._compat import little_endian, typed_view
+from .abilities import AbilityClass
+from .item import Item
+from .sizes import SizeClass
+
+VERSION = 1
+
+#: String id of a missing string
+NO_STRING = 0xFFFFFFFF
+
+_SECTIONS = (
+    "string_offsets", "strings",
+    "race_name", "race_id", "race_size", "race_bonus_offsets",
+    "race_bonuses",
+    "item_name", "item_desc", "item_weight", "item_tag_offsets", "item_tags",
+    "creature_name", "creature_size", "creature_cr", "creature_hit_points",
+    "creature_armor_class", "creature_base_attack",
+    "creature_attack_ability", "creature_damage", "creature_scores",
+    "race_by_name", "item_by_name", "creature_by_name",
+    "race_size_offsets", "race_by_size",
+    "creature_size_offsets", "creature_by_size",
+    "creature_by_cr", "creature_cr_sorted",
+)
+_TYPECODES = {
+    "string_offsets": "I", "strings": None,
+    "race_name": "I", "race_id": "H", "race_size": "B",
+    "race_bonus_offsets": "I", "race_bonuses": "b",
+    "item_name": "I", "item_desc": "I", "item_weight": "d",
+    "item_tag_offsets": "I", "item_tags": "I",
+    "creature_name": "I", "creature_size": "B", "creature_cr": "d",
+    "creature_hit_points": "I", "creature_armor_class": "H",
+    "creature_base_attack": "h", "creature_attack_ability": "B",
+    "creature_damage": "I", "creature_scores": "B",
+    "race_by_name": "I", "item_by_name": "I", "creature_by_name": "I",
+    "race_size_offsets": "I", "race_by_size": "I",
+    "creature_size_offsets": "I", "creature_by_size": "I",
+    "creature_by_cr": "I", "creature_cr_sorted": "d",
+}
+_FILE = struct.Struct("<4sB3x4I{}Q".format(2 * len(_SECTIONS)))
+_FILE_MAGIC = b"T10D"
+
+_ABILITIES = len(AbilityClass)
+_SIZES = len(SizeClass)
+
+#: Kinds of records a content file holds
+KINDS = ("race", "item", "creature")
+
+
+class RaceEntry(object):
+    """
+    The stored data of a race: its name, race_id, size and every ability
+    bonus option it offers.
+    """
+
+    __slots__ = ("name", "race_id", "size", "ability_bonuses")
+
+    def __init__(
+            self,
+            name: str,
+            race_id: int=0,
+            size: SizeClass=SizeClass.Medium,
+            ability_bonuses: Iterable[tuple]=()):
+        """
+        :param str name: Name of the race
+        :param int race_id: race_id of the Race subclass, 0 if it has none
+        :param SizeClass size: Size of the race
+        :param ability_bonuses: Ability bonus options as 6-tuples in
+            AbilityClass order
+        :raises: ValueError
+        """
+        self.name = name
+        self.race_id = race_id
+        self.size = SizeClass(size)
+        self.ability_bonuses = tuple(tuple(b) for b in ability_bonuses)
+        for bonus in self.ability_bonuses:
+            if len(bonus) != _ABILITIES:
+                raise ValueError("Ability bonuses need {} values".format(
+                    _ABILITIES))
+
+    @classmethod
+    def from_race(cls, race) -> "RaceEntry":
+        """
+        Builds the entry of a Race subclass.
+
+        The size is read from the class's ``size`` attribute if it has one,
+        and defaults to Medium.
+
+        :param race: Race subclass or instance
+        :returns RaceEntry
+        """
+        from .builds import ability_bonus_options
+        race_cls = race if isinstance(race, type) else type(race)
+        return cls(race_cls.__name__, race_cls.race_id,
+                   getattr(race_cls, "size", SizeClass.Medium),
+                   ability_bonus_options(race_cls))
+
+    def __repr__(self) -> str:
+        return "RaceEntry({!r}, race_id={})".format(self.name, self.race_id)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RaceEntry):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def _key(self) -> tuple:
+        return self.name, self.race_id, self.size, self.ability_bonuses
+
+
+class Creature(object):
+    """
+    A creature definition: the numbers of a bestiary entry.
+    """
+
+    __slots__ = ("name", "size", "cr", "scores", "hit_points", "armor_class",
+                 "damage", "base_attack", "attack_ability")
+
+    def __init__(
+            self,
+            name: str,
+            size: SizeClass,
+            cr,
+            scores: tuple,
+            hit_points: int,
+            armor_class: int,
+            damage: str,
+            base_attack: int=0,
+            attack_ability: AbilityClass=AbilityClass.STRENGTH):
+        """
+        :param str name: Name of the creature
+        :param SizeClass size: Size of the creature
+        :param cr: Challenge rating, e.g. 3, Fraction(1, 2) or "1/2"
+        :param tuple scores: Ability scores in AbilityClass order
+        :param int hit_points: Average hit points
+        :param int armor_class: Armor class
+        :param str damage: Damage dice expression, e.g. ``1d8+3``
+        :param int base_attack: Base attack bonus
+        :param AbilityClass attack_ability: Ability added to attack rolls
+        :raises: ValueError
+        """
+        self.name = name
+        self.size = SizeClass(size)
+        self.cr = Fraction(cr)
+        if self.cr < 0:
+            raise ValueError("CR cannot be negative")
+        self.scores = tuple(scores)
+        if len(self.scores) != _ABILITIES or \
+                not all(0 <= s <= 255 for s in self.scores):
+            raise ValueError("Creatures need {} scores from 0 to 255".format(
+                _ABILITIES))
+        if hit_points < 1:
+            raise ValueError("Creatures need at least 1 hit point")
+        self.hit_points = hit_points
+        self.armor_class = armor_class
+        self.damage = damage
+        self.base_attack = base_attack
+        self.attack_ability = AbilityClass(attack_ability)
+
+    def __repr__(self) -> str:
+        return "Creature({!r}, CR {})".format(self.name, self.cr)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Creature):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def _key(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def combatant(self):
+        """
+        Returns the creature as an encounter Combatant.
+
+        :returns Combatant
+        :raises: DiceSyntaxError
+        """
+        from .encounter import Combatant
+        return Combatant(self.name, self.scores, self.hit_points,
+                         self.armor_class, self.damage, self.base_attack,
+                         self.attack_ability)
+
+
+class _Strings(object):
+    """Interns strings into a string table while writing"""
+
+    def __init__(self):
+        self.ids = {}
+        self.offsets = array("I", [0])
+        self.data = bytearray()
+
+    def __call__(self, string: str) -> int:
+        if string is None:
+            return NO_STRING
+        if string not in self.ids:
+            self.ids[string] = len(self.ids)
+            self.data += string.encode("utf-8")
+            self.offsets.append(len(self.data))
+        return self.ids[string]
+
+
+def _by_name(names: list) -> array:
+    return array("I", sorted(range(len(names)),
+                             key=lambda i: names[i].casefold()))
+
+
+def _by_size(sizes: list) -> tuple:
+    """Returns (offsets per SizeClass value - 1, indices grouped by size)"""
+    groups = [[] for _ in range(_SIZES)]
+    for index, size in enumerate(sizes):
+        groups[size - 1].append(index)
+    offsets = array("I", [0])
+    members = array("I")
+    for group in groups:
+        members.extend(group)
+        offsets.append(len(members))
+    return offsets, members
+
+
+def write_content(
+        path: str,
+        races: Iterable=(),
+        items: Iterable=(),
+        creatures: Iterable[Creature]=()) -> dict:
+    """
+    Compiles races, items and creatures into a content file readable with
+    ContentFile.
+
+    :param str path: File to write
+    :param races: RaceEntry objects or Race subclasses
+    :param items: Item or ItemType objects
+    :param creatures: Creature objects
+    :returns {kind: number of records written}
+    :raises: ValueError
+    """
+    races = [r if isinstance(r, RaceEntry) else RaceEntry.from_race(r)
+             for r in races]
+    items = list(items)
+    creatures = list(creatures)
+    strings = _Strings()
+    n = len(creatures)
+    columns = {
+        "race_name": array("I", (strings(r.name) for r in races)),
+        "race_id": array("H", (r.race_id for r in races)),
+        "race_size": array("B", (r.size.value for r in races)),
+        "race_bonus_offsets": array("I", [0]),
+        "race_bonuses": array("b"),
+        "item_name": array("I", (strings(i.name) for i in items)),
+        "item_desc": array("I", (strings(i.desc) for i in items)),
+        "item_weight": array("d", (i.weight for i in items)),
+        "item_tag_offsets": array("I", [0]),
+        "item_tags": array("I"),
+        "creature_name": array("I", (strings(c.name) for c in creatures)),
+        "creature_size": array("B", (c.size.value for c in creatures)),
+        "creature_cr": array("d", (float(c.cr) for c in creatures)),
+        "creature_hit_points": array("I", (c.hit_points for c in creatures)),
+        "creature_armor_class": array("H",
+                                      (c.armor_class for c in creatures)),
+        "creature_base_attack": array("h",
+                                      (c.base_attack for c in creatures)),
+        "creature_attack_ability": array(
+            "B", (c.attack_ability.value for c in creatures)),
+        "creature_damage": array("I", (strings(c.damage) for c in creatures)),
+        "creature_scores": array("B", bytes(_ABILITIES * n)),
+    }
+    for race in races:
+        for bonus in race.ability_bonuses:
+            columns["race_bonuses"].extend(bonus)
+        columns["race_bonus_offsets"].append(len(race.ability_bonuses))
+    for item in items:
+        columns["item_tags"].extend(
+            strings(t) for t in sorted(getattr(item, "tags", ())))
+        columns["item_tag_offsets"].append(len(columns["item_tags"]))
+    scores_column = columns["creature_scores"]
+    for row, creature in enumerate(creatures):
+        scores_column[row::n] = array("B", creature.scores)
+    offsets = columns["race_bonus_offsets"]
+    for i in range(1, len(offsets)):
+        offsets[i] += offsets[i - 1]
+
+    columns["race_by_name"] = _by_name([r.name for r in races])
+    columns["item_by_name"] = _by_name([i.name for i in items])
+    columns["creature_by_name"] = _by_name([c.name for c in creatures])
+    columns["race_size_offsets"], columns["race_by_size"] = _by_size(
+        columns["race_size"])
+    columns["creature_size_offsets"], columns["creature_by_size"] = \
+        _by_size(columns["creature_size"])
+    by_cr = sorted(range(n), key=lambda i: creatures[i].cr)
+    columns["creature_by_cr"] = array("I", by_cr)
+    columns["creature_cr_sorted"] = array(
+        "d", (columns["creature_cr"][i] for i in by_cr))
+    columns["string_offsets"] = strings.offsets
+    columns["strings"] = strings.data
+
+    table = []
+    position = _FILE.size
+    blobs = []
+    for section in _SECTIONS:
+        column = columns[section]
+        blob = little_endian(column) if isinstance(column, array) \
+            else bytes(column)
+        position += -position % 8
+        table.extend((position, len(blob)))
+        blobs.append((position, blob))
+        position += len(blob)
+    with open(path, "wb") as out:
+        out.write(_FILE.pack(_FILE_MAGIC, VERSION, len(strings.ids),
+                             len(races), len(items), n, *table))
+        for offset, blob in blobs:
+            out.write(bytes(offset - out.tell()))
+            out.write(blob)
+    return {"race": len(races), "item": len(items), "creature": n}
+
+
+class ContentFile(object):
+    """
+    Read-only, memory-mapped access to a file written by write_content.
+
+    Queries return record indices as memoryviews into the mapped indexes,
+    without copying or decoding anything; records and single fields are
+    decoded on demand by index.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param str path: File to open
+        :raises: ValueError
+        """
+        with open(path, "rb") as source:
+            self._mmap = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, _, races, items, creatures, *table = \
+                _FILE.unpack_from(self._mmap)
+        except struct.error:
+            self.close()
+            raise ValueError("{} is not a content file".format(path))
+        if magic != _FILE_MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("{} is not a version {} content file".format(
+                path, VERSION))
+        sections = list(zip(table[::2], table[1::2]))
+        for name, (start, length) in zip(_SECTIONS, sections):
+            code = _TYPECODES[name]
+            if start + length > len(self._mmap) or \
+                    code and length % struct.calcsize(code):
+                self.close()
+                raise ValueError("{} is truncated or corrupt".format(path))
+        self._counts = {"race": races, "item": items, "creature": creatures}
+        self._columns = {}
+        view = memoryview(self._mmap)
+        for name, (start, length) in zip(_SECTIONS, sections):
+            section = view[start:start + length]
+            code = _TYPECODES[name]
+            self._columns[name] = typed_view(section, code) if code \
+                else section
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Releases the column views and unmaps the file.
+
+        Query results already handed out stay readable; the file is
+        unmapped once the last of them is released.
+        """
+        for column in getattr(self, "_columns", {}).values():
+            if isinstance(column, memoryview):
+                column.release()
+        self._columns = {}
+        mapping, self._mmap = self._mmap, None
+        if mapping is not None:
+            try:
+                mapping.close()
+            except BufferError:
+                # Views handed out still export the mapping, and keep it
+                # alive until they are released
+                pass
+
+    def count(self, kind: str) -> int:
+        """
+        Returns the number of records of a kind.
+
+        :param str kind: "race", "item" or "creature"
+        :raises: KeyError
+        """
+        return self._counts[kind]
+
+    def column(self, name: str):
+        """
+        Returns a raw column by section name, e.g. "creature_cr".
+
+        :param str name: Section name
+        """
+        # A view of its own, so that close() does not release it
+        return self._columns[name][:]
+
+    def string(self, string_id: int) -> str:
+        """Returns an interned string by id, None for NO_STRING"""
+        if string_id == NO_STRING:
+            return None
+        offsets = self._columns["string_offsets"]
+        return str(self._columns["strings"][
+            offsets[string_id]:offsets[string_id + 1]], "utf-8")
+
+    def name(self, kind: str, index: int) -> str:
+        """Returns the name of one record without decoding the rest"""
+        return self.string(self._columns[kind + "_name"][index])
+
+    def _check(self, kind: str, index: int) -> int:
+        if index < 0:
+            index += self._counts[kind]
+        if not 0 <= index < self._counts[kind]:
+            raise IndexError("{} index out of range".format(kind))
+        return index
+
+    def by_name(self, kind: str, prefix: str="") -> memoryview:
+        """
+        Finds the records whose name starts with a prefix, ignoring case.
+
+        :param str kind: "race", "item" or "creature"
+        :param str prefix: Start of the name
+        :returns Record indices, sorted by name
+        """
+        order = self._columns[kind + "_by_name"]
+        if not prefix:
+            return order[:]
+        prefix = prefix.casefold()
+        start = self._bisect_name(kind, prefix)
+        end = self._bisect_name(kind, prefix + "\U0010ffff", start)
+        return order[start:end]
+
+    def _bisect_name(self, kind: str, name: str, low: int=0) -> int:
+        """
+        Returns the first position in a name index whose case-folded name
+        is not below name; bisect only takes a key from Python 3.10 on.
+        """
+        order = self._columns[kind + "_by_name"]
+        names = self._columns[kind + "_name"]
+        high = len(order)
+        while low < high:
+            middle = (low + high) // 2
+            if self.string(names[order[middle]]).casefold() < name:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find(self, kind: str, name: str) -> int:
+        """
+        Returns the index of the record with a name, ignoring case.
+
+        :raises: KeyError
+        """
+        for index in self.by_name(kind, name):
+            if self.name(kind, index).casefold() == name.casefold():
+                return index
+        raise KeyError(name)
+
+    def by_size(self, kind: str, size: SizeClass) -> memoryview:
+        """
+        Finds the races or creatures of one size.
+
+        :param str kind: "race" or "creature"
+        :param SizeClass size: Size to look up
+        :returns Record indices, in file order
+        """
+        offsets = self._columns[kind + "_size_offsets"]
+        value = SizeClass(size).value
+        return self._columns[kind + "_by_size"][
+            offsets[value - 1]:offsets[value]]
+
+    def by_cr(self, low=0, high=None) -> memoryview:
+        """
+        Finds the creatures with a CR from low to high, both included.
+
+        :param low: Lowest CR
+        :param high: Highest CR, defaults to low
+        :returns Creature indices, sorted by CR
+        """
+        crs = self._columns["creature_cr_sorted"]
+        low = float(Fraction(low))
+        high = low if high is None else float(Fraction(high))
+        return self._columns["creature_by_cr"][
+            bisect_left(crs, low):bisect_right(crs, high)]
+
+    def race(self, index: int) -> RaceEntry:
+        """Decodes one race"""
+        index = self._check("race", index)
+        c = self._columns
+        offsets = c["race_bonus_offsets"]
+        bonuses = c["race_bonuses"]
+        return RaceEntry(
+            self.name("race", index), c["race_id"][index],
+            SizeClass(c["race_size"][index]),
+            (tuple(bonuses[i * _ABILITIES:(i + 1) * _ABILITIES])
+             for i in range(offsets[index], offsets[index + 1])))
+
+    def item(self, index: int) -> Item:
+        """Decodes one item as a new Item with quantity 1"""
+        index = self._check("item", index)
+        c = self._columns
+        offsets = c["item_tag_offsets"]
+        tags = c["item_tags"][offsets[index]:offsets[index + 1]]
+        return Item(self.name("item", index), c["item_weight"][index],
+                    desc=self.string(c["item_desc"][index]),
+                    tags=[self.string(t) for t in tags])
+
+    def creature(self, index: int) -> Creature:
+        """Decodes one creature"""
+        index = self._check("creature", index)
+        c = self._columns
+        n = self._counts["creature"]
+        return Creature(
+            self.name("creature", index),
+            SizeClass(c["creature_size"][index]),
+            Fraction(c["creature_cr"][index]).limit_denominator(100),
+            tuple(c["creature_scores"][index::n]),
+            c["creature_hit_points"][index],
+            c["creature_armor_class"][index],
+            self.string(c["creature_damage"][index]),
+            c["creature_base_attack"][index],
+            AbilityClass(c["creature_attack_ability"][index]))
@@ -0,0 +1,287 @@
+"""
+.. module:: derived
+   :platform: Unix, Windows
+   :synopsis: Incrementally recomputed derived statistics
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Derived statistics form a dependency graph::
+
+    score -> modifier -> skill totals (via get_skill_ability_class)
+    strength -> carry limits -> encumbrance <- carried weight
+
+A change to a source (an ability score, skill ranks or the inventory)
+marks its node dirty and schedules one flush; every further change before
+the flush runs only adds to the dirty set. The flush recomputes dirty
+nodes in dependency order and stops propagating wherever a node's value
+did not change: raising Strength from 14 to 15 recomputes the carry
+limits and encumbrance, but the modifier stays +2 so no Strength skill is
+touched.
+"""
+
+from enum import Enum, unique
+from heapq import heapify, heappop, heappush
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from .abilities import AbilityClass
+from .skills import SkillClass, get_skill_ability_class
+
+#: Heavy load in pounds by Strength score, 0 to 29
+_HEAVY_LOADS = (
+    0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100,
+    115, 130, 150, 175, 200, 230, 260, 300, 350, 400,
+    460, 520, 600, 700, 800, 920, 1040, 1200, 1400,
+)
+
+
+@unique
+class Encumbrance(Enum):
+    """Load categories by weight carried"""
+    LIGHT = 0
+    MEDIUM = 1
+    HEAVY = 2
+    OVERLOADED = 3
+
+
+def carrying_capacity(strength: int) -> (int, int, int):
+    """
+    Returns the light, medium and heavy load limits in pounds for a
+    Strength score, following the Pathfinder carrying capacity table.
+
+    :param int strength: Strength score
+    :returns (light, medium, heavy) maximum weights
+    :raises: ValueError
+    """
+    if strength < 0:
+        raise ValueError("Strength cannot be negative")
+    factor = 1
+    while strength >= len(_HEAVY_LOADS):
+        strength -= 10
+        factor *= 4
+    heavy = _HEAVY_LOADS[strength] * factor
+    return heavy // 3, heavy * 2 // 3, heavy
+
+
+def encumbrance(limits: tuple, weight: float) -> Encumbrance:
+    """
+    Returns the load category of a weight for given carry limits.
+
+    :param tuple limits: (light, medium, heavy) from carrying_capacity
+    :param float weight: Weight carried
+    :returns Encumbrance
+    """
+    for category, limit in zip(Encumbrance, limits):
+        if weight <= limit:
+            return category
+    return Encumbrance.OVERLOADED
+
+
+class _Node(object):
+    __slots__ = ("name", "order", "read", "compute", "inputs", "dependents",
+                 "value")
+
+    def __init__(self, name: str, order: int, read=None, compute=None,
+                 inputs=()):
+        self.name = name
+        self.order = order
+        self.read = read
+        self.compute = compute
+        self.inputs = tuple(inputs)
+        self.dependents = []
+        self.value = None
+
+
+class DerivedStats(QObject):
+    """
+    Derived statistics of one CharacterSheet, kept up to date incrementally.
+
+    Ability score changes arrive through the ``*_changed`` signals of the
+    sheet's AbilityScores and inventory changes through an Inventory
+    listener. SkillSet has no signals, so rank changes are reported with
+    set_skill_rank() or skills_changed(). Reading any statistic flushes
+    pending changes first.
+
+    Node names are the lower case ability names (scores), ``<ability>_
+    modifier``, the lower case skill names (skill totals), ``carry_limits``,
+    ``carried_weight`` and ``encumbrance``.
+    """
+
+    #: Emitted once per flush with {node name: new value} of changed nodes
+    changed = pyqtSignal(dict)
+
+    def __init__(self, sheet, inventory=None, scheduler=None):
+        """
+        :param CharacterSheet sheet: Sheet with Qt AbilityScores
+        :param Inventory inventory: Belongings weighed for encumbrance
+            (optional)
+        :param scheduler: Called with the flush callable to run it later;
+            defaults to a zero-delay QTimer, i.e. the next Qt event loop
+            turn. ``asyncio.get_event_loop().call_soon`` suits asyncio.
+        :raises: TypeError if the scores have no change signals
+        """
+        QObject.__init__(self)
+        scores = sheet.ability_scores
+        if not hasattr(scores, "strength_changed"):
+            raise TypeError("DerivedStats needs Qt AbilityScores")
+        self.sheet = sheet
+        self.inventory = inventory
+        self._scheduler = scheduler or (lambda flush: QTimer.singleShot(
+            0, flush))
+        self._nodes = {}
+        self._order = []
+        self._dirty = set()
+        self._scheduled = False
+        self._connections = []
+        self.recomputed = 0  #: Nodes evaluated by every flush so far
+
+        for ability in AbilityClass:
+            name = ability.name.lower()
+            score = self._add(name, read=lambda n=name: getattr(scores, n))
+            self._add(name + "_modifier", inputs=(score,),
+                      compute=lambda s: (s - 10) // 2)
+            slot = lambda value, node=score: self._mark(node)  # noqa: E731
+            getattr(scores, name + "_changed").connect(slot)
+            self._connections.append((name + "_changed", slot))
+        self._ranks = {}
+        for skill in SkillClass:
+            name = skill.name.lower()
+            ranks = self._add("_" + name + "_ranks",
+                              read=lambda s=skill: self._rank(s))
+            self._ranks[skill] = ranks
+            modifier = self._nodes[
+                get_skill_ability_class(skill).name.lower() + "_modifier"]
+            self._add(name, inputs=(ranks, modifier),
+                      compute=lambda r, m: r + m)
+        limits = self._add("carry_limits", inputs=(self._nodes["strength"],),
+                           compute=carrying_capacity)
+        self._weight = self._add("carried_weight", read=self._carried_weight)
+        self._add("encumbrance", inputs=(limits, self._weight),
+                  compute=encumbrance)
+        if inventory is not None:
+            inventory.add_listener(self.inventory_changed)
+
+        for node in self._order:
+            node.value = node.read() if node.read is not None else \
+                node.compute(*(i.value for i in node.inputs))
+
+    def _add(self, name: str, read=None, compute=None, inputs=()) -> _Node:
+        node = _Node(name, len(self._order), read, compute, inputs)
+        for source in node.inputs:
+            source.dependents.append(node)
+        self._nodes[name] = node
+        self._order.append(node)
+        return node
+
+    def _rank(self, skill: SkillClass) -> int:
+        skills = self.sheet.skills
+        return skills[skill] if skills is not None else 0
+
+    def _carried_weight(self) -> float:
+        if self.inventory is None:
+            return 0.0
+        return self.inventory.total_weight()
+
+    def _mark(self, node: _Node):
+        self._dirty.add(node)
+        if not self._scheduled:
+            self._scheduled = True
+            self._scheduler(self.flush)
+
+    def detach(self):
+        """Disconnects from the sheet's scores and the inventory"""
+        for signal, slot in self._connections:
+            getattr(self.sheet.ability_scores, signal).disconnect(slot)
+        self._connections = []
+        if self.inventory is not None:
+            self.inventory.remove_listener(self.inventory_changed)
+            self.inventory = None
+
+    @property
+    def pending(self) -> bool:
+        """Whether changes are waiting for the next flush"""
+        return bool(self._dirty)
+
+    def set_skill_rank(self, skill: SkillClass, rank: int):
+        """
+        Sets a rank in the sheet's SkillSet and marks the skill dirty.
+
+        :param SkillClass skill: Skill to change
+        :param int rank: New rank
+        :raises: ValueError if the sheet has no SkillSet
+        """
+        if self.sheet.skills is None:
+            raise ValueError("{} has no skills".format(self.sheet.char_name))
+        self.sheet.skills[skill] = rank
+        self._mark(self._ranks[skill])
+
+    def skills_changed(self, skill: SkillClass=None):
+        """
+        Reports ranks changed directly in the sheet's SkillSet.
+
+        :param SkillClass skill: Skill that changed, defaults to all of them
+        """
+        for changed in (skill,) if skill is not None else SkillClass:
+            self._mark(self._ranks[changed])
+
+    def inventory_changed(self):
+        """Reports a change in the weight carried"""
+        self._mark(self._weight)
+
+    def flush(self) -> dict:
+        """
+        Recomputes the dirty nodes now, emitting changed if any value moved.
+
+        :returns {node name: new value} of the nodes that changed
+        """
+        self._scheduled = False
+        if not self._dirty:
+            return {}
+        queue = [node.order for node in self._dirty]
+        queued = set(queue)
+        heapify(queue)
+        self._dirty.clear()
+        changed = {}
+        while queue:
+            node = self._order[heappop(queue)]
+            self.recomputed += 1
+            if node.read is not None:
+                value = node.read()
+            else:
+                value = node.compute(*(i.value for i in node.inputs))
+            if value == node.value:
+                continue
+            node.value = value
+            if not node.name.startswith("_"):
+                changed[node.name] = value
+            for dependent in node.dependents:
+                if dependent.order not in queued:
+                    queued.add(dependent.order)
+                    heappush(queue, dependent.order)
+        if changed:
+            self.changed.emit(changed)
+        return changed
+
+    def __getitem__(self, name: str):
+        """Returns the current value of a node, flushing pending changes"""
+        if self._dirty:
+            self.flush()
+        return self._nodes[name].value
+
+    def modifier(self, ability: AbilityClass) -> int:
+        """Returns the modifier of an ability"""
+        return self[ability.name.lower() + "_modifier"]
+
+    def skill_total(self, skill: SkillClass) -> int:
+        """Returns ranks plus ability modifier for a skill"""
+        return self[skill.name.lower()]
+
+    @property
+    def carry_limits(self) -> tuple:
+        """Returns the (light, medium, heavy) load limits"""
+        return self["carry_limits"]
+
+    @property
+    def encumbrance(self) -> Encumbrance:
+        """Returns the load category of the weight carried"""
+        return self["encumbrance"]
@@ -0,0 +1,32 @@
+"""
+.. module:: dice
+   :platform: Unix, Windows
+   :synopsis: Dice emulators
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+from importlib import import_module
+
+from .engine import BATCH_THRESHOLD, RollBlock, roll, roll_many
+from .expression import (
+    DicePlan, DiceSyntaxError, compile_expression, evaluate
+)
+from .distribution import Distribution, distribution
+
+#: Names imported from their submodule on first access
+_LAZY = {
+    "RollCommitment": "verifiable",
+    "RollVerifier": "verifiable",
+    "VerificationError": "verifiable",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        value = getattr(import_module("." + _LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module {!r} has no attribute {!r}".format(
+        __name__, name))
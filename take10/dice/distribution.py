@@ -0,0 +1,279 @@
+"""
+.. module:: distribution
+   :platform: Unix, Windows
+   :synopsis: Exact probability distributions of dice expressions
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Distributions are computed from the compiled expression tree: dice sums and
+``+``/``-`` are polynomial convolutions (FFT based for large supports when
+numpy is available), keep/drop groups use a dynamic program over order
+statistics, and ``*``/``/`` enumerate the joint support of their operands.
+
+Exploding dice have an unbounded support; their chains are followed until
+the remaining probability is below float resolution.
+"""
+
+from functools import lru_cache
+from math import comb
+
+from .._compat import numpy
+from .expression import (
+    CACHE_SIZE, MAX_EXPLOSIONS, BinaryOp, Constant, DiceGroup, Negate,
+    _OPERATORS, compile_expression, normalize
+)
+
+#: Supports longer than this are convolved through an FFT
+FFT_THRESHOLD = 512
+
+#: Exploding chains are cut once their probability falls below this
+EXPLOSION_EPSILON = 1e-18
+
+
+class Distribution(object):
+    """
+    The exact probability mass and cumulative distribution of an expression.
+
+    Probabilities are stored densely over the integer range
+    [minimum, maximum], so every lookup is a tuple index.
+    """
+
+    __slots__ = ("expression", "minimum", "pmf", "cdf")
+
+    def __init__(self, expression: str, minimum: int, pmf):
+        """
+        :param str expression: Expression the distribution belongs to
+        :param int minimum: Smallest value with a stored probability
+        :param pmf: Probability of minimum, minimum + 1, ... maximum
+        """
+        self.expression = expression
+        self.minimum = minimum
+        self.pmf = tuple(pmf)
+        total = 0.0
+        cdf = []
+        for p in self.pmf:
+            total += p
+            cdf.append(min(total, 1.0))
+        self.cdf = tuple(cdf)
+
+    def __repr__(self) -> str:
+        return "Distribution({!r}, {}..{})".format(
+            self.expression, self.minimum, self.maximum)
+
+    @property
+    def maximum(self) -> int:
+        """Largest value with a stored probability"""
+        return self.minimum + len(self.pmf) - 1
+
+    @property
+    def mean(self) -> float:
+        """Expected value of the expression"""
+        return sum(p * v for v, p in self.items())
+
+    def items(self):
+        """Yields (value, probability) pairs in ascending value order"""
+        return zip(range(self.minimum, self.maximum + 1), self.pmf)
+
+    def probability(self, value: int) -> float:
+        """Returns P(X == value)"""
+        if self.minimum <= value <= self.maximum:
+            return self.pmf[value - self.minimum]
+        return 0.0
+
+    def at_most(self, value: int) -> float:
+        """Returns P(X <= value)"""
+        if value < self.minimum:
+            return 0.0
+        if value >= self.maximum:
+            return 1.0
+        return self.cdf[value - self.minimum]
+
+    def at_least(self, value: int) -> float:
+        """Returns P(X >= value), e.g. the chance to meet a DC"""
+        return 1.0 - self.at_most(value - 1)
+
+
+def _convolve(a: list, b: list) -> list:
+    """Multiplies two probability polynomials"""
+    if numpy is None:
+        out = [0.0] * (len(a) + len(b) - 1)
+        for i, x in enumerate(a):
+            if x:
+                for j, y in enumerate(b):
+                    out[i + j] += x * y
+        return out
+    if min(len(a), len(b)) < FFT_THRESHOLD:
+        return numpy.convolve(a, b).tolist()
+    size = len(a) + len(b) - 1
+    out = numpy.fft.irfft(
+        numpy.fft.rfft(a, size) * numpy.fft.rfft(b, size), size)
+    return numpy.clip(out, 0.0, None).tolist()
+
+
+def _power(base: list, n: int) -> list:
+    """Returns the pmf of the sum of n independent copies of base"""
+    result = [1.0]
+    while n:
+        if n & 1:
+            result = _convolve(result, base)
+        n >>= 1
+        if n:
+            base = _convolve(base, base)
+    return result
+
+
+def _single_die(group: DiceGroup) -> (int, list):
+    """Returns (minimum, pmf) of one die of group, before keep/drop"""
+    sides = group.sides
+    faces = group.faces
+    draw = [0.0] * sides
+    for f in faces:
+        draw[f - 1] = 1.0 / len(faces)
+    first = draw
+    if group.reroll_once:
+        first = [
+            (0.0 if f in group.reroll_once else 1.0 / sides)
+            + len(group.reroll_once) / sides * draw[f - 1]
+            for f in range(1, sides + 1)
+        ]
+    if not group.explode:
+        return 1, first
+    pmf = [0.0] * sides
+    reach = 1.0
+    roll = first
+    for depth in range(MAX_EXPLOSIONS + 1):
+        base = depth * sides
+        if len(pmf) < base + sides:
+            pmf.extend([0.0] * (base + sides - len(pmf)))
+        last = depth == MAX_EXPLOSIONS
+        for f in range(1, sides + 1):
+            if f != sides or last:
+                pmf[base + f - 1] += reach * roll[f - 1]
+        reach *= roll[sides - 1]
+        roll = draw
+        if reach < EXPLOSION_EPSILON:
+            break
+    while pmf and not pmf[-1]:
+        pmf.pop()
+    return 1, pmf
+
+
+def _keep_sum(minimum: int, die: list, count: int, keep: int,
+              highest: bool) -> (int, list):
+    """
+    Returns (minimum, pmf) of the sum of the keep highest (or lowest) of
+    count independent dice.
+
+    Faces are visited from the kept end; the state is how many dice have been
+    assigned so far, which also fixes how many of them were kept, so each
+    face only adds min(c, keep - kept) copies of itself to the sum.
+    """
+    order = range(len(die) - 1, -1, -1) if highest else range(len(die))
+    # states[j] is the pmf (offset from 0) of kept sums with j dice placed
+    states = {0: [1.0]}
+    for index in order:
+        p = die[index]
+        if not p:
+            continue
+        value = minimum + index
+        powers = [p ** c for c in range(count + 1)]
+        next_states = {}
+        for placed, pmf in states.items():
+            for c in range(count - placed + 1):
+                weight = comb(count - placed, c) * powers[c]
+                kept = min(placed + c, keep) - min(placed, keep)
+                shift = kept * value
+                target = next_states.setdefault(placed + c, {})
+                for s, q in enumerate(pmf):
+                    if q:
+                        target[s + shift] = target.get(s + shift, 0.0) \
+                            + q * weight
+        states = {
+            placed: _dense(sums) for placed, sums in next_states.items()
+        }
+    final = states.get(count, [1.0])
+    first = next((i for i, p in enumerate(final) if p), 0)
+    return first, final[first:]
+
+
+def _dense(sparse: dict) -> list:
+    out = [0.0] * (max(sparse) + 1)
+    for k, v in sparse.items():
+        out[k] = v
+    return out
+
+
+def _group(group: DiceGroup) -> (int, list):
+    minimum, die = _single_die(group)
+    if group.keep == 0:
+        return 0, [1.0]
+    if group.keep == group.count:
+        return minimum * group.count, _power(die, group.count)
+    return _keep_sum(minimum, die, group.count, group.keep,
+                     group.keep_highest)
+
+
+def _combine(symbol: str, a: (int, list), b: (int, list)) -> (int, list):
+    """Enumerates the joint support of two independent distributions"""
+    op = _OPERATORS[symbol]
+    out = {}
+    for i, p in enumerate(a[1]):
+        if not p:
+            continue
+        for j, q in enumerate(b[1]):
+            if q:
+                v = op(a[0] + i, b[0] + j)
+                out[v] = out.get(v, 0.0) + p * q
+    low = min(out)
+    pmf = [0.0] * (max(out) - low + 1)
+    for v, p in out.items():
+        pmf[v - low] = p
+    return low, pmf
+
+
+def _node(node) -> (int, list):
+    if isinstance(node, Constant):
+        return node.value, [1.0]
+    if isinstance(node, DiceGroup):
+        return _group(node)
+    if isinstance(node, Negate):
+        minimum, pmf = _node(node.operand)
+        return -(minimum + len(pmf) - 1), pmf[::-1]
+    if isinstance(node, BinaryOp):
+        left = _node(node.left)
+        right = _node(node.right)
+        if node.symbol == "+":
+            return left[0] + right[0], _convolve(left[1], right[1])
+        if node.symbol == "-":
+            minimum, pmf = right
+            return left[0] - (minimum + len(pmf) - 1), \
+                _convolve(left[1], pmf[::-1])
+        if node.symbol == "/" and 0 in _support(right):
+            raise ZeroDivisionError("Divisor can be zero")
+        return _combine(node.symbol, left, right)
+    raise TypeError("Unknown expression node {!r}".format(node))
+
+
+def _support(dist: (int, list)):
+    return {dist[0] + i for i, p in enumerate(dist[1]) if p}
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _distribution(expression: str) -> Distribution:
+    minimum, pmf = _node(compile_expression(expression).root)
+    first = next(i for i, p in enumerate(pmf) if p)
+    last = max(i for i, p in enumerate(pmf) if p)
+    return Distribution(expression, minimum + first, pmf[first:last + 1])
+
+
+def distribution(expression: str) -> Distribution:
+    """
+    Returns the exact distribution of a dice expression.
+
+    Results are memoized on the normalized expression text.
+
+    :param str expression: Dice expression, e.g. ``4d6dl1``
+    :returns Distribution
+    :raises: DiceSyntaxError, ZeroDivisionError
+    """
+    return _distribution(normalize(expression))
@@ -0,0 +1,302 @@
+"""
+.. module:: engine
+   :platform: Unix, Windows
+   :synopsis: Batched dice drawing engine
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+from array import array
+from random import randint, getrandbits
+
+from .._compat import numpy
+
+#: Rolls of at least this many dice are drawn in one batch by roll_many
+BATCH_THRESHOLD = 64
+
+#: Widest roll reduced with element-wise selection rather than partitioning
+SELECTION_WIDTH = 16
+
+_generator = None
+
+
+def _shared_generator():
+    """Returns the numpy Generator shared by all rolls, created on first use"""
+    global _generator
+    if _generator is None and numpy is not None:
+        _generator = numpy.random.default_rng()
+    return _generator
+
+
+class RollBlock(object):
+    """
+    A block of dice results, one row of num_dice values per trial.
+
+    With numpy installed the values are a (trials, num_dice) ndarray laid
+    out die-major, so each die's column is contiguous and reductions across
+    a trial are element-wise operations. Without numpy they are a flat
+    row-major :class:`array.array`.
+    """
+
+    __slots__ = ("values", "trials", "num_dice")
+
+    def __init__(self, values, trials: int, num_dice: int):
+        """
+        :param values: The rolled values (ndarray or flat array.array)
+        :param int trials: Number of trials (rows) in the block
+        :param int num_dice: Number of dice (columns) rolled per trial
+        """
+        self.values = values
+        self.trials = trials
+        self.num_dice = num_dice
+
+    def __len__(self) -> int:
+        return self.trials
+
+    def flat(self):
+        """Returns every die value in the block, row by row, as ints"""
+        if numpy is not None and isinstance(self.values, numpy.ndarray):
+            return self.values.ravel().tolist()
+        return self.values
+
+    def rows(self):
+        """Yields the dice of each trial as a tuple"""
+        if numpy is not None and isinstance(self.values, numpy.ndarray):
+            yield from map(tuple, self.values.tolist())
+            return
+        n = self.num_dice
+        for start in range(0, self.trials * n, n):
+            yield tuple(self.values[start:start + n])
+
+    def sum(self):
+        """Returns the total of every trial"""
+        return self.keep_highest(self.num_dice)
+
+    def keep_highest(self, n: int):
+        """
+        Returns the total of the n highest dice of every trial.
+
+        :param int n: How many dice to keep per trial
+        :raises: ValueError
+        """
+        return self._keep(n, highest=True)
+
+    def keep_lowest(self, n: int):
+        """
+        Returns the total of the n lowest dice of every trial.
+
+        :param int n: How many dice to keep per trial
+        :raises: ValueError
+        """
+        return self._keep(n, highest=False)
+
+    def drop_lowest(self, n: int=1):
+        """
+        Returns the total of every trial with its n lowest dice discarded.
+
+        :param int n: How many dice to discard per trial, defaults to 1
+        :raises: ValueError
+        """
+        return self._keep(self.num_dice - n, highest=True)
+
+    def drop_highest(self, n: int=1):
+        """
+        Returns the total of every trial with its n highest dice discarded.
+
+        :param int n: How many dice to discard per trial, defaults to 1
+        :raises: ValueError
+        """
+        return self._keep(self.num_dice - n, highest=False)
+
+    def _keep(self, n: int, highest: bool):
+        if n < 0 or n > self.num_dice:
+            raise ValueError("Cannot keep {} of {} dice".format(
+                n, self.num_dice))
+        if numpy is not None and isinstance(self.values, numpy.ndarray):
+            return _keep_numpy(self.values, n, highest)
+        return _keep_array(self.values, self.trials, self.num_dice, n, highest)
+
+
+def _keep_numpy(values, n: int, highest: bool):
+    width = values.shape[1]
+    if n == 0:
+        return numpy.zeros(values.shape[0], dtype=numpy.int64)
+    elif n == width:
+        return values.sum(axis=1, dtype=numpy.int64)
+    elif width > SELECTION_WIDTH:
+        if highest:
+            kept = numpy.partition(values, width - n, axis=1)[:, width - n:]
+        else:
+            kept = numpy.partition(values, n - 1, axis=1)[:, :n]
+        return kept.sum(axis=1, dtype=numpy.int64)
+    columns = [values[:, i] for i in range(width)]
+    if n <= width - n:
+        return _select_sum(columns, n, highest)
+    total = values.sum(axis=1, dtype=numpy.int64)
+    return total - _select_sum(columns, width - n, not highest)
+
+
+def _select_sum(columns: list, n: int, largest: bool):
+    """
+    Sums the n largest (or smallest) values across columns, element-wise.
+
+    Each pass bubbles the current extreme of every trial into the last column
+    with element-wise min/max, which beats sorting along short rows.
+    """
+    total = numpy.zeros(len(columns[0]), dtype=numpy.int64)
+    low, high = (numpy.minimum, numpy.maximum) if largest else \
+        (numpy.maximum, numpy.minimum)
+    columns = list(columns)
+    for _ in range(n):
+        for j in range(len(columns) - 1):
+            a, b = columns[j], columns[j + 1]
+            columns[j], columns[j + 1] = low(a, b), high(a, b)
+        total += columns.pop()
+    return total
+
+
+def _keep_array(values, trials: int, width: int, n: int, highest: bool):
+    totals = array("q")
+    if n == 0:
+        totals.extend(0 for _ in range(trials))
+    elif n == width:
+        totals.extend(
+            sum(values[i:i + width]) for i in range(0, trials * width, width)
+        )
+    elif highest:
+        totals.extend(
+            sum(sorted(values[i:i + width])[width - n:])
+            for i in range(0, trials * width, width)
+        )
+    else:
+        totals.extend(
+            sum(sorted(values[i:i + width])[:n])
+            for i in range(0, trials * width, width)
+        )
+    return totals
+
+
+def _value_width(dice_type: int) -> (int, str):
+    """Returns the byte width and array typecode able to hold dice_type"""
+    for typecode in "BHILQ":
+        width = array(typecode).itemsize
+        if dice_type < 256 ** width:
+            return width, typecode
+    raise ValueError("dice_type is too large: {}".format(dice_type))
+
+
+def _draw_slab(count: int, dice_type: int):
+    """
+    Draws count uniform integers in [1, dice_type] from getrandbits slabs.
+
+    Raw values are drawn as fixed-width words and reduced modulo dice_type,
+    rejecting the biased tail above the largest multiple of dice_type.
+    """
+    width, typecode = _value_width(dice_type)
+    limit = (256 ** width // dice_type) * dice_type
+    out = array(typecode)
+    while len(out) < count:
+        need = count - len(out)
+        n = need + (need >> 4) + 16
+        raw = array(typecode)
+        raw.frombytes(getrandbits(8 * width * n).to_bytes(width * n, "little"))
+        out.extend(v % dice_type + 1 for v in raw if v < limit)
+    del out[count:]
+    return out
+
+
+def _numpy_dtype(dice_type: int):
+    for dtype in (numpy.uint8, numpy.uint16, numpy.uint32, numpy.uint64):
+        if dice_type <= numpy.iinfo(dtype).max:
+            return dtype
+    raise ValueError("dice_type is too large: {}".format(dice_type))
+
+
+def _draw_stream(rng, num_dice: int, dice_type: int, trials: int):
+    """Draws a block from a RollStream, die-major like the numpy path"""
+    if numpy is not None:
+        return rng.integers(
+            1, max(dice_type, 1), endpoint=True, size=(num_dice, trials),
+            dtype=_numpy_dtype(dice_type)).T
+    values = rng.integers(1, max(dice_type, 1), endpoint=True,
+                          size=num_dice * trials)
+    if num_dice < 2 or trials < 2:
+        return values
+    return _interleave(values, num_dice, trials)
+
+
+def _interleave(values: array, num_dice: int, trials: int) -> array:
+    """Turns die-major values (every trial of die 0 first) into trial rows"""
+    rows = array(values.typecode, bytes(values.itemsize * len(values)))
+    for die in range(num_dice):
+        rows[die::num_dice] = values[die * trials:(die + 1) * trials]
+    return rows
+
+
+def roll_many(num_dice: int, dice_type: int, trials: int=1,
+              rng=None) -> RollBlock:
+    """Rolls num_dice dice_type-sided dice for each of trials trials at once.
+
+    All dice are drawn in a single call to the numpy Generator, or from
+    ``random.getrandbits`` slabs when numpy is not installed. Given a
+    :class:`~take10.rng.RollStream`, the dice are drawn from it instead,
+    die by die, and are the same with or without numpy.
+
+    :param num_dice: number of dice to roll per trial
+    :type num_dice: int.
+    :param dice_type: how many sides each dice has
+    :type dice_type: int.
+    :param trials: how many independent rolls to make, defaults to 1
+    :type trials: int.
+    :param rng: stream to draw from, defaults to the shared generator
+    :type rng: RollStream.
+    :returns: RollBlock of trials x num_dice values
+    :raises: ValueError
+    """
+    if num_dice < 0 or dice_type < 0 or trials < 0:
+        raise ValueError("Invalid values for dice_type/num_dice/trials")
+    if dice_type == 0 and num_dice > 0 and trials > 0:
+        raise ValueError("Cannot roll a 0-sided dice")
+    if rng is not None:
+        values = _draw_stream(rng, num_dice, dice_type, trials)
+    elif numpy is not None:
+        values = _shared_generator().integers(
+            1, max(dice_type, 1), endpoint=True,
+            size=(num_dice, trials), dtype=_numpy_dtype(dice_type)).T
+    elif num_dice * trials == 0:
+        values = array("B")
+    else:
+        values = _draw_slab(num_dice * trials, dice_type)
+    return RollBlock(values, trials, num_dice)
+
+
+def roll(num_dice: int, dice_type: int, rng=None):
+    """Emulates rolling a dice_type-sided die num_dice times.
+
+    Rolls of BATCH_THRESHOLD or more dice are drawn in one go through
+    :func:`roll_many`.
+
+    :param num_dice: number of dice to roll
+    :type num_dice: int.
+    :param dice_type: how many sides each dice has
+    :type dice_type: int.
+    :param rng: stream to draw from, defaults to the random module
+    :type rng: RollStream.
+    :returns: iterator of dice values, or value if only 1 die specified
+    :raises: ValueError
+    """
+    if num_dice < 0 or dice_type < 0:
+        raise ValueError("Invalid values for dice_type/num_dice")
+    if rng is not None:
+        if dice_type == 0 and num_dice > 0:
+            raise ValueError("Cannot roll a 0-sided dice")
+        if num_dice == 1:
+            return rng.randint(1, dice_type)
+        return iter(roll_many(num_dice, dice_type, 1, rng).flat())
+    if num_dice == 1:
+        return randint(1, dice_type)
+    elif num_dice >= BATCH_THRESHOLD:
+        return iter(roll_many(num_dice, dice_type).flat())
+    else:
+        return (randint(1, dice_type) for _ in range(num_dice))
@@ -0,0 +1,506 @@
+"""
+.. module:: expression
+   :platform: Unix, Windows
+   :synopsis: Dice expression compiler
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Dice expressions combine dice groups, integers and the arithmetic operators
+``+ - * /`` (``/`` is floor division) with parentheses, e.g. ``4d6kh3+2d8+5``.
+Dividing by a sub-expression that rolls 0 raises ZeroDivisionError.
+Expressions may nest at most :data:`MAX_DEPTH` levels of parentheses,
+signs and operators deep.
+
+A dice group is ``NdM`` (``N`` defaults to 1, ``d%`` is a d100) followed by
+any of these modifiers:
+
+* ``khX``/``kX``, ``klX``, ``dhX``, ``dlX``: keep/drop the X highest/lowest
+* ``rX``, ``r<X``, ``r<=X``, ``r>X``, ``r>=X``: reroll matching results
+  until they no longer match; ``ro`` rerolls them once only
+* ``!``: explode, adding another roll to a die each time it shows its
+  maximum face (compounding, so the number of dice stays fixed)
+
+Expressions compile into a :class:`DicePlan` once and are cached on their
+text, so evaluating the same expression repeatedly only draws random numbers.
+"""
+
+import operator
+import re
+from array import array
+from functools import lru_cache
+
+from .._compat import numpy
+from .engine import RollBlock, _interleave, roll_many
+
+#: Maximum number of extra rolls an exploding die may chain
+MAX_EXPLOSIONS = 100
+
+#: How many compiled expressions are kept by compile_expression
+CACHE_SIZE = 1024
+
+#: Deepest nesting of parentheses, signs and operators in an expression
+MAX_DEPTH = 100
+
+_TOKEN = re.compile(r"""
+    (?P<dice>(?P<count>\d*)d(?P<sides>\d+|%))
+  | (?P<keep>(?P<keep_op>kh|kl|dh|dl|k)(?P<keep_n>\d+))
+  | (?P<reroll>(?P<reroll_op>ro|r)(?P<cmp><=|>=|<|>|=)?(?P<reroll_n>\d+))
+  | (?P<explode>!)
+  | (?P<number>\d+)
+  | (?P<op>[-+*/()])
+""", re.VERBOSE)
+
+_COMPARISONS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "=": operator.eq,
+    None: operator.eq,
+}
+
+_OPERATORS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.floordiv,
+}
+
+
+class DiceSyntaxError(ValueError):
+    """Raised when a dice expression cannot be parsed"""
+
+
+class Constant(object):
+    """An integer literal in a dice expression"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: int):
+        self.value = value
+
+    def evaluate(self, trials: int, rng=None):
+        return self.value
+
+
+class DiceGroup(object):
+    """
+    A group of identical dice with optional reroll, explode and keep/drop
+    modifiers, e.g. the ``4d6kh3`` of ``4d6kh3+2``.
+    """
+
+    __slots__ = ("count", "sides", "keep", "keep_highest", "faces",
+                 "reroll_once", "explode")
+
+    def __init__(
+            self,
+            count: int,
+            sides: int,
+            keep: int=None,
+            keep_highest: bool=True,
+            reroll: frozenset=frozenset(),
+            reroll_once: bool=False,
+            explode: bool=False):
+        """
+        :param int count: Number of dice rolled
+        :param int sides: Number of faces on each die
+        :param int keep: How many dice are kept, defaults to all of them
+        :param bool keep_highest: Whether the highest or lowest dice are kept
+        :param frozenset reroll: Face values that are rerolled
+        :param bool reroll_once: Reroll matching faces only once
+        :param bool explode: Whether dice explode on their maximum face
+        :raises: DiceSyntaxError
+        """
+        if sides < 1:
+            raise DiceSyntaxError("Dice need at least one side")
+        if keep is not None and keep > count:
+            raise DiceSyntaxError(
+                "Cannot keep {} of {} dice".format(keep, count))
+        self.count = count
+        self.sides = sides
+        self.keep = count if keep is None else keep
+        self.keep_highest = keep_highest
+        #: Faces a die can finally show once reroll-until is applied
+        self.faces = tuple(
+            f for f in range(1, sides + 1)
+            if reroll_once or f not in reroll
+        )
+        if not self.faces:
+            raise DiceSyntaxError("Every face of a d{} is rerolled".format(
+                sides))
+        self.reroll_once = frozenset(reroll) if reroll_once else frozenset()
+        self.explode = explode
+        if explode and sides == 1:
+            raise DiceSyntaxError("A d1 cannot explode")
+
+    def evaluate(self, trials: int, rng=None):
+        values = self._draw(self.count * trials, rng)
+        if self.reroll_once:
+            values = self._reroll_once(values, rng)
+        if self.explode:
+            values = self._explode(values, rng)
+        # Values are drawn die-major, so that a RollStream gives the same
+        # dice with and without numpy
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            values = values.reshape(self.count, trials).T
+        elif self.count > 1 and trials > 1:
+            values = _interleave(values, self.count, trials)
+        block = RollBlock(values, trials, self.count)
+        if self.keep_highest:
+            return block.keep_highest(self.keep)
+        return block.keep_lowest(self.keep)
+
+    def _draw(self, n: int, rng=None):
+        """Draws n dice already restricted to self.faces"""
+        values = roll_many(n, len(self.faces), 1, rng).values
+        if len(self.faces) == self.sides:
+            return values.ravel() if numpy is not None else values
+        offset = self.faces[0] - 1
+        contiguous = self.faces[-1] - self.faces[0] + 1 == len(self.faces)
+        if numpy is not None:
+            values = values.ravel()
+            if contiguous:
+                return values.astype(numpy.int64) + offset
+            return numpy.asarray(self.faces, dtype=numpy.int64)[values - 1]
+        if contiguous:
+            return array("q", (v + offset for v in values))
+        faces = self.faces
+        return array("q", (faces[v - 1] for v in values))
+
+    def _reroll_once(self, values, rng=None):
+        rerolled = sorted(self.reroll_once)
+        if numpy is not None:
+            index = numpy.flatnonzero(numpy.isin(values, rerolled))
+            values[index] = self._draw(len(index), rng)
+            return values
+        index = [i for i, v in enumerate(values) if v in self.reroll_once]
+        for i, v in zip(index, self._draw(len(index), rng)):
+            values[i] = v
+        return values
+
+    def _explode(self, values, rng=None):
+        top = self.sides
+        if numpy is not None:
+            values = values.astype(numpy.int64)
+            index = numpy.flatnonzero(values == top)
+            for _ in range(MAX_EXPLOSIONS):
+                if not len(index):
+                    break
+                extra = self._draw(len(index), rng)
+                values[index] += extra
+                index = index[extra == top]
+            return values
+        values = array("q", values)
+        index = [i for i, v in enumerate(values) if v == top]
+        for _ in range(MAX_EXPLOSIONS):
+            if not index:
+                break
+            extra = self._draw(len(index), rng)
+            for i, v in zip(index, extra):
+                values[i] += v
+            index = [i for i, v in zip(index, extra) if v == top]
+        return values
+
+
+class Negate(object):
+    """Unary minus applied to a sub-expression"""
+
+    __slots__ = ("operand",)
+
+    def __init__(self, operand):
+        self.operand = operand
+
+    def evaluate(self, trials: int, rng=None):
+        value = self.operand.evaluate(trials, rng)
+        if isinstance(value, int) or numpy is not None:
+            return -value
+        return array("q", (-v for v in value))
+
+
+def _has_zero(values) -> bool:
+    if isinstance(values, int):
+        return values == 0
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        return not values.all()
+    return 0 in values
+
+
+class BinaryOp(object):
+    """An arithmetic operator applied to two sub-expressions"""
+
+    __slots__ = ("symbol", "left", "right")
+
+    def __init__(self, symbol: str, left, right):
+        self.symbol = symbol
+        self.left = left
+        self.right = right
+
+    def evaluate(self, trials: int, rng=None):
+        op = _OPERATORS[self.symbol]
+        left = self.left.evaluate(trials, rng)
+        right = self.right.evaluate(trials, rng)
+        if self.symbol == "/" and _has_zero(right):
+            # numpy would only warn and give 0, so check on both paths
+            raise ZeroDivisionError("Division by a rolled zero")
+        if numpy is not None:
+            return op(left, right)
+        if isinstance(left, int) and isinstance(right, int):
+            return op(left, right)
+        if isinstance(left, int):
+            return array("q", (op(left, r) for r in right))
+        if isinstance(right, int):
+            return array("q", (op(v, right) for v in left))
+        return array("q", map(op, left, right))
+
+
+class DicePlan(object):
+    """
+    A compiled dice expression.
+
+    Plans are immutable and may be evaluated any number of times; every dice
+    group draws all of its dice for all trials in a single batch.
+    """
+
+    __slots__ = ("expression", "root")
+
+    def __init__(self, expression: str, root):
+        """
+        :param str expression: The normalized expression text
+        :param root: Root node of the expression tree
+        """
+        self.expression = expression
+        self.root = root
+
+    def __repr__(self) -> str:
+        return "DicePlan({!r})".format(self.expression)
+
+    def groups(self):
+        """Yields every DiceGroup in the expression, left to right"""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, DiceGroup):
+                yield node
+            elif isinstance(node, Negate):
+                stack.append(node.operand)
+            elif isinstance(node, BinaryOp):
+                stack.extend((node.right, node.left))
+
+    def roll(self, trials: int=1, rng=None):
+        """
+        Evaluates the expression for a number of independent trials.
+
+        :param int trials: How many times to evaluate the expression
+        :param RollStream rng: Stream to draw from (optional); the same
+            stream position always gives the same totals
+        :returns Per-trial totals (ndarray, or array.array without numpy)
+        :raises: ValueError, ZeroDivisionError if a divisor rolls 0
+        """
+        if trials < 0:
+            raise ValueError("trials cannot be negative")
+        totals = self.root.evaluate(trials, rng)
+        if isinstance(totals, int):
+            if numpy is not None:
+                return numpy.full(trials, totals, dtype=numpy.int64)
+            return array("q", [totals]) * trials
+        return totals
+
+    def roll_one(self, rng=None) -> int:
+        """Evaluates the expression once and returns the total"""
+        return int(self.roll(1, rng)[0])
+
+
+class _Parser(object):
+    """Recursive descent parser turning a token list into a node tree"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = list(_tokenize(text))
+        self.pos = 0
+
+    def parse(self):
+        if not self.tokens:
+            raise DiceSyntaxError("Empty dice expression")
+        node = self._expression(0)
+        if self.pos != len(self.tokens):
+            raise DiceSyntaxError("Unexpected {!r} in {!r}".format(
+                self.tokens[self.pos].group(0), self.text))
+        # Nodes are evaluated recursively, so long operator chains are
+        # limited like parentheses
+        if _depth(node) > MAX_DEPTH:
+            raise DiceSyntaxError("{!r} is nested too deeply".format(
+                self.text))
+        return node
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _peek_op(self):
+        token = self._peek()
+        return token.group("op") if token is not None else None
+
+    def _expression(self, depth: int):
+        node = self._term(depth)
+        while self._peek_op() in ("+", "-"):
+            symbol = self.tokens[self.pos].group("op")
+            self.pos += 1
+            node = _fold(BinaryOp(symbol, node, self._term(depth)))
+        return node
+
+    def _term(self, depth: int):
+        node = self._factor(depth)
+        while self._peek_op() in ("*", "/"):
+            symbol = self.tokens[self.pos].group("op")
+            self.pos += 1
+            right = self._factor(depth)
+            if symbol == "/" and isinstance(right, Constant) \
+                    and right.value == 0:
+                raise DiceSyntaxError("Division by zero in {!r}".format(
+                    self.text))
+            node = _fold(BinaryOp(symbol, node, right))
+        return node
+
+    def _factor(self, depth: int):
+        if depth > MAX_DEPTH:
+            raise DiceSyntaxError("{!r} is nested too deeply".format(
+                self.text))
+        if self._peek_op() == "-":
+            self.pos += 1
+            return _fold(Negate(self._factor(depth + 1)))
+        if self._peek_op() == "+":
+            self.pos += 1
+            return self._factor(depth + 1)
+        return self._atom(depth)
+
+    def _atom(self, depth: int):
+        token = self._peek()
+        if token is None:
+            raise DiceSyntaxError("Unexpected end of {!r}".format(self.text))
+        self.pos += 1
+        if token.group("number"):
+            return Constant(int(token.group("number")))
+        if token.group("dice"):
+            return self._dice(token)
+        if token.group("op") == "(":
+            node = self._expression(depth + 1)
+            if self._peek_op() != ")":
+                raise DiceSyntaxError("Unbalanced parenthesis in {!r}".format(
+                    self.text))
+            self.pos += 1
+            return node
+        raise DiceSyntaxError("Unexpected {!r} in {!r}".format(
+            token.group(0), self.text))
+
+    def _dice(self, token):
+        count = int(token.group("count") or 1)
+        sides = token.group("sides")
+        sides = 100 if sides == "%" else int(sides)
+        keep = None
+        keep_highest = True
+        reroll = set()
+        reroll_once = None
+        explode = False
+        while True:
+            modifier = self._peek()
+            if modifier is None:
+                break
+            if modifier.group("keep"):
+                if keep is not None:
+                    raise DiceSyntaxError("Multiple keep/drop in {!r}".format(
+                        self.text))
+                op = modifier.group("keep_op")
+                n = int(modifier.group("keep_n"))
+                if n > count:
+                    raise DiceSyntaxError("Cannot {} {} of {} dice".format(
+                        op, n, count))
+                keep_highest = op in ("k", "kh", "dl")
+                keep = n if op in ("k", "kh", "kl") else count - n
+            elif modifier.group("reroll"):
+                once = modifier.group("reroll_op") == "ro"
+                if reroll_once is not None and reroll_once != once:
+                    raise DiceSyntaxError("Cannot mix r and ro in {!r}".format(
+                        self.text))
+                reroll_once = once
+                compare = _COMPARISONS[modifier.group("cmp")]
+                n = int(modifier.group("reroll_n"))
+                reroll.update(f for f in range(1, sides + 1) if compare(f, n))
+            elif modifier.group("explode"):
+                explode = True
+            else:
+                break
+            self.pos += 1
+        return DiceGroup(count, sides, keep, keep_highest, frozenset(reroll),
+                         bool(reroll_once), explode)
+
+
+def _depth(root) -> int:
+    """Returns the number of nodes on the longest path down from root"""
+    deepest = 0
+    stack = [(root, 1)]
+    while stack:
+        node, depth = stack.pop()
+        deepest = max(deepest, depth)
+        if isinstance(node, Negate):
+            stack.append((node.operand, depth + 1))
+        elif isinstance(node, BinaryOp):
+            stack.extend(((node.left, depth + 1), (node.right, depth + 1)))
+    return deepest
+
+
+def _tokenize(text: str):
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if match is None:
+            raise DiceSyntaxError("Invalid character {!r} at {} in {!r}".format(
+                text[pos], pos, text))
+        yield match
+        pos = match.end()
+
+
+def _fold(node):
+    """Folds operators over constant operands into a single Constant"""
+    if isinstance(node, Negate) and isinstance(node.operand, Constant):
+        return Constant(-node.operand.value)
+    if isinstance(node, BinaryOp) and isinstance(node.left, Constant) \
+            and isinstance(node.right, Constant):
+        return Constant(_OPERATORS[node.symbol](
+            node.left.value, node.right.value))
+    return node
+
+
+def normalize(expression: str) -> str:
+    """Returns the canonical text of an expression, used as its cache key"""
+    return "".join(expression.split()).lower()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _compile(expression: str) -> DicePlan:
+    return DicePlan(expression, _Parser(expression).parse())
+
+
+def compile_expression(expression: str) -> DicePlan:
+    """
+    Compiles a dice expression into a reusable DicePlan.
+
+    Plans are cached on the normalized expression text, so compiling the same
+    expression again is a dictionary lookup.
+
+    :param str expression: Dice expression, e.g. ``4d6kh3+2d8+5``
+    :returns DicePlan
+    :raises: DiceSyntaxError
+    """
+    return _compile(normalize(expression))
+
+
+def evaluate(expression: str, trials: int=1, rng=None):
+    """
+    Compiles (or fetches from cache) and evaluates a dice expression.
+
+    :param str expression: Dice expression, e.g. ``4d6kh3+2d8+5``
+    :param int trials: How many times to evaluate the expression
+    :param RollStream rng: Stream to draw from (optional)
+    :returns Per-trial totals (ndarray, or array.array without numpy)
+    :raises: DiceSyntaxError, ZeroDivisionError if a divisor rolls 0
+    """
+    return compile_expression(expression).roll(trials, rng)
@@ -0,0 +1,382 @@
+"""
+.. module:: verifiable
+   :platform: Unix, Windows
+   :synopsis: Commit-reveal dice rolls checkable by other peers
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+A roller publishes one :class:`RollCommitment` root covering a whole block
+of future rolls. Leaf ``i`` of the Merkle tree hashes a secret seed; roll
+``i`` is the dice expression evaluated on a RollStream seeded with that
+secret and a nonce chosen by the other peers after the commitment, so that
+the roller can neither know nor steer the outcome. Verifiers pass in the
+nonce and the expression they expect for every roll rather than trusting
+the ones in a reveal.
+
+Rolls are revealed lazily, in order, any number at a time. A
+:class:`Reveal` carries the secrets and only the tree nodes the verifiers
+cannot already compute: nodes authenticated by earlier reveals are never
+sent or hashed again, so over a session a roll costs its secret plus about
+one 16 byte node. :class:`RollVerifier` checks every leaf of a reveal in a
+single walk up the tree.
+"""
+
+import struct
+from hashlib import blake2b
+
+from ..rng import RollStream
+from .expression import compile_expression
+
+#: Bytes per secret seed and per tree node
+DIGEST_SIZE = 16
+
+#: Rolls covered by one commitment unless told otherwise
+COMMITMENT_SIZE = 1024
+
+_COMMITMENT = struct.Struct("<B16s")
+_REVEAL = struct.Struct("<IHH")
+
+
+class VerificationError(ValueError):
+    """Raised when revealed rolls do not match the commitment"""
+
+
+def _leaf(index: int, secret: bytes) -> bytes:
+    return blake2b(b"\x00" + index.to_bytes(4, "little") + secret,
+                   digest_size=DIGEST_SIZE).digest()
+
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return blake2b(b"\x01" + left + right, digest_size=DIGEST_SIZE).digest()
+
+
+def _seed(secret: bytes, nonce: bytes) -> RollStream:
+    return RollStream(secret + nonce)
+
+
+def _authenticate(depth: int, leaves: dict, known: dict, sibling) -> dict:
+    """
+    Hashes leaves up the tree until every path meets a known node.
+
+    Shared by prover and verifier so both visit nodes in the same order.
+
+    :param int depth: Height of the tree
+    :param dict leaves: Leaf hashes by index
+    :param dict known: Authenticated hashes by (level, index); must hold
+        the root at (depth, 0)
+    :param sibling: Called with (level, index) for a node that is neither
+        computed nor known, returns its hash
+    :returns Computed hashes by (level, index)
+    :raises: VerificationError if a computed node contradicts a known one
+    """
+    nodes = {(0, index): digest for index, digest in leaves.items()}
+    level_indices = sorted(leaves)
+    for level in range(depth + 1):
+        parents = []
+        for index in level_indices:
+            digest = nodes[(level, index)]
+            expected = known.get((level, index))
+            if expected is not None:
+                if expected != digest:
+                    raise VerificationError("Rolls do not match commitment")
+                continue
+            if parents and parents[-1] == index >> 1:
+                continue
+            pair = index ^ 1
+            other = nodes.get((level, pair)) or known.get((level, pair)) \
+                or sibling(level, pair)
+            left, right = (digest, other) if index < pair else (other, digest)
+            nodes[(level + 1, index >> 1)] = _node(left, right)
+            parents.append(index >> 1)
+        level_indices = parents
+    return nodes
+
+
+class Roll(object):
+    """One revealed (or, on the roller's side, pending) roll"""
+
+    __slots__ = ("index", "expression", "total", "secret", "nonce")
+
+    def __init__(self, index: int, expression: str, total: int,
+                 secret: bytes, nonce: bytes):
+        self.index = index
+        self.expression = expression
+        self.total = total
+        self.secret = secret
+        self.nonce = nonce
+
+    def __repr__(self) -> str:
+        return "Roll({}, {!r}, {})".format(
+            self.index, self.expression, self.total)
+
+
+class Reveal(object):
+    """
+    A run of consecutive rolls and the tree nodes needed to check them.
+
+    Totals are not sent; verifiers recompute them from the secrets.
+    """
+
+    __slots__ = ("first", "rolls", "proof")
+
+    def __init__(self, first: int, rolls: list, proof: list):
+        """
+        :param int first: Index of the first roll
+        :param list rolls: (expression, secret, nonce) per roll
+        :param list proof: Node hashes in the order they are needed
+        """
+        self.first = first
+        self.rolls = rolls
+        self.proof = proof
+
+    def __len__(self) -> int:
+        return len(self.rolls)
+
+    def to_bytes(self) -> bytes:
+        """Encodes the reveal for the wire"""
+        parts = [_REVEAL.pack(self.first, len(self.rolls), len(self.proof))]
+        for expression, secret, nonce in self.rolls:
+            text = expression.encode("ascii")
+            parts.append(bytes((len(text), len(nonce))))
+            parts.extend((text, nonce, secret))
+        parts.extend(self.proof)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data) -> "Reveal":
+        """
+        Decodes a reveal written by to_bytes.
+
+        :raises: VerificationError if the data is malformed
+        """
+        view = memoryview(data)
+        try:
+            first, count, nodes = _REVEAL.unpack_from(view)
+            offset = _REVEAL.size
+            rolls = []
+            for _ in range(count):
+                length, nonce_length = view[offset], view[offset + 1]
+                offset += 2
+                expression = str(view[offset:offset + length], "ascii")
+                offset += length
+                nonce = bytes(view[offset:offset + nonce_length])
+                offset += nonce_length
+                secret = bytes(view[offset:offset + DIGEST_SIZE])
+                offset += DIGEST_SIZE
+                rolls.append((expression, secret, nonce))
+            proof = [bytes(view[o:o + DIGEST_SIZE]) for o in range(
+                offset, offset + nodes * DIGEST_SIZE, DIGEST_SIZE)]
+        except (IndexError, struct.error, UnicodeDecodeError):
+            raise VerificationError("Malformed reveal")
+        if offset + nodes * DIGEST_SIZE != len(view) or \
+                any(len(s) != DIGEST_SIZE for _, s, _ in rolls):
+            raise VerificationError("Malformed reveal")
+        return cls(first, rolls, proof)
+
+
+class RollCommitment(object):
+    """
+    The roller's side: commits to a block of future rolls, rolls them in
+    order and reveals them.
+    """
+
+    def __init__(self, size: int=COMMITMENT_SIZE, rng: RollStream=None):
+        """
+        :param int size: Number of rolls covered, rounded up to a power of 2
+        :param RollStream rng: Stream the secrets are drawn from, random if
+            omitted; anyone holding it can recompute every roll
+        :raises: ValueError
+        """
+        if size < 1:
+            raise ValueError("A commitment covers at least one roll")
+        self.depth = (size - 1).bit_length()
+        self.size = 1 << self.depth
+        stream = rng or RollStream()
+        self._secrets = [stream.block(i)[:DIGEST_SIZE]
+                         for i in range(self.size)]
+        level = [_leaf(i, s) for i, s in enumerate(self._secrets)]
+        self._tree = [level]
+        while len(level) > 1:
+            level = [_node(level[i], level[i + 1])
+                     for i in range(0, len(level), 2)]
+            self._tree.append(level)
+        self._known = {(self.depth, 0): self.root}
+        self._rolls = []
+        self._revealed = 0
+
+    @property
+    def root(self) -> bytes:
+        """The Merkle root the rolls are committed to"""
+        return self._tree[-1][0]
+
+    @property
+    def remaining(self) -> int:
+        """Rolls left before the commitment is exhausted"""
+        return self.size - len(self._rolls)
+
+    def commitment(self) -> bytes:
+        """Returns the commitment to publish before rolling"""
+        return _COMMITMENT.pack(self.depth, self.root)
+
+    def roll(self, expression: str, nonce: bytes) -> Roll:
+        """
+        Rolls the next committed roll.
+
+        :param str expression: Dice expression, e.g. ``1d20+5``
+        :param bytes nonce: Value fixed by other peers after the commitment
+            was published, 1 to 255 bytes
+        :returns Roll
+        :raises: ValueError if the commitment is exhausted or the nonce is
+            empty or too long
+        """
+        if not self.remaining:
+            raise ValueError("Commitment is exhausted")
+        if not 0 < len(nonce) < 256:
+            raise ValueError("Nonces are 1 to 255 bytes")
+        index = len(self._rolls)
+        secret = self._secrets[index]
+        plan = compile_expression(expression)
+        roll = Roll(index, plan.expression, plan.roll_one(_seed(secret, nonce)),
+                    secret, nonce)
+        self._rolls.append(roll)
+        return roll
+
+    def reveal(self) -> Reveal:
+        """
+        Reveals every roll made since the last reveal.
+
+        Reveals must reach verifiers in order: the proof leaves out nodes
+        they authenticated from earlier reveals.
+
+        :returns Reveal, empty if there is nothing to reveal
+        """
+        rolls = self._rolls[self._revealed:]
+        first = self._revealed
+        proof = []
+        if rolls:
+            tree = self._tree
+            leaves = {r.index: tree[0][r.index] for r in rolls}
+            positions = []
+
+            def sibling(level: int, index: int) -> bytes:
+                positions.append((level, index))
+                proof.append(tree[level][index])
+                return tree[level][index]
+
+            self._known.update(
+                _authenticate(self.depth, leaves, self._known, sibling))
+            self._known.update(zip(positions, proof))
+            self._revealed = len(self._rolls)
+        return Reveal(first, [(r.expression, r.secret, r.nonce)
+                              for r in rolls], proof)
+
+
+class RollVerifier(object):
+    """
+    A peer's side: checks the reveals of one commitment, in order, and
+    recomputes the rolls.
+    """
+
+    def __init__(self, commitment: bytes):
+        """
+        :param bytes commitment: Output of RollCommitment.commitment()
+        :raises: VerificationError
+        """
+        try:
+            self.depth, root = _COMMITMENT.unpack(commitment)
+        except struct.error:
+            raise VerificationError("Malformed commitment")
+        self.root = root
+        self.size = 1 << self.depth
+        self._known = {(self.depth, 0): root}
+        self.rolls = []  #: Every verified Roll, by index
+
+    def verify(self, reveal, nonces, expressions) -> list:
+        """
+        Checks one reveal and returns its rolls.
+
+        :param reveal: Reveal or its encoded bytes
+        :param nonces: The nonce given to the roller for each roll
+        :param expressions: The expression expected for each roll
+        :returns list of Roll
+        :raises: VerificationError
+        """
+        return self.verify_many([reveal], nonces, expressions)
+
+    def verify_many(self, reveals, nonces, expressions) -> list:
+        """
+        Checks a sequence of reveals and returns their rolls.
+
+        The leaves of each reveal are authenticated in one walk up the tree,
+        and no node is hashed twice across reveals. Nothing is recorded
+        unless every reveal checks out.
+
+        The secrets are the only part of a reveal the commitment covers, so
+        the nonces and expressions come from the verifying peer: a reveal
+        whose rolls used anything else is rejected.
+
+        :param reveals: Reveals (or encoded bytes) in the order they were
+            made
+        :param nonces: The nonce given to the roller for each revealed roll,
+            in order
+        :param expressions: The expression expected for each revealed roll,
+            in order
+        :returns list of Roll
+        :raises: VerificationError, ValueError if an expected expression is
+            invalid
+        """
+        expected = iter(zip(nonces, expressions))
+        known = dict(self._known)
+        verified = []
+        for reveal in reveals:
+            if not isinstance(reveal, Reveal):
+                reveal = Reveal.from_bytes(reveal)
+            first = len(self.rolls) + len(verified)
+            if reveal.first != first:
+                raise VerificationError(
+                    "Expected rolls from {}, got {}".format(first,
+                                                            reveal.first))
+            if first + len(reveal) > self.size:
+                raise VerificationError("Rolls beyond the commitment")
+            if not reveal.rolls:
+                continue
+            leaves = {first + i: _leaf(first + i, secret)
+                      for i, (_, secret, _) in enumerate(reveal.rolls)}
+            proof = iter(reveal.proof)
+            used = {}
+
+            def sibling(level: int, index: int) -> bytes:
+                digest = next(proof, None)
+                if digest is None:
+                    raise VerificationError("Proof is too short")
+                used[(level, index)] = digest
+                return digest
+
+            nodes = _authenticate(self.depth, leaves, known, sibling)
+            if next(proof, None) is not None:
+                raise VerificationError("Proof is too long")
+            known.update(nodes)
+            known.update(used)
+            for i, (expression, secret, nonce) in enumerate(reveal.rolls):
+                index = first + i
+                expected_nonce, expected_expression = next(expected,
+                                                           (None, None))
+                if expected_nonce is None:
+                    raise VerificationError(
+                        "Roll {} was not expected".format(index))
+                plan = compile_expression(expected_expression)
+                if nonce != expected_nonce:
+                    raise VerificationError(
+                        "Roll {} used another nonce".format(index))
+                if expression != plan.expression:
+                    raise VerificationError(
+                        "Roll {} rolled {!r} instead of {!r}".format(
+                            index, expression, plan.expression))
+                verified.append(Roll(
+                    index, expression,
+                    plan.roll_one(_seed(secret, nonce)), secret, nonce))
+        if next(expected, None) is not None:
+            raise VerificationError("Fewer rolls than expected")
+        self._known = known
+        self.rolls.extend(verified)
+        return verified
@@ -0,0 +1,365 @@
+"""
+.. module:: encounter
+   :platform: Unix, Windows
+   :synopsis: Monte Carlo combat encounter simulation
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Encounters are simulated many at a time: the state of every fight in a
+chunk lives in (encounters x combatants) arrays and each turn is a handful
+of vectorized operations, with every attack and damage roll of a turn drawn
+as one batch. Chunks are independent and each draws from its own
+RollStream, split from the caller's stream by chunk number, so results are
+the same however many worker processes run them.
+
+The rules are a deliberately small subset of Pathfinder combat:
+
+* Before the fight every combatant rolls Perception against the best
+  Stealth on the other side (taking 10); those who fail are surprised and
+  lose their first turn.
+* Initiative is d20 + Dexterity modifier, ties going to the higher
+  modifier.
+* On its turn a combatant attacks the living enemy with the fewest hit
+  points: d20 + attack bonus against armor class, a natural 1 always
+  misses, a natural 20 always hits and deals double damage.
+* A combatant at 0 hit points or less is out of the fight. The first side
+  left standing wins; a fight still running after max_rounds is a draw.
+"""
+
+from math import sqrt
+from typing import Iterable
+
+from ._compat import require_numpy
+from .abilities import AbilityClass
+from .dice import compile_expression
+from .rng import RollStream
+from .skills import SkillClass, get_skill_ability_class
+
+#: Encounters simulated per independently seeded chunk
+ENCOUNTER_CHUNK = 20000
+
+#: Party and monster sides, as reported in EncounterStats.wins
+PARTY = 0
+MONSTERS = 1
+
+
+def _modifier(score: int) -> int:
+    return (score - 10) // 2
+
+
+class Combatant(object):
+    """
+    One participant in an encounter, reduced to the numbers combat needs.
+
+    Combatants are plain picklable values so they can be shipped to worker
+    processes.
+    """
+
+    __slots__ = ("name", "scores", "hit_points", "armor_class",
+                 "attack_bonus", "damage", "perception", "stealth")
+
+    def __init__(
+            self,
+            name: str,
+            scores: tuple,
+            hit_points: int,
+            armor_class: int,
+            damage: str,
+            base_attack: int=0,
+            attack_ability: AbilityClass=AbilityClass.STRENGTH,
+            skills=None):
+        """
+        :param str name: Name of the combatant
+        :param tuple scores: Ability scores in AbilityClass order
+        :param int hit_points: Starting hit points
+        :param int armor_class: Armor class attacks are rolled against
+        :param str damage: Damage dice expression, e.g. ``1d8+3``
+        :param int base_attack: Base attack bonus
+        :param AbilityClass attack_ability: Ability added to attack rolls
+        :param SkillSet skills: Skill ranks (optional)
+        :raises: ValueError, DiceSyntaxError
+        """
+        if hit_points < 1:
+            raise ValueError("Combatants need at least 1 hit point")
+        self.name = name
+        self.scores = tuple(scores)
+        self.hit_points = hit_points
+        self.armor_class = armor_class
+        self.attack_bonus = base_attack + \
+            _modifier(self.scores[attack_ability.value])
+        self.damage = compile_expression(damage).expression
+        self.perception = self._skill(skills, SkillClass.PERCEPTION)
+        self.stealth = self._skill(skills, SkillClass.STEALTH)
+
+    @classmethod
+    def from_sheet(cls, sheet, hit_points: int, armor_class: int,
+                   damage: str, base_attack: int=0,
+                   attack_ability: AbilityClass=AbilityClass.STRENGTH) \
+            -> "Combatant":
+        """
+        Builds a combatant from a CharacterSheet's scores and skills.
+
+        :param CharacterSheet sheet: Sheet with ability scores
+        :param int hit_points: Starting hit points
+        :param int armor_class: Armor class
+        :param str damage: Damage dice expression
+        :param int base_attack: Base attack bonus
+        :param AbilityClass attack_ability: Ability added to attack rolls
+        :returns Combatant
+        :raises: ValueError if the sheet has no ability scores
+        """
+        if sheet.ability_scores is None:
+            raise ValueError("{} has no ability scores".format(
+                sheet.char_name))
+        return cls(sheet.char_name, sheet.ability_scores.as_tuple(),
+                   hit_points, armor_class, damage, base_attack,
+                   attack_ability, sheet.skills)
+
+    def __repr__(self) -> str:
+        return "Combatant({!r}, hp={}, ac={}, {:+d}, {})".format(
+            self.name, self.hit_points, self.armor_class, self.attack_bonus,
+            self.damage)
+
+    @property
+    def initiative(self) -> int:
+        """Initiative modifier"""
+        return _modifier(self.scores[AbilityClass.DEXTERITY.value])
+
+    def _skill(self, skills, skill: SkillClass) -> int:
+        ranks = skills[skill] if skills is not None else 0
+        return ranks + _modifier(
+            self.scores[get_skill_ability_class(skill).value])
+
+
+class Encounter(object):
+    """A party against a group of monsters"""
+
+    def __init__(self, party: Iterable[Combatant],
+                 monsters: Iterable[Combatant], max_rounds: int=20):
+        """
+        :param party: Combatants on the party's side
+        :param monsters: Combatants on the monsters' side
+        :param int max_rounds: Rounds before a fight is called a draw
+        :raises: ValueError
+        """
+        self.party = tuple(party)
+        self.monsters = tuple(monsters)
+        if not self.party or not self.monsters:
+            raise ValueError("Both sides need at least one combatant")
+        if max_rounds < 1:
+            raise ValueError("max_rounds must be at least 1")
+        self.max_rounds = max_rounds
+
+    @property
+    def combatants(self) -> tuple:
+        """Every combatant, party first"""
+        return self.party + self.monsters
+
+
+class EncounterStats(object):
+    """
+    Aggregated outcomes of simulated encounters.
+
+    Stats from separate chunks are combined with merge().
+    """
+
+    def __init__(self, max_rounds: int):
+        """
+        :param int max_rounds: Round limit of the simulated encounter
+        """
+        self.encounters = 0
+        self.wins = [0, 0]  #: Wins by side, PARTY and MONSTERS
+        #: Fights ended in each round, index 0 unused
+        self.rounds = [0] * (max_rounds + 1)
+        self.party_deaths = 0  #: Party members killed, over every fight
+
+    def __repr__(self) -> str:
+        return "EncounterStats({} encounters, win rate {:.3f}, " \
+            "{:.2f} rounds)".format(self.encounters, self.win_rate(),
+                                   self.mean_rounds())
+
+    @property
+    def draws(self) -> int:
+        """Encounters still running after max_rounds"""
+        return self.encounters - sum(self.wins)
+
+    def merge(self, other: "EncounterStats") -> "EncounterStats":
+        """
+        Adds the outcomes of another batch of the same encounter.
+
+        :param EncounterStats other: Stats to add
+        :returns self
+        """
+        self.encounters += other.encounters
+        self.wins = [a + b for a, b in zip(self.wins, other.wins)]
+        self.rounds = [a + b for a, b in zip(self.rounds, other.rounds)]
+        self.party_deaths += other.party_deaths
+        return self
+
+    def win_rate(self, side: int=PARTY) -> float:
+        """Returns the fraction of encounters won by a side"""
+        return self.wins[side] / self.encounters if self.encounters else 0.0
+
+    def win_rate_error(self, side: int=PARTY) -> float:
+        """Returns the standard error of win_rate()"""
+        if not self.encounters:
+            return 0.0
+        p = self.win_rate(side)
+        return sqrt(p * (1 - p) / self.encounters)
+
+    def mean_rounds(self) -> float:
+        """Returns the mean number of rounds of the decided encounters"""
+        decided = sum(self.rounds)
+        if not decided:
+            return 0.0
+        return sum(r * n for r, n in enumerate(self.rounds)) / decided
+
+
+def _run_chunk(encounter: Encounter, n: int, rng: RollStream) \
+        -> EncounterStats:
+    """Simulates n fights of an encounter at once"""
+    numpy = require_numpy("simulate")
+    combatants = encounter.combatants
+    count = len(combatants)
+    sides = numpy.array([PARTY] * len(encounter.party) +
+                        [MONSTERS] * len(encounter.monsters))
+    armor = numpy.array([c.armor_class for c in combatants])
+    plans = [compile_expression(c.damage) for c in combatants]
+
+    def d20(*shape):
+        return rng.integers(1, 20, endpoint=True, size=shape,
+                            dtype=numpy.int16)
+
+    hp = numpy.tile(numpy.array([c.hit_points for c in combatants],
+                                dtype=numpy.int32), (n, 1))
+
+    # Surprise: Perception against the best enemy Stealth, taking 10
+    best_stealth = [
+        max(c.stealth for c in encounter.monsters) + 10,
+        max(c.stealth for c in encounter.party) + 10,
+    ]
+    dc = numpy.array([best_stealth[side] for side in sides])
+    perception = numpy.array([c.perception for c in combatants])
+    surprised = d20(n, count) + perception < dc
+
+    dexterity = numpy.array([c.initiative for c in combatants])
+    initiative = (d20(n, count) + dexterity) * 64 + dexterity
+    order = numpy.argsort(-initiative, axis=1, kind="stable")
+
+    rows = numpy.arange(n)
+    enemy = sides[:, None] != sides[None, :]
+    running = numpy.ones(n, dtype=bool)
+    stats = EncounterStats(encounter.max_rounds)
+    stats.encounters = n
+    for round_number in range(1, encounter.max_rounds + 1):
+        for slot in range(count):
+            actor = order[:, slot]
+            acting = running & (hp[rows, actor] > 0)
+            if round_number == 1:
+                acting &= ~surprised[rows, actor]
+            rows_acting = numpy.flatnonzero(acting)
+            if not len(rows_acting):
+                continue
+            actors = actor[rows_acting]
+            # Focus fire on the living enemy with the fewest hit points
+            current = hp[rows_acting]
+            target = numpy.where(
+                enemy[actors] & (current > 0), current,
+                numpy.iinfo(hp.dtype).max).argmin(axis=1)
+            natural = d20(len(rows_acting))
+            for c, combatant in enumerate(combatants):
+                mine = actors == c
+                if not mine.any():
+                    continue
+                roll = natural[mine]
+                victim = target[mine]
+                hit = (roll == 20) | ((roll != 1) & (
+                    roll + combatant.attack_bonus >= armor[victim]))
+                if not hit.any():
+                    continue
+                index = rows_acting[mine][hit]
+                damage = numpy.maximum(plans[c].roll(len(index), rng), 1)
+                damage[roll[hit] == 20] *= 2
+                hp[index, victim[hit]] -= damage.astype(numpy.int32)
+            standing = hp > 0
+            party_up = standing[:, sides == PARTY].any(axis=1)
+            monsters_up = standing[:, sides == MONSTERS].any(axis=1)
+            over = running & ~(party_up & monsters_up)
+            if over.any():
+                stats.wins[PARTY] += int((over & party_up).sum())
+                stats.wins[MONSTERS] += int((over & monsters_up).sum())
+                stats.rounds[round_number] += int(over.sum())
+                running &= ~over
+        if not running.any():
+            break
+    stats.party_deaths = int((hp[:, sides == PARTY] <= 0).sum())
+    return stats
+
+
+def _chunks(n: int, chunk: int) -> list:
+    sizes = [chunk] * (n // chunk)
+    if n % chunk:
+        sizes.append(n % chunk)
+    return sizes
+
+
+def simulate_iter(
+        encounter: Encounter,
+        n: int,
+        rng: RollStream=None,
+        workers: int=None,
+        chunk: int=ENCOUNTER_CHUNK):
+    """
+    Simulates n fights of an encounter, yielding running totals as chunks
+    finish.
+
+    Chunk i draws from ``rng.split("encounter", i)``; the final totals for
+    a given stream do not depend on the number of workers, only the order
+    in which partial totals arrive does.
+
+    :param Encounter encounter: Encounter to simulate
+    :param int n: Number of fights
+    :param RollStream rng: Stream to split per chunk, random if omitted
+    :param int workers: Worker processes, defaults to one per core; 1 runs
+        everything in the calling process
+    :param int chunk: Fights per chunk
+    :returns Iterator over one EncounterStats, updated with every chunk
+    :raises: ValueError
+    """
+    if n < 0:
+        raise ValueError("Number of encounters cannot be negative")
+    if chunk < 1:
+        raise ValueError("chunk must be at least 1")
+    rng = rng or RollStream()
+    sizes = _chunks(n, chunk)
+    streams = [rng.split("encounter", i) for i in range(len(sizes))]
+    totals = EncounterStats(encounter.max_rounds)
+    if workers == 1 or len(sizes) < 2:
+        for size, stream in zip(sizes, streams):
+            yield totals.merge(_run_chunk(encounter, size, stream))
+        return
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_run_chunk, encounter, size, stream)
+                   for size, stream in zip(sizes, streams)]
+        for future in as_completed(futures):
+            yield totals.merge(future.result())
+
+
+def simulate(
+        encounter: Encounter,
+        n: int,
+        rng: RollStream=None,
+        workers: int=None,
+        chunk: int=ENCOUNTER_CHUNK) -> EncounterStats:
+    """
+    Simulates n fights of an encounter and returns the aggregated outcome.
+
+    See simulate_iter() for the parameters.
+
+    :returns EncounterStats
+    """
+    totals = EncounterStats(encounter.max_rounds)
+    for totals in simulate_iter(encounter, n, rng, workers, chunk):
+        pass
+    return totals
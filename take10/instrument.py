@@ -0,0 +1,326 @@
+"""
+.. module:: instrument
+   :platform: Unix, Windows
+   :synopsis: Opt-in call counters and latency histograms for hot paths
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Instrumentation works by swapping the instrumented functions and property
+setters for timed wrappers in enable(), and putting the originals back in
+disable(). While it is disabled nothing is wrapped, so it costs nothing.
+
+Functions are swapped in every take10 module loaded at enable() that
+imported them by name (``from .dice import roll`` included), generators in
+their class and in SCORE_GENERATORS, and setters by replacing the class
+property. Each target records its calls, the calls that raised and a
+latency histogram::
+
+    instrument.enable()
+    ...
+    print(instrument.prometheus())
+
+Targets:
+
+* ``dice.roll``
+* ``generate_scores.<generator class name>`` for every registered generator
+* ``skills.get_skill_ability_class``
+* ``AbilityScores.<ability>`` setters, including their Qt signal dispatch
+  (enabling them imports PyQt5)
+* ``Item.name``, ``Item.quantity`` and ``Item.weight`` setters
+
+Updates are not locked, so counts from several threads at once may be
+slightly off; worker processes keep their own metrics.
+"""
+
+import sys
+from bisect import bisect_left
+from functools import wraps
+from time import perf_counter_ns
+
+from ._compat import optional_module
+
+#: Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (
+    1e-06, 2.5e-06, 5e-06, 1e-05, 2.5e-05, 5e-05, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+_BOUNDS_NS = tuple(round(b * 1e9) for b in BUCKETS)
+
+
+class Metric(object):
+    """Calls, errors and the latency histogram of one target"""
+
+    __slots__ = ("name", "calls", "errors", "nanoseconds", "buckets")
+
+    def __init__(self, name: str):
+        """
+        :param str name: Target name
+        """
+        self.name = name
+        #: Calls per bucket, the last one for calls slower than BUCKETS
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.clear()
+
+    def __repr__(self) -> str:
+        return "Metric({!r}, calls={})".format(self.name, self.calls)
+
+    def clear(self):
+        """Forgets every recorded call"""
+        self.calls = 0
+        self.errors = 0
+        self.nanoseconds = 0
+        self.buckets[:] = [0] * len(self.buckets)
+
+    def observe(self, nanoseconds: int):
+        """
+        Records the duration of one call.
+
+        :param int nanoseconds: Duration of the call
+        """
+        self.calls += 1
+        self.nanoseconds += nanoseconds
+        self.buckets[bisect_left(_BOUNDS_NS, nanoseconds)] += 1
+
+    def snapshot(self) -> dict:
+        """
+        Returns the metric as plain data.
+
+        :returns dict with calls, errors, seconds (total time) and buckets
+            ({upper bound in seconds: calls at most that slow}, cumulative
+            like Prometheus, "+Inf" for all calls)
+        """
+        buckets, total = {}, 0
+        for bound, count in zip(BUCKETS + ("+Inf",), self.buckets):
+            total += count
+            buckets[bound] = total
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "seconds": self.nanoseconds / 1e9,
+            "buckets": buckets,
+        }
+
+
+#: Metrics by target name, kept across enable() and disable()
+METRICS = {}
+
+#: (owner, attribute, original) of every swapped attribute
+_patches = []
+
+_MISSING = object()
+
+
+def _metric(name: str) -> Metric:
+    if name not in METRICS:
+        METRICS[name] = Metric(name)
+    return METRICS[name]
+
+
+def _timed(func, metric: Metric):
+    # Metric.observe() inlined, this runs on every instrumented call
+    clock = perf_counter_ns
+    buckets = metric.buckets
+
+    @wraps(func)
+    def timed(*args, **kwargs):
+        start = clock()
+        try:
+            return func(*args, **kwargs)
+        except BaseException:
+            metric.errors += 1
+            raise
+        finally:
+            elapsed = clock() - start
+            metric.calls += 1
+            metric.nanoseconds += elapsed
+            buckets[bisect_left(_BOUNDS_NS, elapsed)] += 1
+
+    return timed
+
+
+def _swap(owner, attribute: str, value):
+    # Dicts and namespaces are restored from their raw entry, so that e.g.
+    # a staticmethod goes back as a staticmethod
+    namespace = owner if isinstance(owner, dict) else vars(owner)
+    _patches.append((owner, attribute, namespace.get(attribute, _MISSING)))
+    if isinstance(owner, dict):
+        owner[attribute] = value
+    else:
+        setattr(owner, attribute, value)
+
+
+def _function(name: str, module: str, attribute: str):
+    """Wraps a function in every take10 module holding a reference to it"""
+    original = getattr(sys.modules[module], attribute)
+    timed = _timed(original, _metric(name))
+    for loaded in [m for n, m in list(sys.modules.items())
+                   if n == "take10" or n.startswith("take10.")]:
+        for alias, value in list(vars(loaded).items()):
+            if value is original:
+                _swap(loaded, alias, timed)
+
+
+def _setter(name: str, cls: type, attribute: str):
+    prop = cls.__dict__[attribute]
+    _swap(cls, attribute, prop.setter(_timed(prop.fset, _metric(name))))
+
+
+def _generators():
+    from .abilities import SCORE_GENERATOR_CLASSES, SCORE_GENERATORS
+    for cls_name, cls in SCORE_GENERATOR_CLASSES.items():
+        name = "generate_scores." + cls_name
+        if not _wanted(name):
+            continue
+        original = cls.generate_scores
+        timed = _timed(original, _metric(name))
+        _swap(cls, "generate_scores", staticmethod(timed))
+        if SCORE_GENERATORS.get(cls_name) is original:
+            _swap(SCORE_GENERATORS, cls_name, timed)
+
+
+def _dice():
+    from .dice import engine
+    _function("dice.roll", engine.__name__, "roll")
+
+
+def _skills():
+    from . import skills
+    _function("skills.get_skill_ability_class", skills.__name__,
+              "get_skill_ability_class")
+
+
+def _ability_scores():
+    if optional_module("PyQt5") is None:
+        return
+    from .abilities import AbilityClass
+    from .qtabilities import AbilityScores
+    for ability in AbilityClass:
+        name = "AbilityScores." + ability.name.lower()
+        if _wanted(name):
+            _setter(name, AbilityScores, ability.name.lower())
+
+
+def _items():
+    from .item import Item
+    for attribute in ("name", "quantity", "weight"):
+        if _wanted("Item." + attribute):
+            _setter("Item." + attribute, Item, attribute)
+
+
+#: (target name or prefix, installer) pairs, in installation order
+_TARGETS = (
+    ("dice.roll", _dice),
+    ("generate_scores", _generators),
+    ("skills.get_skill_ability_class", _skills),
+    ("AbilityScores", _ability_scores),
+    ("Item", _items),
+)
+
+_selected = ()
+
+
+def _matches(name: str, pattern: str) -> bool:
+    return name == pattern or name.startswith(pattern + ".") or \
+        pattern.startswith(name + ".")
+
+
+def _wanted(name: str) -> bool:
+    return any(_matches(name, p) for p in _selected)
+
+
+def enable(*targets: str):
+    """
+    Wraps the targets in timed wrappers, replacing any earlier enable().
+
+    :param str targets: Target names or prefixes, e.g. ``dice.roll`` or
+        ``AbilityScores``; all targets if none are given
+    :raises: ValueError for unknown targets
+    """
+    global _selected
+    for target in targets:
+        if not any(_matches(prefix, target) for prefix, _ in _TARGETS):
+            raise ValueError("Unknown instrumentation target: {}".format(
+                target))
+    disable()
+    _selected = targets or tuple(prefix for prefix, _ in _TARGETS)
+    for prefix, install in _TARGETS:
+        if _wanted(prefix):
+            install()
+
+
+def disable():
+    """Puts every original function and setter back"""
+    global _selected
+    while _patches:
+        owner, attribute, original = _patches.pop()
+        if isinstance(owner, dict):
+            owner[attribute] = original
+        elif original is _MISSING:
+            delattr(owner, attribute)
+        else:
+            setattr(owner, attribute, original)
+    _selected = ()
+
+
+def enabled() -> bool:
+    """Whether any target is instrumented"""
+    return bool(_patches)
+
+
+def reset():
+    """Forgets every recorded call"""
+    for metric in METRICS.values():
+        metric.clear()
+
+
+def snapshot() -> dict:
+    """
+    Returns all metrics as plain data.
+
+    :returns {target name: Metric.snapshot()}
+    """
+    return {name: metric.snapshot() for name, metric in sorted(
+        METRICS.items())}
+
+
+def _series(prefix: str, metric: Metric) -> list:
+    label = 'target="{}"'.format(metric.name)
+    data = metric.snapshot()
+    calls = ["{}_calls_total{{{}}} {}".format(prefix, label, metric.calls)]
+    errors = ["{}_errors_total{{{}}} {}".format(prefix, label, metric.errors)]
+    histogram = [
+        '{}_call_duration_seconds_bucket{{{},le="{}"}} {}'.format(
+            prefix, label, b if b == "+Inf" else repr(b), count)
+        for b, count in data["buckets"].items()
+    ] + [
+        "{}_call_duration_seconds_sum{{{}}} {}".format(
+            prefix, label, repr(data["seconds"])),
+        "{}_call_duration_seconds_count{{{}}} {}".format(
+            prefix, label, metric.calls),
+    ]
+    return [calls, errors, histogram]
+
+
+def prometheus(prefix: str="take10") -> str:
+    """
+    Returns all metrics in the Prometheus text exposition format.
+
+    :param str prefix: Prefix of the metric names
+    :returns str
+    """
+    families = (
+        ("calls_total", "counter", "Calls of instrumented take10 targets"),
+        ("errors_total", "counter",
+         "Calls of instrumented take10 targets that raised"),
+        ("call_duration_seconds", "histogram",
+         "Latency of instrumented take10 targets in seconds"),
+    )
+    series = [_series(prefix, m) for _, m in sorted(METRICS.items())]
+    lines = []
+    for index, (name, kind, description) in enumerate(families):
+        lines.append("# HELP {}_{} {}".format(prefix, name, description))
+        lines.append("# TYPE {}_{} {}".format(prefix, name, kind))
+        for metric in series:
+            lines.extend(metric[index])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,297 @@
+"""
+.. module:: inventory
+   :platform: Unix, Windows
+   :synopsis: Item containers with running totals and lookup indexes
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+from math import fsum
+from typing import Iterable, Union
+
+from .item import Item
+
+
+class Inventory(object):
+    """
+    A container of items, e.g. a character's belongings or a backpack.
+
+    The weight and quantity of the items held directly are kept as running
+    totals, updated whenever an item's quantity or weight is set. Items are
+    indexed by name and tag.
+
+    Inventories can be nested. The total weight of an inventory (its own
+    weight, its items and its nested containers) is cached; a change inside
+    a nested container only invalidates the caches on the path up to the
+    root. Listeners added with add_listener() are called whenever a
+    container's cached total is dropped.
+    """
+
+    def __init__(
+            self,
+            name: str=None,
+            weight: float=0.0,
+            weightless_contents: bool=False,
+            tags: Iterable[str]=None):
+        """
+        :param str name: Container name (optional)
+        :param float weight: Weight of the empty container
+        :param bool weightless_contents: Contents add nothing to the weight
+            of the containers above, like a bag of holding
+        :param tags: Tags used to look the container up (optional)
+        :raises: ValueError
+        """
+        if weight < 0:
+            raise ValueError("Weight cannot be less than 0")
+        self._name = name  #: Name of the container
+        self._weight = weight  #: Weight of the empty container
+        self._weightless_contents = weightless_contents
+        self._tags = frozenset(tags or ())  #: Tags of the container
+        self._items = {}
+        self._containers = {}
+        self._by_name = {}
+        self._by_tag = {}
+        self._item_weight = 0.0
+        self._item_quantity = 0.0
+        self._total_weight = None
+        self._parent = None
+        self._listeners = []
+
+    def __len__(self) -> int:
+        return len(self._items) + len(self._containers)
+
+    def __iter__(self):
+        """Iterates over the items held directly in this container"""
+        return iter(self._items.values())
+
+    def __contains__(self, thing: Union[Item, "Inventory"]) -> bool:
+        return id(thing) in self._items or id(thing) in self._containers
+
+    @property
+    def name(self) -> str:
+        """Returns the name of the container"""
+        return self._name
+
+    @name.setter
+    def name(self, name: str):
+        """Sets the new name"""
+        if self._parent is not None:
+            self._parent._item_renamed(self, name)
+        self._name = name
+
+    @property
+    def weight(self) -> float:
+        """Returns the weight of the empty container"""
+        return self._weight
+
+    @weight.setter
+    def weight(self, w: float):
+        """Sets the new weight of the empty container"""
+        if w < 0:
+            raise ValueError("Weight cannot be less than 0")
+        self._weight = w
+        if self._total_weight is not None:
+            self._total_weight = None
+            self._notify()
+        if self._parent is not None:
+            self._parent._invalidate()
+
+    @property
+    def weightless_contents(self) -> bool:
+        """Returns whether the contents add nothing to the containers above"""
+        return self._weightless_contents
+
+    @property
+    def tags(self) -> frozenset:
+        """Returns the tags of the container"""
+        return self._tags
+
+    @property
+    def parent(self) -> "Inventory":
+        """Returns the container holding this one, or None"""
+        return self._parent
+
+    @property
+    def containers(self):
+        """Returns the containers nested directly in this one"""
+        return tuple(self._containers.values())
+
+    @property
+    def item_weight(self) -> float:
+        """Returns the total weight of the items held directly"""
+        return self._item_weight
+
+    @property
+    def item_quantity(self) -> float:
+        """Returns the total quantity of the items held directly"""
+        return self._item_quantity
+
+    def total_weight(self) -> float:
+        """
+        Returns the weight of the container, its items and every nested
+        container that does not have weightless contents.
+        """
+        if self._total_weight is None:
+            self._total_weight = self._weight + self._item_weight + fsum(
+                c.carried_weight() for c in self._containers.values())
+        return self._total_weight
+
+    def carried_weight(self) -> float:
+        """Returns the weight this container adds to the one holding it"""
+        if self._weightless_contents:
+            return self._weight
+        return self.total_weight()
+
+    def add(self, thing: Union[Item, "Inventory"]):
+        """
+        Adds an item or a nested container.
+
+        :param thing: Item or Inventory to add
+        :raises: ValueError if it already belongs to a container, or adding
+            it would put a container inside itself
+        """
+        if isinstance(thing, Inventory):
+            self._add_container(thing)
+            return
+        if thing._container is not None:
+            raise ValueError("{} is already in a container".format(
+                thing.name))
+        thing._container = self
+        self._items[id(thing)] = thing
+        self._index(thing, thing.name)
+        self._item_changed(thing.total_weight(), thing.quantity)
+
+    def remove(self, thing: Union[Item, "Inventory"]):
+        """
+        Removes an item or a nested container.
+
+        :param thing: Item or Inventory to remove
+        :raises: KeyError if it is not held directly by this container
+        """
+        if isinstance(thing, Inventory):
+            del self._containers[id(thing)]
+            thing._parent = None
+            self._unindex(thing, thing.name)
+            self._invalidate()
+            return
+        del self._items[id(thing)]
+        thing._container = None
+        self._unindex(thing, thing.name)
+        self._item_changed(-thing.total_weight(), -thing.quantity)
+
+    def find(self, name: str, recursive: bool=False) -> list:
+        """
+        Returns the items and containers with the given name.
+
+        :param str name: Name to look up
+        :param bool recursive: Also search nested containers
+        """
+        found = list(self._by_name.get(name, {}).values())
+        if recursive:
+            for container in self._containers.values():
+                found.extend(container.find(name, True))
+        return found
+
+    def tagged(self, tag: str, recursive: bool=False) -> list:
+        """
+        Returns the items and containers with the given tag.
+
+        :param str tag: Tag to look up
+        :param bool recursive: Also search nested containers
+        """
+        found = list(self._by_tag.get(tag, {}).values())
+        if recursive:
+            for container in self._containers.values():
+                found.extend(container.tagged(tag, True))
+        return found
+
+    def recalculate(self):
+        """
+        Recomputes the running totals from scratch, discarding any floating
+        point drift accumulated by incremental updates.
+        """
+        self._item_weight = fsum(i.total_weight() for i in self)
+        self._item_quantity = fsum(i.quantity for i in self)
+        for container in self._containers.values():
+            container.recalculate()
+        self._invalidate()
+
+    def add_listener(self, callback):
+        """
+        Registers a callable run, without arguments, when the total weight
+        of this container changes.
+
+        Listeners fire when the cached total is dropped, so a burst of
+        changes before total_weight() is next read fires them only once.
+
+        :param callback: Callable taking no arguments
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """
+        Unregisters a callable added with add_listener().
+
+        :raises: ValueError if it was not registered
+        """
+        self._listeners.remove(callback)
+
+    def _notify(self):
+        for callback in self._listeners:
+            callback()
+
+    def _add_container(self, container: "Inventory"):
+        if container._parent is not None:
+            raise ValueError("{} is already in a container".format(
+                container.name))
+        ancestor = self
+        while ancestor is not None:
+            if ancestor is container:
+                raise ValueError("Cannot put a container inside itself")
+            ancestor = ancestor._parent
+        container._parent = self
+        self._containers[id(container)] = container
+        self._index(container, container.name)
+        self._invalidate()
+
+    def _index(self, thing, name: str):
+        self._by_name.setdefault(name, {})[id(thing)] = thing
+        for tag in thing.tags:
+            self._by_tag.setdefault(tag, {})[id(thing)] = thing
+
+    def _unindex(self, thing, name: str):
+        for index, key in [(self._by_name, name)] + \
+                [(self._by_tag, tag) for tag in thing.tags]:
+            entries = index[key]
+            del entries[id(thing)]
+            if not entries:
+                del index[key]
+
+    def _item_renamed(self, thing: Union[Item, "Inventory"], name: str):
+        self._unindex(thing, thing.name)
+        self._index(thing, name)
+
+    def _item_changed(self, weight: float, quantity: float):
+        """Applies the change in weight/quantity of one held item"""
+        self._item_weight += weight
+        self._item_quantity += quantity
+        if weight:
+            self._invalidate()
+
+    def _invalidate(self):
+        """
+        Drops the cached total weight up the path to the root.
+
+        A container whose cache is already empty has no cached ancestors
+        depending on it, so the walk stops there, as it does at containers
+        with weightless contents.
+        """
+        container = self
+        while container is not None and \
+                container._total_weight is not None:
+            container._total_weight = None
+            container._notify()
+            if container._weightless_contents:
+                break
+            container = container._parent
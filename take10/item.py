@@ -7,6 +7,10 @@
 
 """
 
+import sys
+from typing import Iterable
+from weakref import WeakValueDictionary
+
 
 class Item(object):
 
@@ -15,15 +19,17 @@ class Item(object):
             name: str,
             weight: float,
             quantity: float=1.0,
-            desc: str=None):
+            desc: str=None,
+            tags: Iterable[str]=None):
         """
         :param str name: Item name
         :param float weight: Item weight per 1 quantity
         :param float quantity: 'Amount' of item, defaults to 1
         :param str desc: Description of item (optional)
+        :param tags: Tags used to look the item up in an Inventory (optional)
         :raises: ValueError
         """
-        self.name = name  #: Name of the item
+        self._name = name  #: Name of the item
         if weight < 0:
             raise ValueError("Weight cannot be less than 0")
         self._weight = weight  #: How much 1 quantity of the item weights,in kg
@@ -31,6 +37,30 @@ class Item(object):
             raise ValueError("Quantity cannot be less than zero")
         self._quantity = quantity  #: How many of the item there is (default 1)
         self.desc = desc  #: Description of the item
+        self._tags = frozenset(tags or ())  #: Tags of the item
+        self._container = None  #: Inventory holding the item, if any
+
+    @property
+    def name(self) -> str:
+        """Returns the name of the item"""
+        return self._name
+
+    @name.setter
+    def name(self, name: str):
+        """Sets the new name"""
+        if self._container is not None:
+            self._container._item_renamed(self, name)
+        self._name = name
+
+    @property
+    def tags(self) -> frozenset:
+        """Returns the tags of the item"""
+        return self._tags
+
+    @property
+    def container(self):
+        """Returns the Inventory holding the item, or None"""
+        return self._container
 
     @property
     def quantity(self) -> float:
@@ -42,6 +72,9 @@ class Item(object):
         """Sets the new quantity"""
         if q < 0:
             raise ValueError("Quantity cannot be less than zero")
+        if self._container is not None:
+            self._container._item_changed(
+                self._weight * (q - self._quantity), q - self._quantity)
         self._quantity = q
 
     @property
@@ -54,8 +87,136 @@ class Item(object):
         """Sets the new weight"""
         if w < 0:
             raise ValueError("Weight cannot be less than 0")
+        if self._container is not None:
+            self._container._item_changed(
+                (w - self._weight) * self._quantity, 0)
         self._weight = w
 
     def total_weight(self) -> float:
         """Returns the total weight of the item"""
         return self._quantity * self._weight
+
+
+class ItemType(object):
+    """
+    An immutable, interned item prototype: the name, description and unit
+    weight shared by every stack of the same kind of item.
+
+    Constructing an ItemType with the same values as a live one returns that
+    same instance, so each description is stored once per process.
+    """
+
+    __slots__ = ("name", "desc", "weight", "__weakref__")
+
+    _interned = WeakValueDictionary()
+
+    def __new__(cls, name: str, weight: float, desc: str=None):
+        """
+        :param str name: Item name
+        :param float weight: Item weight per 1 quantity
+        :param str desc: Description of item (optional)
+        :raises: ValueError
+        """
+        key = (name, weight, desc)
+        item_type = cls._interned.get(key)
+        if item_type is not None:
+            return item_type
+        if weight < 0:
+            raise ValueError("Weight cannot be less than 0")
+        item_type = object.__new__(cls)
+        object.__setattr__(item_type, "name", sys.intern(name))
+        object.__setattr__(item_type, "weight", weight)
+        object.__setattr__(item_type, "desc", desc)
+        cls._interned[key] = item_type
+        return item_type
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ItemType is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("ItemType is immutable")
+
+    def __reduce__(self):
+        return ItemType, (self.name, self.weight, self.desc)
+
+    def __repr__(self) -> str:
+        return "ItemType({!r}, {!r})".format(self.name, self.weight)
+
+
+class ItemStack(object):
+    """
+    A quantity of one ItemType; the compact counterpart of Item for servers
+    holding very many stacks.
+    """
+
+    __slots__ = ("type", "_quantity")
+
+    def __init__(self, item_type: ItemType, quantity: float=1.0):
+        """
+        :param ItemType item_type: Prototype of the stacked item
+        :param float quantity: 'Amount' of item, defaults to 1
+        :raises: ValueError
+        """
+        if quantity < 0:
+            raise ValueError("Quantity cannot be less than zero")
+        self.type = item_type  #: ItemType of the stack
+        self._quantity = quantity  #: How many of the item there is
+
+    @classmethod
+    def from_item(cls, item: Item) -> "ItemStack":
+        """Returns a stack sharing the interned prototype of an Item"""
+        return cls(ItemType(item.name, item.weight, item.desc), item.quantity)
+
+    def __repr__(self) -> str:
+        return "ItemStack({!r}, {!r})".format(self.type, self._quantity)
+
+    @property
+    def name(self) -> str:
+        """Returns the name of the item"""
+        return self.type.name
+
+    @property
+    def desc(self) -> str:
+        """Returns the description of the item"""
+        return self.type.desc
+
+    @property
+    def weight(self) -> float:
+        """Returns the weight of one unit/quantity of the item"""
+        return self.type.weight
+
+    @property
+    def quantity(self) -> float:
+        """Returns the quantity of the item"""
+        return self._quantity
+
+    @quantity.setter
+    def quantity(self, q: float):
+        """Sets the new quantity"""
+        if q < 0:
+            raise ValueError("Quantity cannot be less than zero")
+        self._quantity = q
+
+    def total_weight(self) -> float:
+        """Returns the total weight of the stack"""
+        return self._quantity * self.type.weight
+
+
+def load_item_stacks(records: Iterable) -> list:
+    """
+    Builds ItemStacks from (name, weight, quantity, desc) records, sharing
+    one ItemType between all records describing the same item.
+
+    :param records: Iterable of (name, weight, quantity, desc) tuples
+    :returns list of ItemStack
+    :raises: ValueError
+    """
+    types = {}
+    stacks = []
+    for name, weight, quantity, desc in records:
+        key = (name, weight, desc)
+        item_type = types.get(key)
+        if item_type is None:
+            item_type = types[key] = ItemType(name, weight, desc)
+        stacks.append(ItemStack(item_type, quantity))
+    return stacks
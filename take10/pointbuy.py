@@ -0,0 +1,198 @@
+"""
+.. module:: pointbuy
+   :platform: Unix, Windows
+   :synopsis: Point-buy ability score allocation
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Every ability starts at 10 and is raised (or lowered) for the cost in
+POINT_BUY_COSTS. The allocations of a budget are counted with a memoized
+dynamic program over (ability, points left); enumeration only descends
+into branches with a nonzero count, so listing the allocations that meet
+some minimums costs time in proportion to how many there are, not to the
+12 ** 6 possible arrays.
+"""
+
+from functools import lru_cache
+from random import randint
+
+#: Pathfinder point-buy cost of each score
+POINT_BUY_COSTS = {
+    7: -4, 8: -2, 9: -1, 10: 0, 11: 1, 12: 2,
+    13: 3, 14: 5, 15: 7, 16: 10, 17: 13, 18: 17,
+}
+
+#: Pathfinder point-buy budgets by campaign type
+POINT_BUY_BUDGETS = {
+    "low fantasy": 10,
+    "standard fantasy": 15,
+    "high fantasy": 20,
+    "epic fantasy": 25,
+}
+
+#: Abilities allocated, in AbilityClass order
+ABILITIES = 6
+
+
+@lru_cache(maxsize=64)
+def _counter(options: tuple, exact: bool):
+    """
+    Returns ways(index, points): the allocations of abilities index..
+    within (or exactly at) points, memoized per options table so lookups
+    hash two ints rather than the table.
+    """
+    memo = {}
+    last = len(options)
+
+    def ways(index: int, points: int) -> int:
+        key = index, points
+        if key not in memo:
+            if index == last:
+                memo[key] = int(points == 0 if exact else points >= 0)
+            else:
+                memo[key] = sum(ways(index + 1, points - cost)
+                                for _, cost in options[index])
+        return memo[key]
+
+    return ways
+
+
+class PointBuy(object):
+    """
+    The legal point-buy allocations of a budget.
+
+    Minimums and maximums are keyed by AbilityClass, e.g. all arrays with
+    Intelligence 17 or more under 20 points::
+
+        PointBuy(20).allocations(minimums={AbilityClass.INTELLIGENCE: 17})
+    """
+
+    __slots__ = ("budget", "costs", "exact", "_choices")
+
+    def __init__(self, budget: int=15, costs: dict=None, exact: bool=False):
+        """
+        :param int budget: Points to spend
+        :param dict costs: Cost by score, defaults to POINT_BUY_COSTS
+        :param bool exact: Only allow allocations spending the whole budget
+        :raises: ValueError
+        """
+        if budget < 0:
+            raise ValueError("Point-buy budget cannot be negative")
+        self.budget = budget
+        self.costs = dict(costs if costs is not None else POINT_BUY_COSTS)
+        if not self.costs or min(self.costs) < 0:
+            raise ValueError("Point-buy costs need non-negative scores")
+        self.exact = exact
+        self._choices = tuple(sorted(self.costs.items()))
+
+    def __repr__(self) -> str:
+        return "PointBuy({}{})".format(
+            self.budget, ", exact=True" if self.exact else "")
+
+    def _options(self, minimums: dict, maximums: dict) -> tuple:
+        """(score, cost) choices of each ability, within the bounds"""
+        options = [self._choices] * ABILITIES
+        for bounds, keep in ((minimums, lambda s, b: s >= b),
+                             (maximums, lambda s, b: s <= b)):
+            for ability, bound in (bounds or {}).items():
+                options[ability.value] = tuple(
+                    (s, c) for s, c in options[ability.value]
+                    if keep(s, bound))
+        return tuple(options)
+
+    def cost(self, scores) -> int:
+        """
+        Returns the points an array costs.
+
+        :param scores: Six scores in AbilityClass order, or AbilityScores
+        :raises: ValueError if a score cannot be bought
+        """
+        if hasattr(scores, "as_tuple"):
+            scores = scores.as_tuple()
+        try:
+            return sum(self.costs[score] for score in scores)
+        except KeyError as e:
+            raise ValueError("A score of {} cannot be bought".format(
+                e.args[0])) from None
+
+    def count(self, minimums: dict=None, maximums: dict=None) -> int:
+        """
+        Returns the number of legal allocations.
+
+        :param dict minimums: Lowest score per AbilityClass
+        :param dict maximums: Highest score per AbilityClass
+        """
+        return _counter(self._options(minimums, maximums), self.exact)(
+            0, self.budget)
+
+    def allocations(self, minimums: dict=None, maximums: dict=None):
+        """
+        Yields every legal allocation in ascending order.
+
+        :param dict minimums: Lowest score per AbilityClass
+        :param dict maximums: Highest score per AbilityClass
+        :returns Iterator of six-score tuples in AbilityClass order
+        """
+        options = self._options(minimums, maximums)
+        exact = self.exact
+        ways = _counter(options, exact)
+
+        def walk(index: int, points: int, prefix: tuple):
+            if index == len(options) - 1:
+                for score, cost in options[index]:
+                    if cost == points or (not exact and cost <= points):
+                        yield prefix + (score,)
+                return
+            for score, cost in options[index]:
+                if ways(index + 1, points - cost):
+                    yield from walk(index + 1, points - cost,
+                                    prefix + (score,))
+
+        if ways(0, self.budget):
+            yield from walk(0, self.budget, ())
+
+    def allocation(self, rank: int, minimums: dict=None,
+                   maximums: dict=None) -> tuple:
+        """
+        Returns the allocation at a position of allocations() without
+        enumerating the ones before it.
+
+        :param int rank: Position, 0 to count() - 1
+        :param dict minimums: Lowest score per AbilityClass
+        :param dict maximums: Highest score per AbilityClass
+        :raises: IndexError
+        """
+        return self._allocation(self._options(minimums, maximums), rank)
+
+    def _allocation(self, options: tuple, rank: int) -> tuple:
+        ways = _counter(options, self.exact)
+        points = self.budget
+        if not 0 <= rank < ways(0, points):
+            raise IndexError("Allocation rank out of range")
+        scores = ()
+        for index, choices in enumerate(options):
+            for score, cost in choices:
+                count = ways(index + 1, points - cost)
+                if rank < count:
+                    scores += (score,)
+                    points -= cost
+                    break
+                rank -= count
+        return scores
+
+    def random(self, rng=None, minimums: dict=None,
+               maximums: dict=None) -> tuple:
+        """
+        Returns a uniformly random legal allocation.
+
+        :param rng: RollStream to draw from, defaults to the random module
+        :param dict minimums: Lowest score per AbilityClass
+        :param dict maximums: Highest score per AbilityClass
+        :raises: ValueError if there is no legal allocation
+        """
+        options = self._options(minimums, maximums)
+        count = _counter(options, self.exact)(0, self.budget)
+        if not count:
+            raise ValueError("No legal allocation for {!r}".format(self))
+        draw = rng.randint if rng is not None else randint
+        return self._allocation(options, draw(0, count - 1))
@@ -0,0 +1,146 @@
+"""
+.. module:: qtabilities
+   :platform: Unix, Windows
+   :synopsis: Qt adapter for ability scores
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+from PyQt5.QtCore import QObject, Q_ENUMS, pyqtProperty, pyqtSignal
+
+from .abilities import AbilityClass, ScoreBlock
+
+
+class AbilityScores(QObject):
+    """
+    AbilityScores are the core statistics for a character.
+
+    This is a Qt wrapper around a :class:`~take10.abilities.ScoreBlock`: the
+    scores themselves live in the block, and every change made through the
+    wrapper is forwarded to it and announced through the ``*_changed``
+    signals.
+    """
+
+    AbilityClass = AbilityClass
+    Q_ENUMS(AbilityClass)
+
+    def __init__(
+        self,
+        STRENGTH: int,
+        DEXTERITY: int,
+        INTELLIGENCE: int,
+        WISDOM: int,
+        CHARISMA: int,
+        CONSTITUTION: int
+    ):
+        QObject.__init__(self)
+
+        self._core = ScoreBlock(
+            STRENGTH,
+            DEXTERITY,
+            INTELLIGENCE,
+            WISDOM,
+            CHARISMA,
+            CONSTITUTION
+        )
+
+    @classmethod
+    def from_block(cls, block: ScoreBlock) -> "AbilityScores":
+        """
+        Wraps an existing ScoreBlock without copying it.
+
+        :param ScoreBlock block: Scores to wrap
+        :returns AbilityScores
+        """
+        scores = cls.__new__(cls)
+        QObject.__init__(scores)
+        scores._core = block
+        return scores
+
+    @property
+    def core(self) -> ScoreBlock:
+        """The ScoreBlock holding these scores"""
+        return self._core
+
+    # Qt Signals for monitoring property changes
+    strength_changed = pyqtSignal(int)
+    dexterity_changed = pyqtSignal(int)
+    intelligence_changed = pyqtSignal(int)
+    wisdom_changed = pyqtSignal(int)
+    charisma_changed = pyqtSignal(int)
+    constitution_changed = pyqtSignal(int)
+
+    # Properties for gated acess to stat fields
+
+    @pyqtProperty(int, notify=strength_changed)
+    def strength(self):
+        return self._core.strength
+
+    @strength.setter
+    def strength(self, score: int):
+        if score != self._core.strength:
+            self._core.strength = score
+            self.strength_changed.emit(score)
+
+    @pyqtProperty(int, notify=dexterity_changed)
+    def dexterity(self):
+        return self._core.dexterity
+
+    @dexterity.setter
+    def dexterity(self, score: int):
+        if score != self._core.dexterity:
+            self._core.dexterity = score
+            self.dexterity_changed.emit(score)
+
+    @pyqtProperty(int, notify=intelligence_changed)
+    def intelligence(self):
+        return self._core.intelligence
+
+    @intelligence.setter
+    def intelligence(self, score: int):
+        if score != self._core.intelligence:
+            self._core.intelligence = score
+            self.intelligence_changed.emit(score)
+
+    @pyqtProperty(int, notify=wisdom_changed)
+    def wisdom(self):
+        return self._core.wisdom
+
+    @wisdom.setter
+    def wisdom(self, score: int):
+        if score != self._core.wisdom:
+            self._core.wisdom = score
+            self.wisdom_changed.emit(score)
+
+    @pyqtProperty(int, notify=charisma_changed)
+    def charisma(self):
+        return self._core.charisma
+
+    @charisma.setter
+    def charisma(self, score: int):
+        if score != self._core.charisma:
+            self._core.charisma = score
+            self.charisma_changed.emit(score)
+
+    @pyqtProperty(int, notify=constitution_changed)
+    def constitution(self):
+        return self._core.constitution
+
+    @constitution.setter
+    def constitution(self, score: int):
+        if score != self._core.constitution:
+            self._core.constitution = score
+            self.constitution_changed.emit(score)
+
+    @classmethod
+    def get_ability_class_names(cls):
+        return cls.AbilityClass.__members__.keys()
+
+    def as_tuple(self) -> tuple:
+        """Returns the ability scores as a tuple in AbilityClass order"""
+        return self._core.as_tuple()
+
+    def scores_as_dict(self) -> dict:
+        """Returns the ability scores as a dict"""
+        return self._core.scores_as_dict()
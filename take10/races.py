@@ -10,9 +10,11 @@
 from abc import ABC,  abstractmethod
 from typing import Iterable
 
-from .abilities import AbilityScores
 from .skills import SkillSet
 
+#: Race subclasses with a race_id, by race_id
+RACES = {}
+
 
 class Race(ABC):
     """
@@ -25,11 +27,24 @@ class Race(ABC):
     whatever reason) as if they were of a separate race, with few exceptions.
 
     Subclasses are expected to implement these hooks when instantiating a
-    particular race.
+    particular race, and to set a unique race_id so the race can be stored
+    in serialized character sheets.
     """
 
+    #: Unique id of the race in serialized data, 0 if it has none
+    race_id = 0
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.race_id:
+            registered = RACES.get(cls.race_id)
+            if registered is not None and registered is not cls:
+                raise ValueError("race_id {} is already used by {}".format(
+                    cls.race_id, registered.__name__))
+            RACES[cls.race_id] = cls
+
     @abstractmethod
-    def get_starting_ability_bonus(self) -> Iterable(AbilityScores):
+    def get_starting_ability_bonus(self) -> Iterable["AbilityScores"]:
         """
         Gets the possible AbilityScore bonuses for a given race.
 
@@ -46,7 +61,7 @@ class Race(ABC):
         ...
 
     @abstractmethod
-    def get_starting_skill_bonus(self) -> Iterable(SkillSet):
+    def get_starting_skill_bonus(self) -> Iterable[SkillSet]:
         """
         Gets the possible SkillSet bonuses for a given race.
 
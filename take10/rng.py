@@ -0,0 +1,265 @@
+"""
+.. module:: rng
+   :platform: Unix, Windows
+   :synopsis: Deterministic, splittable random streams
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+A :class:`RollStream` is counter-based, in the spirit of Philox: block
+``i`` of a stream is the keyed BLAKE2b hash of ``i``, so any block can be
+produced from the key and counter alone. There is no shared mutable state
+to lock, a stream can be split into independent child streams for peers,
+worker processes or threads, and anyone holding the seed can replay a roll
+from its counter.
+
+Values are identical with and without numpy, and on any byte order: each
+draw starts on a fresh block, reads it as little-endian words and rejects
+words that would bias the result.
+"""
+
+import os
+from array import array
+from hashlib import blake2b
+from sys import byteorder
+
+from ._compat import numpy
+
+#: Bytes produced per counter value
+BLOCK_SIZE = 64
+
+_WORDS = ((1, "B", "<u1"), (2, "H", "<u2"), (4, "I", "<u4"), (8, "Q", "<u8"))
+
+
+def _seed_bytes(seed) -> bytes:
+    if seed is None:
+        return os.urandom(32)
+    if isinstance(seed, bytes):
+        return seed
+    if isinstance(seed, str):
+        return seed.encode("utf-8")
+    if isinstance(seed, int):
+        return seed.to_bytes((seed.bit_length() + 8) // 8, "little",
+                             signed=True)
+    raise TypeError("Cannot seed a RollStream with {!r}".format(seed))
+
+
+def _label_bytes(label) -> bytes:
+    if isinstance(label, int):
+        tag = b"i"
+    elif isinstance(label, str):
+        tag = b"s"
+    elif isinstance(label, bytes):
+        tag = b"b"
+    else:
+        raise TypeError("Stream labels must be int, str or bytes")
+    data = _seed_bytes(label)
+    return tag + len(data).to_bytes(4, "little") + data
+
+
+def _word(span: int) -> (int, str, str):
+    """Returns the width, array typecode and numpy dtype for a span"""
+    for word in _WORDS:
+        if span <= 256 ** word[0]:
+            return word
+    raise ValueError("Range is too large: {}".format(span))
+
+
+class RollStream(object):
+    """
+    A reproducible stream of random integers.
+
+    Streams are cheap to create and copy, pickle to their key and counter,
+    and can stand in for a numpy Generator wherever only ``integers()`` is
+    used, e.g. :meth:`AbilityScoreGenerator.generate_array`.
+    """
+
+    __slots__ = ("key", "counter", "_hasher")
+
+    def __init__(self, seed=None, counter: int=0):
+        """
+        :param seed: int, str or bytes seed; a random seed if omitted
+        :param int counter: Block to start drawing from
+        """
+        self.key = blake2b(_seed_bytes(seed), digest_size=32,
+                           person=b"take10 seed").digest()
+        self.counter = counter
+        self._hasher = None
+
+    @classmethod
+    def from_key(cls, key: bytes, counter: int=0) -> "RollStream":
+        """
+        Rebuilds a stream from its raw key, e.g. one shared by a peer.
+
+        :param bytes key: 32 byte stream key
+        :param int counter: Block to start drawing from
+        :returns RollStream
+        """
+        if len(key) != 32:
+            raise ValueError("RollStream keys are 32 bytes")
+        stream = cls.__new__(cls)
+        stream.key = bytes(key)
+        stream.counter = counter
+        stream._hasher = None
+        return stream
+
+    def __getstate__(self):
+        return self.key, self.counter
+
+    def __setstate__(self, state):
+        self.key, self.counter = state
+        self._hasher = None
+
+    def __repr__(self) -> str:
+        return "RollStream(key={}, counter={})".format(
+            self.key.hex()[:16], self.counter)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RollStream):
+            return NotImplemented
+        return self.key == other.key and self.counter == other.counter
+
+    __hash__ = None
+
+    def copy(self) -> "RollStream":
+        """Returns an independent copy at the same position"""
+        return RollStream.from_key(self.key, self.counter)
+
+    def at(self, counter: int) -> "RollStream":
+        """
+        Returns a copy of the stream positioned at a given counter.
+
+        :param int counter: Block to start drawing from
+        :returns RollStream
+        """
+        return RollStream.from_key(self.key, counter)
+
+    def split(self, *labels) -> "RollStream":
+        """
+        Derives an independent child stream, e.g. ``split("peer", 3)``.
+
+        The child depends only on this stream's key and the labels, not on
+        how much has been drawn, so every party derives the same child.
+
+        :param labels: int, str or bytes labels naming the child
+        :returns RollStream
+        """
+        key = blake2b(b"".join(map(_label_bytes, labels)), key=self.key,
+                      digest_size=32, person=b"take10 split").digest()
+        return RollStream.from_key(key)
+
+    def block(self, counter: int) -> bytes:
+        """
+        Returns the raw bytes of one block without moving the stream.
+
+        :param int counter: Block number
+        :returns BLOCK_SIZE bytes
+        """
+        if self._hasher is None:
+            self._hasher = blake2b(key=self.key, digest_size=BLOCK_SIZE,
+                                   person=b"take10 block")
+        hasher = self._hasher.copy()
+        hasher.update(counter.to_bytes(16, "little"))
+        return hasher.digest()
+
+    def draw(self, count: int, span: int):
+        """
+        Draws count uniform integers in [0, span).
+
+        :param int count: Number of values
+        :param int span: Number of possible values
+        :returns ndarray, or array.array without numpy
+        :raises: ValueError
+        """
+        if span < 1:
+            raise ValueError("Cannot draw from an empty range")
+        if count < 0:
+            raise ValueError("count cannot be negative")
+        if numpy is not None:
+            return self._draw_numpy(count, span)
+        return self._draw_array(count, span)
+
+    def _draw_array(self, count: int, span: int) -> array:
+        width, typecode, _ = _word(span)
+        limit = 256 ** width // span * span
+        out = array(typecode)
+        counter = self.counter
+        while len(out) < count:
+            words = array(typecode, self.block(counter))
+            counter += 1
+            if byteorder != "little":
+                words.byteswap()
+            for v in words:
+                if v < limit:
+                    out.append(v % span)
+                    if len(out) == count:
+                        break
+        self.counter = counter
+        return out
+
+    def _draw_numpy(self, count: int, span: int):
+        width, typecode, dtype = _word(span)
+        per_block = BLOCK_SIZE // width
+        if count <= per_block // 2:
+            # A block or two: cheaper to read word by word than to vectorize
+            return numpy.array(self._draw_array(count, span), dtype=typecode)
+        limit = 256 ** width // span * span
+        blocks = -(-count * 256 ** width // (limit * per_block)) + 1 \
+            if count else 0
+        words = numpy.empty(0, dtype=dtype)
+        accepted = numpy.empty(0, dtype=numpy.intp)
+        start = self.counter
+        while len(accepted) < count:
+            end = start + blocks
+            fresh = numpy.frombuffer(b"".join(
+                self.block(c) for c in range(start, end)), dtype=dtype)
+            accepted = numpy.concatenate((
+                accepted, len(words) + numpy.flatnonzero(fresh < limit)))
+            words = numpy.concatenate((words, fresh))
+            start = end
+            blocks = max(1, blocks // 4)
+        if count:
+            self.counter += int(accepted[count - 1]) // per_block + 1
+        return words[accepted[:count]] % span
+
+    def randint(self, low: int, high: int) -> int:
+        """
+        Returns a uniform integer in [low, high], like random.randint.
+
+        :raises: ValueError
+        """
+        if high < low:
+            raise ValueError("Cannot draw from an empty range")
+        return low + self._draw_array(1, high - low + 1)[0]
+
+    def integers(self, low: int, high: int=None, size=None, dtype=None,
+                 endpoint: bool=False):
+        """
+        Draws integers in [low, high), mirroring numpy Generator.integers.
+
+        :param int low: Lowest value (or the exclusive high if high is None)
+        :param int high: Upper bound, exclusive unless endpoint is set
+        :param size: Output shape (int or tuple), None for a single int
+        :param dtype: numpy dtype of the result
+        :param bool endpoint: Include high in the range
+        :returns int, ndarray filled in C order, or a flat array.array of the
+            same values without numpy
+        :raises: ValueError
+        """
+        if high is None:
+            low, high = 0, low
+        span = high - low + (1 if endpoint else 0)
+        if size is None:
+            return self.randint(low, low + span - 1)
+        shape = (size,) if isinstance(size, int) else tuple(size)
+        count = 1
+        for dimension in shape:
+            count *= dimension
+        values = self.draw(count, span)
+        if numpy is not None:
+            values = values.astype(dtype or numpy.int64)
+            if low:
+                values += low
+            return values.reshape(shape)
+        if low:
+            values = array("q", (v + low for v in values))
+        return values
@@ -0,0 +1,506 @@
+"""
+.. module:: rollserver
+   :platform: Unix, Windows
+   :synopsis: Asyncio dice roll service with request batching
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Usage: python -m take10.rollserver [--host 127.0.0.1] [--port 7010]
+       [--unix path] [--max-batch 4096] [--max-dice 1000000]
+       [--max-delay 0] [--seed seed]
+
+The service speaks newline-delimited JSON over TCP or a Unix socket. Each
+request line is an object with an ``id`` the reply echoes, the dice
+expression to ``roll`` and an optional ``count`` of independent rolls::
+
+    {"id": 7, "roll": "4d6dl1", "count": 6}
+    {"id": 7, "totals": [12, 15, 9, 14, 11, 16]}
+    {"id": 8, "roll": "2d"}
+    {"id": 8, "error": "Unexpected 'd' in '2d'"}
+
+Replies may arrive out of order, so clients match them by id.
+
+Requests are not rolled one by one: a :class:`RollBatcher` collects every
+request that arrives during one pass of the event loop (or within
+``max_delay`` seconds) and draws all rolls of the same expression with one
+vectorized :meth:`DicePlan.roll`. A request may roll at most
+:data:`MAX_DICE` dice in all, and a batch is drawn early rather than grow
+past ``max_dice``, so no request or batch can stall the loop for long. A
+connection stops being read while it has ``max_pending`` requests in
+flight or while its client is not reading the replies, so a fast client is
+slowed down by TCP rather than queueing without bound.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from collections import deque
+from functools import lru_cache, partial
+
+from .dice import compile_expression
+
+#: Most rolls one request may ask for
+MAX_COUNT = 10000
+
+#: Most dice one request may roll, over all of its rolls
+MAX_DICE = 100000
+
+#: Most requests drawn in one batch
+MAX_BATCH = 4096
+
+#: Most dice drawn in one batch
+MAX_BATCH_DICE = 1000000
+
+#: Requests a connection may have in flight before it stops being read
+MAX_PENDING = 1024
+
+#: Longest request line, in bytes
+MAX_LINE = 4096
+
+DEFAULT_PORT = 7010
+
+_decode = json.JSONDecoder().decode
+_encode = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def _resolve(future: asyncio.Future, totals: list, error: Exception):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(totals)
+
+
+@lru_cache(maxsize=1024)
+def _dice(plan) -> int:
+    """Dice one roll of a plan draws, before rerolls and explosions"""
+    return sum(group.count for group in plan.groups())
+
+
+class RollBatcher(object):
+    """
+    Coalesces roll requests into batches.
+
+    Requests are queued by submit() and drawn together at the end of the
+    current event loop pass, or after max_delay seconds, or as soon as
+    max_batch requests or max_dice dice are queued; all requests of one
+    expression in a batch are drawn with a single DicePlan.roll().
+    """
+
+    def __init__(self, max_batch: int=MAX_BATCH, max_delay: float=0.0,
+                 rng=None, max_dice: int=MAX_BATCH_DICE):
+        """
+        :param int max_batch: Most requests drawn in one batch
+        :param float max_delay: Seconds to wait for more requests before
+            drawing a batch, 0 to draw once the event loop is idle
+        :param RollStream rng: Stream to draw from (optional)
+        :param int max_dice: Most dice drawn in one batch; a request that
+            would go over it is drawn in the next batch
+        :raises: ValueError
+        """
+        if max_batch < 1 or max_delay < 0 or max_dice < 1:
+            raise ValueError(
+                "Invalid values for max_batch/max_delay/max_dice")
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_dice = max_dice
+        self.rng = rng
+        self.requests = 0  #: Requests drawn so far
+        self.batches = 0  #: Batches drawn so far
+        self._pending = []
+        self._dice = 0
+        self._scheduled = None
+
+    @property
+    def pending(self) -> int:
+        """Number of requests waiting for the next batch"""
+        return len(self._pending)
+
+    def request(self, expression: str, count: int, callback):
+        """
+        Queues a request for the next batch, calling back once it is drawn.
+
+        Callbacks cost less than the futures of submit(), which matters to
+        servers handling tens of thousands of requests a second.
+
+        :param str expression: Dice expression
+        :param int count: Number of independent rolls
+        :param callback: Called with (list of totals, None), or with
+            (None, exception) if drawing failed
+        :raises: ValueError if count is out of range or the request rolls
+            more than MAX_DICE dice, DiceSyntaxError
+        """
+        if type(count) is not int or not 1 <= count <= MAX_COUNT:
+            raise ValueError("count must be from 1 to {}".format(MAX_COUNT))
+        plan = compile_expression(expression)
+        # Rolls without dice still cost a draw each
+        dice = max(_dice(plan), 1) * count
+        if dice > MAX_DICE:
+            raise ValueError("Requests roll at most {} dice".format(MAX_DICE))
+        if self._pending and self._dice + dice > self.max_dice:
+            self.flush()
+        self._pending.append((plan, count, callback))
+        self._dice += dice
+        if len(self._pending) >= self.max_batch or \
+                self._dice >= self.max_dice:
+            self.flush()
+        elif self._scheduled is None:
+            loop = asyncio.get_running_loop()
+            if self.max_delay:
+                self._scheduled = loop.call_later(self.max_delay, self.flush)
+            else:
+                self._scheduled = loop.call_soon(self.flush)
+
+    def submit(self, expression: str, count: int=1) -> asyncio.Future:
+        """
+        Queues a request for the next batch.
+
+        The expression is compiled right away, so invalid requests raise
+        here rather than through the future.
+
+        :param str expression: Dice expression
+        :param int count: Number of independent rolls
+        :returns Future of the list of totals
+        :raises: ValueError, DiceSyntaxError
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.request(expression, count, partial(_resolve, future))
+        return future
+
+    async def roll(self, expression: str, count: int=1) -> list:
+        """
+        Rolls an expression count times in the next batch.
+
+        :returns List of totals
+        :raises: ValueError, DiceSyntaxError
+        """
+        return await self.submit(expression, count)
+
+    async def roll_one(self, expression: str) -> int:
+        """Rolls an expression once in the next batch and returns the total"""
+        return (await self.submit(expression))[0]
+
+    def flush(self):
+        """Draws every queued request now"""
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
+        batch, self._pending = self._pending, []
+        self._dice = 0
+        if not batch:
+            return
+        self.requests += len(batch)
+        self.batches += 1
+        groups = {}
+        for request in batch:
+            groups.setdefault(request[0], []).append(request)
+        for plan, requests in groups.items():
+            try:
+                totals = plan.roll(sum(r[1] for r in requests),
+                                   self.rng).tolist()
+            except Exception as e:
+                for _, _, callback in requests:
+                    callback(None, e)
+                continue
+            start = 0
+            for _, count, callback in requests:
+                callback(totals[start:start + count], None)
+                start += count
+
+
+class _RollProtocol(asyncio.Protocol):
+    """One client connection of a RollServer"""
+
+    def __init__(self, batcher: RollBatcher, max_pending: int):
+        self.batcher = batcher
+        self.max_pending = max_pending
+        self.transport = None
+        self.buffer = b""
+        self.lines = deque()
+        self.in_flight = 0
+        self.processing = False
+        self.replies = []
+        self.read_paused = False
+        self.write_paused = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self.transport = None
+
+    def data_received(self, data: bytes):
+        *lines, self.buffer = (self.buffer + data).split(b"\n")
+        if len(self.buffer) > MAX_LINE or \
+                any(len(line) > MAX_LINE for line in lines):
+            self.lines.clear()
+            self._send(_encode({"error": "Request line too long"}))
+            self._write()
+            self.transport.close()
+            return
+        self.lines.extend(lines)
+        self._process()
+
+    def _process(self):
+        # Lines past max_pending wait here until replies free up room; a
+        # full batch may be drawn, and replied to, in the middle of this
+        lines = self.lines
+        self.processing = True
+        while lines and self.in_flight < self.max_pending:
+            line = lines.popleft()
+            if line.strip():
+                self._request(line)
+        self.processing = False
+        self._throttle()
+
+    def _request(self, line: bytes):
+        request_id = None
+        try:
+            request = _decode(line.decode("utf-8"))
+            request_id = request.get("id")
+            self.batcher.request(request["roll"], request.get("count", 1),
+                                 partial(self._reply, request_id))
+        except Exception as e:
+            # Anything wrong with one request (even a RecursionError from
+            # deeply nested JSON) is answered, never allowed to break the
+            # connection and the other requests in flight on it
+            if isinstance(e, KeyError):
+                e = "Missing {}".format(e)
+            self._send(_encode({"id": request_id, "error": str(e)}))
+            return
+        self.in_flight += 1
+
+    def _reply(self, request_id, totals: list, error: Exception):
+        self.in_flight -= 1
+        if error is not None:
+            self._send(_encode({"id": request_id, "error": str(error)}))
+        else:
+            self._send('{{"id":{},"totals":[{}]}}'.format(
+                _encode(request_id), ",".join(map(str, totals))))
+        if self.lines and not self.processing:
+            self._process()
+
+    def _send(self, reply: str):
+        # Replies finished in one loop pass go out in a single write
+        if not self.replies:
+            asyncio.get_running_loop().call_soon(self._write)
+        self.replies.append(reply)
+
+    def _write(self):
+        if not self.replies:
+            return
+        if self.transport is not None and not self.transport.is_closing():
+            self.transport.write(
+                ("\n".join(self.replies) + "\n").encode("utf-8"))
+        self.replies = []
+
+    def _throttle(self):
+        if self.transport is None:
+            return
+        busy = self.write_paused or bool(self.lines)
+        if busy and not self.read_paused:
+            self.transport.pause_reading()
+        elif not busy and self.read_paused:
+            self.transport.resume_reading()
+        self.read_paused = busy
+
+    def pause_writing(self):
+        self.write_paused = True
+        self._throttle()
+
+    def resume_writing(self):
+        self.write_paused = False
+        self._throttle()
+
+
+class RollServer(object):
+    """
+    Serves dice rolls to clients over TCP or a Unix socket::
+
+        async with RollServer() as server:
+            await server.start(port=7010)
+            await server.serve_forever()
+    """
+
+    def __init__(self, batcher: RollBatcher=None,
+                 max_pending: int=MAX_PENDING):
+        """
+        :param RollBatcher batcher: Batcher drawing the rolls, defaults to
+            a new one
+        :param int max_pending: Requests a connection may have in flight
+            before it stops being read
+        """
+        self.batcher = batcher if batcher is not None else RollBatcher()
+        self.max_pending = max_pending
+        self._server = None
+
+    async def start(self, host: str="127.0.0.1", port: int=0,
+                    path: str=None) -> "RollServer":
+        """
+        Starts listening.
+
+        :param str host: Interface to listen on
+        :param int port: TCP port, 0 for any free port
+        :param str path: Unix socket to listen on instead of TCP
+        :returns The server itself
+        """
+        # Draw once up front, so the first batch does not pay for loading
+        # numpy
+        compile_expression("1d20").roll(1)
+        loop = asyncio.get_running_loop()
+        factory = partial(_RollProtocol, self.batcher, self.max_pending)
+        if path is not None:
+            self._server = await loop.create_unix_server(factory, path)
+        else:
+            self._server = await loop.create_server(factory, host, port)
+        return self
+
+    @property
+    def address(self):
+        """(host, port) or Unix socket path the server listens on"""
+        name = self._server.sockets[0].getsockname()
+        return name[:2] if isinstance(name, tuple) else name
+
+    async def serve_forever(self):
+        """Serves until cancelled or closed"""
+        await self._server.serve_forever()
+
+    async def close(self):
+        """Stops listening and waits for the server to shut down"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+class RollClient(object):
+    """
+    Client of a RollServer; requests may be sent concurrently from many
+    tasks over one connection.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter):
+        """Use RollClient.connect() rather than creating clients directly"""
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+        self._waiting = {}
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect(cls, address) -> "RollClient":
+        """
+        Connects to a RollServer.
+
+        :param address: (host, port), or a Unix socket path
+        :returns RollClient
+        """
+        if isinstance(address, str):
+            streams = await asyncio.open_unix_connection(address)
+        else:
+            streams = await asyncio.open_connection(*address)
+        return cls(*streams)
+
+    async def _receive(self):
+        error = ConnectionError("Connection to the roll server was lost")
+        try:
+            async for line in self._reader:
+                reply = json.loads(line)
+                future = self._waiting.pop(reply.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if "error" in reply:
+                    future.set_exception(ValueError(reply["error"]))
+                else:
+                    future.set_result(reply["totals"])
+        except Exception as e:
+            error = e
+        for future in self._waiting.values():
+            if not future.done():
+                future.set_exception(error)
+        self._waiting.clear()
+
+    async def roll(self, expression: str, count: int=1) -> list:
+        """
+        Rolls an expression count times on the server.
+
+        :returns List of totals
+        :raises: ValueError for requests the server rejected,
+            ConnectionError
+        """
+        if self._receiver.done():
+            raise ConnectionError("Connection to the roll server was lost")
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+        self._writer.write(json.dumps(
+            {"id": request_id, "roll": expression, "count": count},
+            separators=(",", ":")).encode("utf-8") + b"\n")
+        await self._writer.drain()
+        return await future
+
+    async def roll_one(self, expression: str) -> int:
+        """Rolls an expression once on the server and returns the total"""
+        return (await self.roll(expression))[0]
+
+    async def close(self):
+        """Closes the connection"""
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        await self._receiver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+async def _serve(args):
+    rng = None
+    if args.seed is not None:
+        from .rng import RollStream
+        rng = RollStream(args.seed)
+    batcher = RollBatcher(args.max_batch, args.max_delay, rng, args.max_dice)
+    async with RollServer(batcher, args.max_pending) as server:
+        await server.start(args.host, args.port, args.unix)
+        print("listening on {}".format(server.address), flush=True)
+        await server.serve_forever()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="Unix socket to listen on instead")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--max-dice", type=int, default=MAX_BATCH_DICE,
+                        help="most dice drawn in one batch")
+    parser.add_argument("--max-delay", type=float, default=0.0,
+                        help="seconds to wait for a fuller batch")
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING)
+    parser.add_argument("--seed", help="seed of a reproducible RollStream")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
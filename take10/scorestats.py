@@ -0,0 +1,278 @@
+"""
+.. module:: scorestats
+   :platform: Unix, Windows
+   :synopsis: Exact and sampled statistics of ability score generators
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Generators with an ``expression`` (Standard, Classic and Heroic) roll six
+independent scores, so their statistics are exact: the per-score
+distribution comes from :func:`take10.dice.distribution`, the k-th highest
+score of an array follows from its binomial tail, and the joint distribution
+of sorted arrays is a multinomial over the score multisets.
+
+Other generators are sampled with generate_array(); their probabilities are
+estimates, and :meth:`ScoreStats.interval` gives Wilson score intervals.
+
+The per-score and order statistics of the built in generators are shipped
+precomputed in :mod:`take10._scoretable`; run ``python -m
+take10.scorestats`` to regenerate it after changing a generator.
+"""
+
+import os
+from functools import lru_cache
+from itertools import combinations_with_replacement
+from math import comb, factorial, sqrt
+from statistics import NormalDist
+
+from ._compat import require_numpy
+from .abilities import SCORE_GENERATOR_CLASSES
+from .dice import distribution
+from .dice.distribution import Distribution
+from .rng import RollStream
+
+#: Scores in an array
+ARRAY_SIZE = 6
+
+#: Arrays sampled for generators without an expression
+SAMPLES = 200000
+
+#: Joint distributions with more distinct sorted arrays are not computed
+JOINT_LIMIT = 200000
+
+
+class ScoreStats(object):
+    """
+    Statistics of the arrays of one score generator.
+
+    ``order[k]`` is the distribution of the (k + 1)-th highest score of an
+    array, so ``order[0]`` is the best score and ``order[5]`` the worst.
+    """
+
+    __slots__ = ("generator", "stat", "order", "samples")
+
+    def __init__(self, generator: str, stat: Distribution, order: tuple,
+                 samples: int=None):
+        """
+        :param str generator: Name of the generator
+        :param Distribution stat: Distribution of a single score
+        :param tuple order: Distributions of the sorted array positions
+        :param int samples: Arrays sampled, None if the statistics are exact
+        """
+        self.generator = generator
+        self.stat = stat
+        self.order = tuple(order)
+        self.samples = samples
+
+    def __repr__(self) -> str:
+        return "ScoreStats({!r}, {})".format(
+            self.generator,
+            "exact" if self.exact else "{} samples".format(self.samples))
+
+    @property
+    def exact(self) -> bool:
+        """Whether the statistics are exact rather than sampled"""
+        return self.samples is None
+
+    def at_least(self, score: int, count: int=1) -> float:
+        """
+        Returns the chance of an array having at least count scores of at
+        least score, e.g. ``at_least(18)`` for at least one 18.
+
+        :param int score: Lowest score that counts
+        :param int count: Scores needed, 1 to 6
+        :raises: ValueError
+        """
+        if not 1 <= count <= ARRAY_SIZE:
+            raise ValueError("count must be between 1 and {}".format(
+                ARRAY_SIZE))
+        return self.order[count - 1].at_least(score)
+
+    def at_most(self, score: int, count: int=1) -> float:
+        """
+        Returns the chance of an array having at least count scores of at
+        most score, e.g. ``at_most(7)`` for at least one 7 or lower.
+
+        :param int score: Highest score that counts
+        :param int count: Scores needed, 1 to 6
+        :raises: ValueError
+        """
+        if not 1 <= count <= ARRAY_SIZE:
+            raise ValueError("count must be between 1 and {}".format(
+                ARRAY_SIZE))
+        return self.order[ARRAY_SIZE - count].at_most(score)
+
+    def interval(self, probability: float, confidence: float=0.95) \
+            -> (float, float):
+        """
+        Returns the confidence interval of a probability from this object.
+
+        :param float probability: Result of at_least(), at_most(), ...
+        :param float confidence: Coverage of the interval
+        :returns (low, high), a single point if the statistics are exact
+        """
+        if self.exact:
+            return probability, probability
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        n = self.samples
+        centre = (probability + z * z / (2 * n)) / (1 + z * z / n)
+        spread = z * sqrt(probability * (1 - probability) / n +
+                          z * z / (4 * n * n)) / (1 + z * z / n)
+        return max(0.0, centre - spread), min(1.0, centre + spread)
+
+    def joint(self) -> dict:
+        """
+        Returns the exact distribution of sorted arrays.
+
+        :returns {scores from highest to lowest: probability}
+        :raises: ValueError if the statistics are sampled or the arrays too
+            many, see JOINT_LIMIT
+        """
+        if not self.exact:
+            raise ValueError("{} has no exact joint distribution".format(
+                self.generator))
+        if comb(len(self.stat.pmf) + ARRAY_SIZE - 1, ARRAY_SIZE) > \
+                JOINT_LIMIT:
+            raise ValueError("{} has too many distinct arrays".format(
+                self.generator))
+        return _joint(self.stat)
+
+
+def _order_pmfs(pmf: tuple) -> tuple:
+    """Distributions of the sorted positions of ARRAY_SIZE iid scores"""
+    cdf, total = [], 0.0
+    for p in pmf:
+        total += p
+        cdf.append(min(total, 1.0))
+    orders = []
+    for k in range(ARRAY_SIZE):
+        # The (k + 1)-th highest is <= v when at most k scores exceed v
+        below = [sum(comb(ARRAY_SIZE, j) * (1 - f) ** j *
+                     f ** (ARRAY_SIZE - j) for j in range(k + 1))
+                 for f in cdf]
+        orders.append(tuple(b - a for a, b in zip([0.0] + below, below)))
+    return tuple(orders)
+
+
+@lru_cache(maxsize=None)
+def _joint(stat: Distribution) -> dict:
+    values = range(stat.minimum, stat.maximum + 1)
+    joint = {}
+    for array in combinations_with_replacement(reversed(values), ARRAY_SIZE):
+        probability = factorial(ARRAY_SIZE)
+        for value in set(array):
+            probability /= factorial(array.count(value))
+        for value in array:
+            probability *= stat.pmf[value - stat.minimum]
+        if probability:
+            joint[array] = probability
+    return joint
+
+
+def _exact(name: str, expression: str) -> ScoreStats:
+    stat = distribution(expression)
+    return ScoreStats(name, stat, (
+        Distribution(expression, stat.minimum, pmf)
+        for pmf in _order_pmfs(stat.pmf)))
+
+
+def _sampled(generator, samples: int, rng: RollStream) -> ScoreStats:
+    numpy = require_numpy("Sampled score statistics")
+    name = generator.__name__
+    arrays = numpy.asarray(generator.generate_array(samples, rng),
+                           dtype=numpy.int16)
+    minimum = int(arrays.min())
+    width = int(arrays.max()) - minimum + 1
+    stat = numpy.bincount((arrays - minimum).ravel(), minlength=width)
+    ordered = -numpy.sort(-arrays, axis=1)
+    return ScoreStats(name, Distribution(name, minimum, (
+        stat / stat.sum()).tolist()), (
+        Distribution(name, minimum, (numpy.bincount(
+            ordered[:, k] - minimum, minlength=width) / samples).tolist())
+        for k in range(ARRAY_SIZE)), samples)
+
+
+@lru_cache(maxsize=64)
+def _stats(generator, samples: int, key: bytes, counter: int) -> ScoreStats:
+    from ._scoretable import TABLE
+    name = generator.__name__
+    entry = TABLE.get(name)
+    if entry is not None and entry[0] == generator.expression:
+        expression, minimum, pmf, orders = entry
+        return ScoreStats(name, Distribution(expression, minimum, pmf), (
+            Distribution(expression, minimum, o) for o in orders))
+    if generator.expression is not None:
+        return _exact(name, generator.expression)
+    if samples <= 0:
+        raise ValueError("Sample count must be positive")
+    rng = RollStream.from_key(key, counter).split("scorestats", name)
+    return _sampled(generator, samples, rng)
+
+
+def score_stats(generator, samples: int=SAMPLES,
+                rng: RollStream=None) -> ScoreStats:
+    """
+    Returns the statistics of a score generator's arrays.
+
+    Results are cached; the built in generators come from the shipped
+    table without any computation.
+
+    :param generator: Name in SCORE_GENERATOR_CLASSES, or an
+        AbilityScoreGenerator subclass
+    :param int samples: Arrays to sample if the generator has no expression
+    :param RollStream rng: Stream to sample from, defaults to a fixed one so
+        repeated calls agree
+    :returns ScoreStats
+    :raises: KeyError for unknown names, ValueError, ImportError if sampling
+        needs numpy
+    """
+    if isinstance(generator, str):
+        if generator not in SCORE_GENERATOR_CLASSES:
+            raise KeyError("Unknown score generator: {}".format(generator))
+        generator = SCORE_GENERATOR_CLASSES[generator]
+    rng = rng if rng is not None else RollStream("scorestats")
+    return _stats(generator, samples, rng.key, rng.counter)
+
+
+def write_table(path: str=None):
+    """
+    Regenerates the shipped table of exact statistics.
+
+    :param str path: Module to write, defaults to take10/_scoretable.py
+    """
+    path = path or os.path.join(os.path.dirname(__file__), "_scoretable.py")
+    lines = [
+        '"""',
+        ".. module:: _scoretable",
+        "   :platform: Unix, Windows",
+        "   :synopsis: Precomputed exact score generator statistics",
+        "",
+        ".. moduleauthor:: <fluffymuffin27@posteo.de>",
+        "",
+        "Generated by ``python -m take10.scorestats``; do not edit.",
+        '"""',
+        "",
+        "#: {generator name: (expression, minimum, score pmf, pmfs of the",
+        "#: sorted array positions from highest to lowest)}",
+        "TABLE = {",
+    ]
+    for name, generator in sorted(SCORE_GENERATOR_CLASSES.items()):
+        if generator.expression is None:
+            continue
+        stats = _exact(name, generator.expression)
+        lines.append('    "{}": ("{}", {}, ('.format(
+            name, generator.expression, stats.stat.minimum))
+        lines.extend("        {!r},".format(p) for p in stats.stat.pmf)
+        lines.append("    ), (")
+        for order in stats.order:
+            lines.append("        (")
+            lines.extend("            {!r},".format(p) for p in order.pmf)
+            lines.append("        ),")
+        lines.append("    )),")
+    lines.append("}")
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+if __name__ == "__main__":
+    write_table()
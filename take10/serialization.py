@@ -0,0 +1,370 @@
+"""
+.. module:: serialization
+   :platform: Unix, Windows
+   :synopsis: Binary CharacterSheet formats
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Two little-endian formats are provided.
+
+A single sheet record (:func:`encode_sheet`) is a fixed header::
+
+    magic "T10C", version u8, flags u8, alignment u8, sex u8, race_id u16,
+    six ability scores u8 (AbilityClass order)
+
+followed by the SkillSet encoding prefixed with its u8 length (if flagged),
+the name as u16 length + UTF-8 and the description as u32 length + UTF-8
+(if flagged).
+
+A sheet file (:func:`write_sheets`) stores many sheets column by column so
+that it can be memory-mapped and read by index (:class:`SheetFile`)::
+
+    magic "T10T", version u8, 3 pad bytes, count u64,
+    one u64 offset per section, then the 8-byte aligned sections:
+    alignment u8[n], sex u8[n], flags u8[n], race_id u16[n],
+    scores u8[6][n], skill ranks i8[35][n],
+    name offsets u64[n + 1], name bytes, desc offsets u64[n + 1], desc bytes
+"""
+
+import mmap
+import struct
+from array import array
+from typing import Iterable
+
+from ._compat import little_endian as _little_endian, typed_view as _typed
+from .abilities import AbilityClass, AbilityScores
+from .charactersheet import CharacterSheet
+from .races import RACES
+from .skills import SkillClass, SkillSet
+
+VERSION = 1
+
+#: Sheet has ability scores
+HAS_SCORES = 1
+#: Sheet has a SkillSet
+HAS_SKILLS = 2
+#: Sheet has a description
+HAS_DESC = 4
+
+_RECORD = struct.Struct("<4sBBBBH6B")
+_RECORD_MAGIC = b"T10C"
+
+_SECTIONS = (
+    "alignment", "sex", "flags", "race_id", "scores", "skills",
+    "name_offsets", "names", "desc_offsets", "descs",
+)
+_FILE = struct.Struct("<4sB3xQ{}Q".format(len(_SECTIONS)))
+_FILE_MAGIC = b"T10T"
+
+_ABILITIES = len(AbilityClass)
+_SKILLS = len(SkillClass)
+
+_U8 = struct.Struct("<B")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+
+
+def _race_id(sheet: CharacterSheet) -> int:
+    return sheet.race.race_id if sheet.race is not None else 0
+
+
+def _race(race_id: int, races):
+    if not race_id:
+        return None
+    try:
+        race = (RACES if races is None else races)[race_id]
+    except KeyError:
+        raise ValueError("Unknown race_id {}".format(race_id))
+    return race()
+
+
+def _field(view: memoryview, offset: int, prefix: struct.Struct) -> tuple:
+    """
+    Reads a length-prefixed field of a record.
+
+    :returns (view of the field, offset after it)
+    :raises: ValueError if the record ends inside the field
+    """
+    start = offset + prefix.size
+    if start > len(view):
+        raise ValueError("Truncated CharacterSheet record")
+    (size,) = prefix.unpack_from(view, offset)
+    if start + size > len(view):
+        raise ValueError("Truncated CharacterSheet record")
+    return view[start:start + size], start + size
+
+
+def encode_sheet(sheet: CharacterSheet) -> bytes:
+    """
+    Encodes a CharacterSheet as a single binary record.
+
+    :param CharacterSheet sheet: Sheet to encode
+    :returns bytes
+    :raises: ValueError if a score, race_id or length does not fit the
+        record
+    """
+    scores = sheet.ability_scores
+    flags = (HAS_SCORES if scores is not None else 0) \
+        | (HAS_SKILLS if sheet.skills is not None else 0) \
+        | (HAS_DESC if sheet.char_desc is not None else 0)
+    try:
+        parts = [_RECORD.pack(
+            _RECORD_MAGIC, VERSION, flags, sheet.alignment.value,
+            sheet.sex.value, _race_id(sheet),
+            *(scores.as_tuple() if scores is not None else (0,) * _ABILITIES)
+        )]
+        if sheet.skills is not None:
+            skills = sheet.skills.to_bytes()
+            parts.append(_U8.pack(len(skills)))
+            parts.append(skills)
+        name = sheet.char_name.encode("utf-8")
+        parts.append(_U16.pack(len(name)))
+        parts.append(name)
+        if sheet.char_desc is not None:
+            desc = sheet.char_desc.encode("utf-8")
+            parts.append(_U32.pack(len(desc)))
+            parts.append(desc)
+    except struct.error as e:
+        raise ValueError("Cannot encode CharacterSheet: {}".format(e))
+    return b"".join(parts)
+
+
+def decode_sheet(data, races: dict=None) -> CharacterSheet:
+    """
+    Decodes a record written by encode_sheet.
+
+    The record is read in place through a memoryview; only the strings and
+    skill ranks are copied out of it.
+
+    :param data: bytes-like record
+    :param dict races: Race classes by race_id, defaults to races.RACES
+    :returns CharacterSheet
+    :raises: ValueError
+    """
+    view = memoryview(data)
+    try:
+        magic, version, flags, alignment, sex, race_id, *scores = \
+            _RECORD.unpack_from(view)
+    except struct.error:
+        raise ValueError("Truncated CharacterSheet record")
+    if magic != _RECORD_MAGIC:
+        raise ValueError("Not a CharacterSheet record")
+    if version != VERSION:
+        raise ValueError("Unsupported record version {}".format(version))
+    offset = _RECORD.size
+    skills = None
+    if flags & HAS_SKILLS:
+        field, offset = _field(view, offset, _U8)
+        skills = SkillSet.from_bytes(field)
+    field, offset = _field(view, offset, _U16)
+    name = str(field, "utf-8")
+    desc = None
+    if flags & HAS_DESC:
+        field, offset = _field(view, offset, _U32)
+        desc = str(field, "utf-8")
+    return CharacterSheet(
+        name, desc,
+        CharacterSheet.Alignment(alignment),
+        _race(race_id, races),
+        CharacterSheet.Sex(sex),
+        AbilityScores(*scores) if flags & HAS_SCORES else None,
+        skills
+    )
+
+
+def write_sheets(path: str, sheets: Iterable[CharacterSheet]) -> int:
+    """
+    Writes many sheets into one columnar file readable with SheetFile.
+
+    :param str path: File to write
+    :param sheets: Sheets to store
+    :returns Number of sheets written
+    """
+    sheets = list(sheets)
+    n = len(sheets)
+    columns = {
+        "alignment": array("B", (s.alignment.value for s in sheets)),
+        "sex": array("B", (s.sex.value for s in sheets)),
+        "flags": array("B"),
+        "race_id": array("H", (_race_id(s) for s in sheets)),
+        "scores": array("B", bytes(_ABILITIES * n)),
+        "skills": array("b", bytes(_SKILLS * n)),
+        "name_offsets": array("Q", [0]),
+        "names": bytearray(),
+        "desc_offsets": array("Q", [0]),
+        "descs": bytearray(),
+    }
+    scores_column = columns["scores"]
+    skills_column = columns["skills"]
+    for row, sheet in enumerate(sheets):
+        flags = 0
+        if sheet.ability_scores is not None:
+            flags |= HAS_SCORES
+            scores_column[row::n] = array("B", sheet.ability_scores.as_tuple())
+        if sheet.skills is not None:
+            flags |= HAS_SKILLS
+            skills_column[row::n] = array("b", sheet.skills)
+        if sheet.char_desc is not None:
+            flags |= HAS_DESC
+            columns["descs"] += sheet.char_desc.encode("utf-8")
+        columns["flags"].append(flags)
+        columns["names"] += sheet.char_name.encode("utf-8")
+        columns["name_offsets"].append(len(columns["names"]))
+        columns["desc_offsets"].append(len(columns["descs"]))
+
+    offsets = []
+    position = _FILE.size
+    blobs = []
+    for section in _SECTIONS:
+        column = columns[section]
+        blob = _little_endian(column) if isinstance(column, array) \
+            else bytes(column)
+        position += -position % 8
+        offsets.append(position)
+        blobs.append((position, blob))
+        position += len(blob)
+    with open(path, "wb") as out:
+        out.write(_FILE.pack(_FILE_MAGIC, VERSION, n, *offsets))
+        for offset, blob in blobs:
+            out.write(bytes(offset - out.tell()))
+            out.write(blob)
+    return n
+
+
+class SheetFile(object):
+    """
+    Read-only, memory-mapped access to a file written by write_sheets.
+
+    Columns are exposed as typed memoryviews over the mapping, and sheets
+    are decoded on demand by index.
+    """
+
+    def __init__(self, path: str, races: dict=None):
+        """
+        :param str path: File to open
+        :param dict races: Race classes by race_id, defaults to races.RACES
+        :raises: ValueError
+        """
+        self._races = races
+        self._columns = {}
+        with open(path, "rb") as source:
+            self._mmap = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        # Everything is checked before any view of the mapping is taken, so
+        # that a bad file can still be unmapped
+        try:
+            magic, version, count, *offsets = _FILE.unpack_from(self._mmap)
+            if magic != _FILE_MAGIC or version != VERSION:
+                raise ValueError("{} is not a version {} sheet file".format(
+                    path, VERSION))
+            sizes = {
+                "alignment": count, "sex": count, "flags": count,
+                "race_id": 2 * count, "scores": _ABILITIES * count,
+                "skills": _SKILLS * count,
+                "name_offsets": 8 * (count + 1),
+                "desc_offsets": 8 * (count + 1),
+            }
+            sections = dict(zip(_SECTIONS, offsets))
+            for name in ("name_offsets", "desc_offsets"):
+                (sizes[name[:4] + "s"],) = struct.unpack_from(
+                    "<Q", self._mmap, sections[name] + 8 * count)
+            for name, start in sections.items():
+                if start + sizes[name] > len(self._mmap):
+                    raise ValueError("{} is truncated".format(path))
+        except struct.error:
+            self._mmap.close()
+            raise ValueError("{} is not a sheet file".format(path))
+        except ValueError:
+            self._mmap.close()
+            raise
+        self._count = count
+        typecodes = {"race_id": "H", "skills": "b",
+                     "name_offsets": "Q", "desc_offsets": "Q"}
+        view = memoryview(self._mmap)
+        for name, start in sections.items():
+            section = view[start:start + sizes[name]]
+            code = typecodes.get(name)
+            self._columns[name] = _typed(section, code) if code else section
+        # The columns keep the mapping exported until close()
+        view.release()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Releases the column views and unmaps the file.
+
+        Columns already handed out stay readable; the file is unmapped once
+        the last of them is released.
+        """
+        for column in self._columns.values():
+            if isinstance(column, memoryview):
+                column.release()
+        self._columns = {}
+        mapping, self._mmap = self._mmap, None
+        if mapping is not None:
+            try:
+                mapping.close()
+            except BufferError:
+                # Views handed out still export the mapping, and keep it
+                # alive until they are released
+                pass
+
+    def column(self, name: str):
+        """
+        Returns a raw column by section name, e.g. "race_id".
+
+        :param str name: Section name
+        """
+        # A view of its own, so that close() does not release it
+        return self._columns[name][:]
+
+    def ability_column(self, ability: AbilityClass) -> memoryview:
+        """Returns the scores of one ability for every sheet"""
+        start = ability.value * self._count
+        return self._columns["scores"][start:start + self._count]
+
+    def skill_column(self, skill: SkillClass):
+        """Returns the ranks in one skill for every sheet"""
+        start = skill.value * self._count
+        return self._columns["skills"][start:start + self._count]
+
+    def name(self, index: int) -> str:
+        """Returns the name of one sheet without decoding the rest"""
+        offsets = self._columns["name_offsets"]
+        return str(
+            self._columns["names"][offsets[index]:offsets[index + 1]],
+            "utf-8")
+
+    def __getitem__(self, index: int) -> CharacterSheet:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("SheetFile index out of range")
+        c = self._columns
+        n = self._count
+        flags = c["flags"][index]
+        desc = None
+        if flags & HAS_DESC:
+            offsets = c["desc_offsets"]
+            desc = str(c["descs"][offsets[index]:offsets[index + 1]], "utf-8")
+        scores = None
+        if flags & HAS_SCORES:
+            scores = AbilityScores(*c["scores"][index::n])
+        skills = None
+        if flags & HAS_SKILLS:
+            skills = SkillSet(*c["skills"][index::n])
+        return CharacterSheet(
+            self.name(index), desc,
+            CharacterSheet.Alignment(c["alignment"][index]),
+            _race(c["race_id"][index], self._races),
+            CharacterSheet.Sex(c["sex"][index]),
+            scores,
+            skills
+        )
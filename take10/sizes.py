@@ -9,7 +9,11 @@
 
 from enum import Enum, unique
 from math import inf
-from memoize import memoize
+
+from ._compat import require_numpy
+
+FEET_TO_METRES = 0.3048
+POUNDS_TO_KILOGRAMS = 0.45359237
 
 
 @unique
@@ -25,49 +29,146 @@ class SizeClass(Enum):
     Large = 6
     Huge = 7
     Gargantuan = 8
-    Colossal = 8
+    Colossal = 9
+
+
+# Height (feet) and weight (pounds) ranges, indexed by SizeClass value - 1
+_HEIGHT_FEET = (
+    (0.0, 0.5),
+    (0.5, 1),
+    (1, 2),
+    (2, 4),
+    (4, 8),
+    (8, 16),
+    (16, 32),
+    (32, 64),
+    (64, inf),
+)
+_WEIGHT_POUNDS = (
+    (0.0, 0.125),
+    (0.125, 1),
+    (1, 8),
+    (8, 60),
+    (60, 500),
+    (500, 4000),
+    (4000, 32000),
+    (32000, 250000),
+    (250000, inf),
+)
+
+#: Typical (min, max) heights by SizeClass value - 1, keyed by metric
+HEIGHT_TABLE = {
+    False: _HEIGHT_FEET,
+    True: tuple(
+        (low * FEET_TO_METRES, high * FEET_TO_METRES)
+        for low, high in _HEIGHT_FEET
+    ),
+}
+
+#: Typical (min, max) weights by SizeClass value - 1, keyed by metric
+WEIGHT_TABLE = {
+    False: _WEIGHT_POUNDS,
+    True: tuple(
+        (low * POUNDS_TO_KILOGRAMS, high * POUNDS_TO_KILOGRAMS)
+        for low, high in _WEIGHT_POUNDS
+    ),
+}
 
 
-@memoize
 def typical_height(csize: SizeClass, metric: bool=False) -> (float, float):
     """
     Returns the minimum/maximum height range for a creature of the given size.
 
-    Values are given in feet by default.
-
+    Values are given in feet by default, or metres if metric is set.
     """
-    size_to_height = {
-        SizeClass.Fine: (0.0, 0.5),
-        SizeClass.Diminutive: (0.5, 1),
-        SizeClass.Tiny: (1, 2),
-        SizeClass.Small: (2, 4),
-        SizeClass.Medium: (4, 8),
-        SizeClass.Large: (8, 16),
-        SizeClass.Huge: (16, 32),
-        SizeClass.Gargantuan: (32, 64),
-        SizeClass.Colossal: (64, inf),
-    }
-    height = size_to_height[csize]
-    return height * 0.3048 if metric else height
-
-
-@memoize
+    return HEIGHT_TABLE[metric][csize.value - 1]
+
+
 def typical_weight(csize: SizeClass, metric: bool=False) -> (float, float):
     """
     Returns the minimum/maximum weight range for a creature of the given size.
 
-    Values are given in pounds by default.
+    Values are given in pounds by default, or kilograms if metric is set.
+    """
+    return WEIGHT_TABLE[metric][csize.value - 1]
+
+
+def _size_indices(sizes):
+    """Converts SizeClass members or values to a table index array"""
+    numpy = require_numpy("sizes")
+    sizes = numpy.asarray(sizes)
+    if sizes.dtype == object:
+        sizes = numpy.fromiter(
+            (s.value for s in sizes.ravel()), dtype=numpy.intp,
+            count=sizes.size).reshape(sizes.shape)
+    if sizes.size and (sizes.min() < 1 or sizes.max() > len(SizeClass)):
+        raise ValueError("Unknown size class")
+    return sizes.astype(numpy.intp) - 1
+
+
+def typical_heights(sizes, metric: bool=False):
+    """
+    Vectorized typical_height.
+
+    :param sizes: Array of SizeClass members or SizeClass values
+    :param bool metric: Return metres instead of feet
+    :returns Array of shape sizes.shape + (2,) holding (min, max) heights
+    :raises: ValueError
+    """
+    numpy = require_numpy("typical_heights")
+    return numpy.array(HEIGHT_TABLE[metric])[_size_indices(sizes)]
+
+
+def typical_weights(sizes, metric: bool=False):
+    """
+    Vectorized typical_weight.
+
+    :param sizes: Array of SizeClass members or SizeClass values
+    :param bool metric: Return kilograms instead of pounds
+    :returns Array of shape sizes.shape + (2,) holding (min, max) weights
+    :raises: ValueError
+    """
+    numpy = require_numpy("typical_weights")
+    return numpy.array(WEIGHT_TABLE[metric])[_size_indices(sizes)]
+
+
+def classify_size(heights, weights=None, metric: bool=False):
+    """
+    Assigns a size class to every creature from its height and weight.
+
+    Ranges include their minimum and exclude their maximum. When weights are
+    given, each creature gets whichever of its height or weight class is the
+    larger.
+
+    :param heights: Array of heights, in feet (or metres if metric)
+    :param weights: Array of weights, in pounds (or kilograms if metric)
+    :param bool metric: Inputs are metric
+    :returns Integer array of SizeClass values
+    """
+    numpy = require_numpy("classify_size")
+    lower = [low for low, _ in HEIGHT_TABLE[metric][1:]]
+    sizes = numpy.searchsorted(lower, heights, side="right") + 1
+    if weights is not None:
+        lower = [low for low, _ in WEIGHT_TABLE[metric][1:]]
+        sizes = numpy.maximum(
+            sizes, numpy.searchsorted(lower, weights, side="right") + 1)
+    return sizes
+
+
+def is_typical_size(sizes, heights, weights, metric: bool=False):
+    """
+    Checks which creatures have a height and weight typical of their size.
+
+    :param sizes: Array of SizeClass members or SizeClass values
+    :param heights: Array of heights, in feet (or metres if metric)
+    :param weights: Array of weights, in pounds (or kilograms if metric)
+    :param bool metric: Inputs are metric
+    :returns Boolean array
     """
-    size_to_weight = {
-        SizeClass.Fine: (0.0, 0.125),
-        SizeClass.Diminutive: (0.125, 1),
-        SizeClass.Tiny: (1, 8),
-        SizeClass.Small: (8, 60),
-        SizeClass.Medium: (60, 500),
-        SizeClass.Large: (500, 4000),
-        SizeClass.Huge: (4000, 32000),
-        SizeClass.Gargantuan: (32000, 250000),
-        SizeClass.Colossal: (250000, inf),
-    }
-    weight = size_to_weight[csize]
-    return weight * 0.45359237 if metric else weight
+    numpy = require_numpy("is_typical_size")
+    heights = numpy.asarray(heights)
+    weights = numpy.asarray(weights)
+    h = typical_heights(sizes, metric)
+    w = typical_weights(sizes, metric)
+    return (h[..., 0] <= heights) & (heights < h[..., 1]) \
+        & (w[..., 0] <= weights) & (weights < w[..., 1])
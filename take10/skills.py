@@ -1,20 +1,19 @@
 """
-.. module:: dice
+.. module:: skills
    :platform: Unix, Windows
-   :synopsis: Dice emulators
+   :synopsis: Skill definitions
 
 .. moduleauthor:: <fluffymuffin27@posteo.de>
 
 """
 
 from enum import Enum, unique
-from collections import namedtuple
+from array import array
+from functools import lru_cache
 
+from ._compat import require_numpy
 from .abilities import AbilityClass
 
-from multi_key_dict import multi_key_dict
-from memoize import memoize
-
 
 # TODO: Consider making SkillClass a config file
 @unique
@@ -61,23 +60,198 @@ class SkillClass(Enum):
     USE_MAGIC_DEVICE = 34
 
 
-# TODO: Flesh SkillSet out into its own class
-SkillSet = namedtuple(
-    "SkillSet",
-    [k for k in SkillClass.__members__.keys()]
-)
+_SKILLS = tuple(SkillClass)
 
 
-@memoize
-def get_skill_ability_class(s: SkillClass) -> AbilityClass:
+class SkillSet(object):
     """
-    Returns the AbilityClass that affects the given SkillClass.
+    Skill ranks of a character, one signed byte per SkillClass.
 
-    :param SkillClass s: Skill class to check
-    :returns dict Ability class the given skill class is affected by.
+    Ranks are stored densely in an int8 :class:`array.array`, or sparsely as
+    a {SkillClass value: rank} dict for creatures that have only a few ranks
+    (sparse=True). Both modes expose the same interface: every skill is an
+    attribute (``skills.SWIM``), ranks can be indexed by SkillClass or by
+    value, and iterating yields all 35 ranks in SkillClass order.
+
+    SkillSets are mutable so that bonuses can be stacked in place with
+    ``+=`` rather than rebuilding the set for every change.
     """
-    k = multi_key_dict()
-    k[
+
+    __slots__ = ("_dense", "_sparse")
+
+    #: Header byte of the dense to_bytes() encoding
+    DENSE = 0
+    #: Header byte of the sparse to_bytes() encoding
+    SPARSE = 1
+
+    def __init__(self, *ranks: int, sparse: bool=False, **named: int):
+        """
+        :param int ranks: Ranks in SkillClass order (optional)
+        :param bool sparse: Store only the non-zero ranks
+        :param int named: Ranks keyed by SkillClass name (optional)
+        :raises: ValueError, KeyError
+        """
+        if len(ranks) > len(_SKILLS):
+            raise ValueError("SkillSet takes at most {} ranks".format(
+                len(_SKILLS)))
+        if sparse:
+            self._dense = None
+            self._sparse = {}
+        else:
+            self._dense = array("b", bytes(len(_SKILLS)))
+            self._sparse = None
+        for index, rank in enumerate(ranks):
+            self[index] = rank
+        for name, rank in named.items():
+            self[SkillClass[name]] = rank
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SkillSet":
+        """
+        Decodes a SkillSet encoded with to_bytes().
+
+        :param bytes data: Encoded skill set
+        :returns SkillSet in the same storage mode it was encoded from
+        :raises: ValueError
+        """
+        view = memoryview(data)
+        if not view:
+            raise ValueError("Empty SkillSet encoding")
+        if view[0] == cls.DENSE:
+            if len(view) != len(_SKILLS) + 1:
+                raise ValueError("Truncated dense SkillSet encoding")
+            skills = cls.__new__(cls)
+            skills._dense = array("b")
+            skills._dense.frombytes(view[1:])
+            skills._sparse = None
+            return skills
+        if view[0] == cls.SPARSE:
+            skills = cls(sparse=True)
+            pairs = array("b")
+            pairs.frombytes(view[1:])
+            if len(pairs) % 2:
+                raise ValueError("Truncated sparse SkillSet encoding")
+            for index, rank in zip(pairs[::2], pairs[1::2]):
+                skills[index] = rank
+            return skills
+        raise ValueError("Unknown SkillSet encoding {}".format(view[0]))
+
+    def to_bytes(self) -> bytes:
+        """
+        Encodes the ranks: a header byte then either all 35 ranks (dense) or
+        (SkillClass value, rank) byte pairs for the non-zero ranks (sparse).
+        """
+        if self._dense is not None:
+            return bytes((self.DENSE,)) + self._dense.tobytes()
+        pairs = array("b")
+        for index in sorted(self._sparse):
+            pairs.extend((index, self._sparse[index]))
+        return bytes((self.SPARSE,)) + pairs.tobytes()
+
+    @property
+    def is_sparse(self) -> bool:
+        return self._sparse is not None
+
+    def to_dense(self) -> "SkillSet":
+        """Returns a dense copy of the skill set"""
+        skills = SkillSet()
+        skills += self
+        return skills
+
+    def to_sparse(self) -> "SkillSet":
+        """Returns a sparse copy of the skill set"""
+        skills = SkillSet(sparse=True)
+        skills += self
+        return skills
+
+    def copy(self) -> "SkillSet":
+        return self.to_sparse() if self.is_sparse else self.to_dense()
+
+    def items(self):
+        """Yields (SkillClass, rank) for every non-zero rank"""
+        if self._dense is not None:
+            return ((_SKILLS[i], r) for i, r in enumerate(self._dense) if r)
+        return ((_SKILLS[i], self._sparse[i]) for i in sorted(self._sparse))
+
+    def _index(self, skill) -> int:
+        index = skill.value if isinstance(skill, SkillClass) else skill
+        if not 0 <= index < len(_SKILLS):
+            raise IndexError("SkillSet index out of range")
+        return index
+
+    def __getitem__(self, skill) -> int:
+        index = self._index(skill)
+        if self._dense is not None:
+            return self._dense[index]
+        return self._sparse.get(index, 0)
+
+    def __setitem__(self, skill, rank: int):
+        index = self._index(skill)
+        if not -128 <= rank <= 127:
+            raise ValueError("Skill ranks must fit in a signed byte")
+        if self._dense is not None:
+            self._dense[index] = rank
+        elif rank:
+            self._sparse[index] = rank
+        else:
+            self._sparse.pop(index, None)
+
+    def __len__(self) -> int:
+        return len(_SKILLS)
+
+    def __iter__(self):
+        if self._dense is not None:
+            return iter(self._dense)
+        return (self._sparse.get(i, 0) for i in range(len(_SKILLS)))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SkillSet):
+            return NotImplemented
+        return dict(self.items()) == dict(other.items())
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return "SkillSet({})".format(", ".join(
+            "{}={}".format(skill.name, rank) for skill, rank in self.items()))
+
+    def __iadd__(self, other: "SkillSet") -> "SkillSet":
+        """Stacks the ranks of other onto this set, in place"""
+        if not isinstance(other, SkillSet):
+            return NotImplemented
+        if other._dense is not None:
+            pairs = enumerate(other._dense)
+        else:
+            pairs = other._sparse.items()
+        for index, rank in pairs:
+            if rank:
+                self[index] = self[index] + rank
+        return self
+
+    def __add__(self, other: "SkillSet") -> "SkillSet":
+        if not isinstance(other, SkillSet):
+            return NotImplemented
+        skills = self.to_dense() if not (self.is_sparse and other.is_sparse) \
+            else self.to_sparse()
+        skills += other
+        return skills
+
+
+def _skill_property(skill: SkillClass) -> property:
+    return property(
+        lambda self: self[skill],
+        lambda self, rank: self.__setitem__(skill, rank),
+        doc="Ranks in {}".format(skill.name)
+    )
+
+
+for _skill in _SKILLS:
+    setattr(SkillSet, _skill.name, _skill_property(_skill))
+
+
+#: Skills grouped by the AbilityClass that affects them
+SKILL_ABILITY_GROUPS = {
+    AbilityClass.DEXTERITY: (
         SkillClass.ACROBATICS,
         SkillClass.DISABLE_DEVICE,
         SkillClass.ESCAPE_ARTIST,
@@ -85,8 +259,8 @@ def get_skill_ability_class(s: SkillClass) -> AbilityClass:
         SkillClass.RIDE,
         SkillClass.SLEIGHT_OF_HAND,
         SkillClass.STEALTH,
-    ] = AbilityClass.DEXTERITY
-    k[
+    ),
+    AbilityClass.INTELLIGENCE: (
         SkillClass.APPRAISE,
         SkillClass.CRAFT,
         SkillClass.KNOWLEDGE_ARCANA,
@@ -100,9 +274,9 @@ def get_skill_ability_class(s: SkillClass) -> AbilityClass:
         SkillClass.KNOWLEDGE_PLANES,
         SkillClass.KNOWLEDGE_RELIGION,
         SkillClass.LINGUISTICS,
-        SkillClass.SPELLCRAFT
-    ] = AbilityClass.INTELLIGENCE
-    k[
+        SkillClass.SPELLCRAFT,
+    ),
+    AbilityClass.CHARISMA: (
         SkillClass.BLUFF,
         SkillClass.DIPLOMACY,
         SkillClass.DISGUISE,
@@ -110,13 +284,69 @@ def get_skill_ability_class(s: SkillClass) -> AbilityClass:
         SkillClass.PERFORM,
         SkillClass.USE_MAGIC_DEVICE,
         SkillClass.INTIMIDATE,
-    ] = AbilityClass.CHARISMA
-    k[SkillClass.SWIM, SkillClass.CLIMB] = AbilityClass.STRENGTH
-    k[
+    ),
+    AbilityClass.STRENGTH: (
+        SkillClass.SWIM,
+        SkillClass.CLIMB,
+    ),
+    AbilityClass.WISDOM: (
         SkillClass.HEAL,
         SkillClass.PERCEPTION,
         SkillClass.PROFESSION,
         SkillClass.SENSE_MOTIVE,
-        SkillClass.SURVIVAL
-    ] = AbilityClass.WISDOM
-    return k[s]
+        SkillClass.SURVIVAL,
+    ),
+}
+
+#: AbilityClass of every skill, indexed by SkillClass value
+SKILL_ABILITY_INDEX = tuple(
+    ability
+    for skill in SkillClass
+    for ability, skills in SKILL_ABILITY_GROUPS.items()
+    if skill in skills
+)
+
+
+def get_skill_ability_class(s: SkillClass) -> AbilityClass:
+    """
+    Returns the AbilityClass that affects the given SkillClass.
+
+    :param SkillClass s: Skill class to check
+    :returns AbilityClass the given skill class is affected by.
+    """
+    return SKILL_ABILITY_INDEX[s.value]
+
+
+@lru_cache(maxsize=None)
+def _skill_ability_array():
+    """SKILL_ABILITY_INDEX as a read-only numpy index, built once"""
+    numpy = require_numpy("compute_skill_modifiers")
+    index = numpy.fromiter(
+        (a.value for a in SKILL_ABILITY_INDEX), dtype=numpy.intp,
+        count=len(SKILL_ABILITY_INDEX))
+    index.flags.writeable = False
+    return index
+
+
+def compute_skill_modifiers(scores_table, ranks_table):
+    """
+    Computes every skill total (ranks + ability modifier) for N characters
+    in one vectorized pass.
+
+    :param scores_table: AbilityScoreTable, or N x 6 array of ability scores
+        in AbilityClass order
+    :param ranks_table: N x 35 array of skill ranks in SkillClass order
+    :returns N x 35 int16 array of skill totals
+    :raises: ValueError
+    """
+    numpy = require_numpy("compute_skill_modifiers")
+    if hasattr(scores_table, "modifiers"):
+        modifiers = scores_table.modifiers().T
+    else:
+        scores = numpy.asarray(scores_table, dtype=numpy.int16)
+        modifiers = (scores - 10) // 2
+    ranks = numpy.asarray(ranks_table, dtype=numpy.int16)
+    if ranks.shape != (len(modifiers), len(SkillClass)):
+        raise ValueError("Expected {} x {} skill ranks, got {}".format(
+            len(modifiers), len(SkillClass), ranks.shape))
+    return ranks + modifiers[:, _skill_ability_array()]
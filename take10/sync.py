@@ -0,0 +1,343 @@
+"""
+.. module:: sync
+   :platform: Unix, Windows
+   :synopsis: Delta-encoded state sync between peers
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+Each peer runs a :class:`SyncSession`. Tracked AbilityScores are watched
+through their ``*_changed`` signals; changes made during one tick are
+coalesced per field and broadcast as a single batch::
+
+    origin varint, seq varint, clock varint, count varint,
+    count x (object_id << 3 | field varint, value zigzag varint)
+
+A single score change costs about six bytes on the wire.
+
+Batches from each origin are applied in sequence order; the highest
+sequence applied per origin is the session's version vector, so duplicate
+batches are dropped and early ones are held until the gap is filled. Every
+field is a last-writer-wins register ordered by (Lamport clock, origin),
+so peers converge whatever order concurrent batches arrive in.
+"""
+
+import asyncio
+from functools import partial
+from typing import Callable
+
+from .abilities import AbilityClass
+
+#: Default seconds between two flushes of the pending changes
+TICK_INTERVAL = 0.02
+
+_FIELDS = tuple(a.name.lower() for a in AbilityClass)
+_FIELD_BITS = 3
+
+
+def _write_varint(out: bytearray, value: int):
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, offset: int) -> (int, int):
+    value = 0
+    shift = 0
+    while True:
+        try:
+            byte = data[offset]
+        except IndexError:
+            raise ValueError("Truncated sync batch")
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def encode_batch(origin: int, seq: int, clock: int, deltas) -> bytes:
+    """
+    Encodes one batch of field deltas.
+
+    :param int origin: Peer id of the sender
+    :param int seq: Sequence number of the batch for this origin
+    :param int clock: Lamport clock the deltas were written at
+    :param deltas: (object_id, field index, value) triples
+    :returns bytes
+    """
+    out = bytearray()
+    deltas = list(deltas)
+    for value in (origin, seq, clock, len(deltas)):
+        _write_varint(out, value)
+    for object_id, field, value in deltas:
+        _write_varint(out, object_id << _FIELD_BITS | field)
+        _write_varint(out, value << 1 if value >= 0 else (~value << 1) | 1)
+    return bytes(out)
+
+
+def decode_batch(data) -> (int, int, int, list):
+    """
+    Decodes a batch written by encode_batch.
+
+    :param data: bytes-like batch
+    :returns (origin, seq, clock, [(object_id, field index, value), ...])
+    :raises: ValueError
+    """
+    header = []
+    offset = 0
+    for _ in range(4):
+        value, offset = _read_varint(data, offset)
+        header.append(value)
+    origin, seq, clock, count = header
+    deltas = []
+    for _ in range(count):
+        key, offset = _read_varint(data, offset)
+        value, offset = _read_varint(data, offset)
+        field = key & (1 << _FIELD_BITS) - 1
+        if field >= len(_FIELDS):
+            raise ValueError("Unknown field {} in sync batch".format(field))
+        deltas.append((key >> _FIELD_BITS, field,
+                       value >> 1 if not value & 1 else ~(value >> 1)))
+    if offset != len(data):
+        raise ValueError("Trailing bytes after sync batch")
+    return origin, seq, clock, deltas
+
+
+class SyncSession(object):
+    """
+    Keeps tracked AbilityScores in step with the same objects on other
+    peers.
+
+    The session does not own a connection; it hands encoded batches to a
+    send callable and is fed incoming batches through receive().
+    """
+
+    def __init__(self, peer_id: int, send: Callable[[bytes], None],
+                 interval: float=TICK_INTERVAL):
+        """
+        :param int peer_id: Id of this peer, unique within the session
+        :param send: Called with every encoded batch to broadcast
+        :param float interval: Seconds between two flushes when started
+        """
+        self.peer_id = peer_id
+        self.interval = interval
+        self._send = send
+        self._objects = {}
+        self._connections = {}
+        self._pending = {}
+        self._registers = {}
+        self._versions = {}
+        self._held = {}
+        self._seq = 0
+        self._clock = 0
+        self._applying = False
+        self._task = None
+        self.bytes_sent = 0  #: Total size of the batches sent
+        self.deltas_sent = 0  #: Total number of field deltas sent
+        self.deltas_applied = 0  #: Total number of remote deltas applied
+
+    @property
+    def version_vector(self) -> dict:
+        """Returns the highest batch sequence applied, by origin peer"""
+        versions = dict(self._versions)
+        if self._seq:
+            versions[self.peer_id] = self._seq
+        return versions
+
+    def track(self, object_id: int, scores):
+        """
+        Starts syncing an AbilityScores object under a shared id.
+
+        Values already received for the id are applied straight away.
+
+        :param int object_id: Id of the object, the same on every peer
+        :param scores: Qt AbilityScores (anything with the score properties
+            and ``*_changed`` signals)
+        :raises: ValueError if the id is already tracked
+        """
+        if object_id in self._objects:
+            raise ValueError("Object {} is already tracked".format(object_id))
+        self._objects[object_id] = scores
+        slots = []
+        for field, name in enumerate(_FIELDS):
+            slot = partial(self._changed, object_id, field)
+            getattr(scores, name + "_changed").connect(slot)
+            slots.append(slot)
+        self._connections[object_id] = slots
+        for field in range(len(_FIELDS)):
+            register = self._registers.get((object_id, field))
+            if register is not None:
+                self._set(scores, field, register[2])
+
+    def untrack(self, object_id: int):
+        """
+        Stops syncing an object; pending changes to it are dropped.
+
+        :param int object_id: Id the object was tracked under
+        """
+        scores = self._objects.pop(object_id)
+        for name, slot in zip(_FIELDS, self._connections.pop(object_id)):
+            getattr(scores, name + "_changed").disconnect(slot)
+        for field in range(len(_FIELDS)):
+            self._pending.pop((object_id, field), None)
+
+    def _changed(self, object_id: int, field: int, value: int):
+        if not self._applying:
+            self._pending[(object_id, field)] = value
+
+    def _set(self, scores, field: int, value: int):
+        self._applying = True
+        try:
+            setattr(scores, _FIELDS[field], value)
+        finally:
+            self._applying = False
+
+    def flush(self) -> bytes:
+        """
+        Broadcasts the changes made since the last flush as one batch.
+
+        :returns The batch sent, or None if nothing changed
+        """
+        if not self._pending:
+            return None
+        self._clock += 1
+        self._seq += 1
+        deltas = [(object_id, field, value)
+                  for (object_id, field), value in self._pending.items()]
+        self._pending.clear()
+        for object_id, field, value in deltas:
+            self._registers[(object_id, field)] = \
+                (self._clock, self.peer_id, value)
+        batch = encode_batch(self.peer_id, self._seq, self._clock, deltas)
+        self.bytes_sent += len(batch)
+        self.deltas_sent += len(deltas)
+        self._send(batch)
+        return batch
+
+    def receive(self, data):
+        """
+        Applies a batch received from another peer.
+
+        A delta whose value the tracked object rejects (e.g. a negative
+        score) is skipped; the rest of the batch is still applied, so later
+        batches from the same peer are not held back.
+
+        :param data: bytes-like batch from encode_batch
+        :raises: ValueError if the batch is malformed, or once it has been
+            applied if any of its deltas were skipped
+        """
+        origin, seq, clock, deltas = decode_batch(data)
+        if origin == self.peer_id:
+            return
+        applied = self._versions.get(origin, 0)
+        if seq <= applied:
+            return
+        held = self._held.setdefault(origin, {})
+        held[seq] = (clock, deltas)
+        rejected = []
+        while applied + 1 in held:
+            applied += 1
+            rejected.extend(self._apply(origin, *held.pop(applied)))
+        if applied:
+            self._versions[origin] = applied
+        if not held:
+            del self._held[origin]
+        if rejected:
+            raise ValueError("Skipped invalid deltas from peer {}: {}".format(
+                origin, rejected))
+
+    def _apply(self, origin: int, clock: int, deltas: list) -> list:
+        """Applies one batch in order, returns the deltas it skipped"""
+        self._clock = max(self._clock, clock)
+        stamp = (clock, origin)
+        rejected = []
+        for object_id, field, value in deltas:
+            key = (object_id, field)
+            register = self._registers.get(key)
+            if register is not None and register[:2] >= stamp:
+                continue
+            # The register only takes values the object accepted, so that
+            # both stay in step
+            scores = self._objects.get(object_id)
+            try:
+                if value < 0:
+                    raise ValueError("AbilityScores cannot be negative")
+                if scores is not None:
+                    self._set(scores, field, value)
+            except ValueError:
+                rejected.append((object_id, field, value))
+                continue
+            self._registers[key] = (clock, origin, value)
+            # The remote write is newer than anything published here, so
+            # it also supersedes an unflushed local change to the field
+            self._pending.pop(key, None)
+            self.deltas_applied += 1
+        return rejected
+
+    async def run(self):
+        """Flushes the pending changes every interval until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval)
+            self.flush()
+
+    def start(self) -> asyncio.Task:
+        """
+        Schedules run() on the current event loop.
+
+        :returns The running task
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    def stop(self):
+        """Cancels the flush task and sends any pending changes"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.flush()
+
+
+class LoopbackNetwork(object):
+    """
+    An in-process broadcast network for tests and benchmarks.
+
+    Batches are delivered to every other peer through the event loop, as
+    a real transport would, optionally after a simulated latency.
+    """
+
+    def __init__(self, latency: float=0.0):
+        """
+        :param float latency: Seconds before a batch reaches the peers
+        """
+        self.latency = latency
+        self.sessions = {}
+        self.bytes_delivered = 0
+
+    def session(self, peer_id: int,
+                interval: float=TICK_INTERVAL) -> SyncSession:
+        """
+        Creates a SyncSession connected to this network.
+
+        :param int peer_id: Id of the new peer
+        :param float interval: Seconds between two flushes when started
+        :returns SyncSession
+        :raises: ValueError if the peer id is taken
+        """
+        if peer_id in self.sessions:
+            raise ValueError("Peer {} already joined".format(peer_id))
+        session = SyncSession(peer_id, partial(self._broadcast, peer_id),
+                              interval)
+        self.sessions[peer_id] = session
+        return session
+
+    def _broadcast(self, origin: int, data: bytes):
+        loop = asyncio.get_running_loop()
+        for peer_id, session in self.sessions.items():
+            if peer_id != origin:
+                self.bytes_delivered += len(data)
+                if self.latency:
+                    loop.call_later(self.latency, session.receive, data)
+                else:
+                    loop.call_soon(session.receive, data)
@@ -10,7 +10,7 @@
 import unittest
 
 from context import take10
-from take10 import abilities
+from take10 import _compat, abilities
 
 
 class TestAbilities(unittest.TestCase):
@@ -35,6 +35,82 @@ class TestAbilities(unittest.TestCase):
             scores.charisma = -1
             scores.deterity = 19
 
+    def test_register_generator(self):
+        """Tests adding generators to the registry"""
+
+        class FlatScoreGenerator(abilities.AbilityScoreGenerator):
+
+            @staticmethod
+            def generate_scores(**kwargs):
+                return abilities.AbilityScores(10, 10, 10, 10, 10, 10)
+
+        abilities.register_generator(FlatScoreGenerator)
+        try:
+            self.assertIs(
+                FlatScoreGenerator.generate_scores,
+                abilities.SCORE_GENERATORS["FlatScoreGenerator"])
+            with self.assertRaises(ValueError):
+                abilities.register_generator(
+                    type("FlatScoreGenerator", (FlatScoreGenerator,), {}))
+        finally:
+            abilities.unregister_generator("FlatScoreGenerator")
+        self.assertNotIn("FlatScoreGenerator", abilities.SCORE_GENERATORS)
+        with self.assertRaises(ValueError):
+            abilities.register_generator(dict)
+
+    @unittest.skipIf(_compat.numpy is None, "numpy is not installed")
+    def test_generate_population(self):
+        """Tests bulk score generation for every generator"""
+        bounds = {
+            "StandardScoreGenerator": (3, 18),
+            "ClassicScoreGenerator": (3, 18),
+            "HeroicScoreGenerator": (8, 18),
+            "PointBuyScoreGenerator": (7, 18),
+        }
+        for name, (low, high) in bounds.items():
+            scores = abilities.generate_population(name, 1000, seed=1)
+            self.assertEqual((1000, 6), scores.shape)
+            self.assertGreaterEqual(scores.min(), low)
+            self.assertLessEqual(scores.max(), high)
+
+    @unittest.skipIf(_compat.numpy is None, "numpy is not installed")
+    def test_population_reproducible(self):
+        """Tests that populations are reproducible from their seed"""
+        first = abilities.generate_population(
+            "StandardScoreGenerator", 10, seed=42)
+        again = abilities.generate_population(
+            "StandardScoreGenerator", 10, seed=42, as_scores=True)
+        self.assertListEqual(
+            first.tolist(),
+            [list(s.scores_as_dict().values()) for s in again]
+        )
+        with self.assertRaises(KeyError):
+            abilities.generate_population("PointBuy", 10)
+
+    def test_score_block(self):
+        """Tests the Qt-free ScoreBlock value type"""
+        block = abilities.ScoreBlock(10, 12, 14, 8, 13, 15)
+        self.assertEqual((10, 12, 14, 8, 13, 15), block.as_tuple())
+        self.assertEqual(14, block.scores_as_dict()["INTELLIGENCE"])
+        block.wisdom = 9
+        self.assertEqual(abilities.ScoreBlock(10, 12, 14, 9, 13, 15), block)
+        with self.assertRaises(ValueError):
+            block.strength = -1
+        with self.assertRaises(AttributeError):
+            block.luck = 3
+
+    def test_change_signals(self):
+        """Tests that AbilityScores forwards changes and emits signals"""
+        scores = abilities.AbilityScores(10, 12, 14, 8, 13, 15)
+        changes = []
+        scores.dexterity_changed.connect(changes.append)
+        scores.dexterity = 16
+        scores.dexterity = 16
+        self.assertListEqual([16], changes)
+        self.assertEqual(16, scores.core.dexterity)
+        wrapped = abilities.AbilityScores.from_block(scores.core)
+        self.assertIs(scores.core, wrapped.core)
+
 
 if __name__ == "__main__":
     unittest.main()
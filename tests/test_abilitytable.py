@@ -0,0 +1,70 @@
+"""
+.. module:: test_abilitytable
+   :platform: Unix, Windows
+   :synopsis: Tests for columnar ability score storage
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+import os
+import tempfile
+import unittest
+
+from context import take10
+from take10 import _compat, abilities
+from take10.abilities import AbilityClass
+from take10.abilitytable import AbilityScoreTable
+
+
+@unittest.skipIf(_compat.numpy is None, "numpy is not installed")
+class TestAbilityScoreTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = AbilityScoreTable.from_array([
+            [16, 10, 8, 12, 11, 14],
+            [9, 18, 13, 10, 7, 12],
+            [17, 12, 15, 8, 10, 13],
+        ])
+
+    def test_filters_and_modifiers(self):
+        """Tests vectorized filters and modifier computation"""
+        self.assertListEqual(
+            [0, 2], self.table.where(STRENGTH=(16, None)).tolist())
+        self.assertListEqual(
+            [2], self.table.where(STRENGTH=(16, None),
+                                  INTELLIGENCE=(10, None)).tolist())
+        self.assertListEqual(
+            [3, -1, 3],
+            self.table.modifiers(AbilityClass.STRENGTH).tolist())
+
+    def test_row_views(self):
+        """Tests that rows are views behaving like AbilityScores"""
+        row = self.table[1]
+        self.assertEqual(18, row.dexterity)
+        row.dexterity = 20
+        self.assertEqual(20, self.table.column(AbilityClass.DEXTERITY)[1])
+        self.assertEqual(20, row.scores_as_dict()["DEXTERITY"])
+        with self.assertRaises(ValueError):
+            row.wisdom = -1
+        with self.assertRaises(ValueError):
+            row.strength = 200
+        self.assertEqual(20, row.dexterity)
+        with self.assertRaises(IndexError):
+            self.table[3]
+        self.table.append(abilities.ScoreBlock(1, 2, 3, 4, 5, 6))
+        self.assertEqual((1, 2, 3, 4, 5, 6), self.table[-1].as_tuple())
+
+    def test_memory_mapped_roundtrip(self):
+        """Tests saving and memory-mapping a table"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "roster.npy")
+            self.table.save(path)
+            loaded = AbilityScoreTable.load(path)
+            self.assertEqual(len(self.table), len(loaded))
+            self.assertEqual(self.table[2].as_tuple(), loaded[2].as_tuple())
+            del loaded
+
+
+if __name__ == "__main__":
+    unittest.main()
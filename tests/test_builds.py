@@ -0,0 +1,105 @@
+"""
+.. module:: test_builds
+   :platform: Unix, Windows
+   :synopsis: Tests for the build search over race bonus options
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+import unittest
+
+from context import take10
+from take10 import builds
+from take10.abilities import AbilityClass, AbilityScores
+from take10.builds import Concept, best_build
+from take10.races import Race
+from take10.skills import SkillClass, SkillSet
+
+
+class Human(Race):
+    """+2 to any one ability, with every option listed twice"""
+
+    pulled = 0
+
+    def get_starting_ability_bonus(self):
+        for _ in range(2):
+            for ability in AbilityClass:
+                Human.pulled += 1
+                bonus = AbilityScores(0, 0, 0, 0, 0, 0)
+                setattr(bonus, ability.name.lower(), 2)
+                yield bonus
+
+    def get_starting_skill_bonus(self):
+        yield SkillSet(SWIM=1)
+        yield SkillSet(SWIM=1, CLIMB=1)
+        yield SkillSet(PERCEPTION=2)
+
+
+class Dwarf(Race):
+    """+2 Con and Wis, -2 Cha, or a dominated +2 Con"""
+
+    def get_starting_ability_bonus(self):
+        return [(0, 0, 0, 0, 0, 2), (0, 0, 0, 2, -2, 2)]
+
+    def get_starting_skill_bonus(self):
+        return []
+
+
+class TestBuilds(unittest.TestCase):
+
+    def setUp(self):
+        builds.clear_cache()
+        Human.pulled = 0
+
+    def test_lazy_options(self):
+        """Tests that options are pulled lazily, deduplicated and cached"""
+        options = builds.ability_bonus_options(Human)
+        self.assertEqual((2, 0, 0, 0, 0, 0), next(options))
+        self.assertEqual(1, Human.pulled)
+        self.assertEqual(6, len(list(builds.ability_bonus_options(Human()))))
+        self.assertEqual(12, Human.pulled)
+        self.assertEqual(6, len(list(options)) + 1)
+        list(builds.ability_bonus_options(Human))
+        self.assertEqual(12, Human.pulled)
+
+    def test_prune_dominated(self):
+        """Tests dropping options that are never better"""
+        self.assertListEqual(
+            [(1, 1, 0), (0, 0, 2)],
+            builds.prune_dominated([(1, 0, 0), (1, 1, 0), (0, 0, 2),
+                                    (1, 1, 0), (0, 0, 1)]))
+        skills = list(builds.skill_bonus_options(Human))
+        self.assertEqual(2, len(builds.prune_dominated(skills)))
+
+    def test_best_build(self):
+        """Tests choosing bonuses and assigning an array for a concept"""
+        fighter = Concept({AbilityClass.STRENGTH: 3,
+                           AbilityClass.CONSTITUTION: 2,
+                           AbilityClass.DEXTERITY: 1},
+                          minimums={AbilityClass.INTELLIGENCE: 13},
+                          skill_weights={SkillClass.CLIMB: 1})
+        build = best_build(Human, [15, 14, 13, 12, 10, 8], fighter)
+        self.assertEqual((17, 12, 13), build.scores[:3])
+        self.assertEqual(14, build.scores[AbilityClass.CONSTITUTION.value])
+        self.assertEqual({8, 10}, set(build.base[3:5]))
+        self.assertEqual(1, build.skill_bonus[SkillClass.CLIMB.value])
+        self.assertIs(build, best_build(Human, (8, 10, 12, 13, 14, 15),
+                                        fighter))
+        with self.assertRaises(AttributeError):
+            build.value = (100, 0)
+        cleric = Concept({AbilityClass.WISDOM: 1})
+        build = best_build(Dwarf, AbilityScores(10, 10, 10, 15, 12, 10),
+                           cleric, assign=False)
+        self.assertEqual((10, 10, 10, 17, 10, 12), build.scores)
+        self.assertIsNone(build.skill_bonus)
+        picky = Concept({}, minimums={AbilityClass.CHARISMA: 19})
+        self.assertIsNone(best_build(Dwarf, [18] * 6, picky))
+        with self.assertRaises(ValueError):
+            Concept({AbilityClass.CHARISMA: -1})
+        with self.assertRaises(ValueError):
+            best_build(Human, [10] * 5, cleric)
+
+
+if __name__ == '__main__':
+    unittest.main()
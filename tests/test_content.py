@@ -0,0 +1,180 @@
+"""
+.. module:: test_content
+   :platform: Unix, Windows
+   :synopsis: Tests for the memory-mapped content database
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+import os
+import tempfile
+import unittest
+from fractions import Fraction
+
+from context import take10
+from take10.abilities import AbilityClass
+from take10.content import ContentFile, Creature, RaceEntry, write_content
+from take10.encounter import Combatant
+from take10.item import Item, ItemType
+from take10.races import Race
+from take10.sizes import SizeClass
+
+
+class Gnome(Race):
+    race_id = 902
+    size = SizeClass.Small
+
+    def get_starting_ability_bonus(self):
+        yield (-2, 0, 0, 0, 2, 2)
+        yield (-2, 0, 0, 0, 2, 2)
+
+    def get_starting_skill_bonus(self):
+        return ()
+
+
+CREATURES = [
+    Creature("Goblin", SizeClass.Small, "1/3", (11, 15, 10, 9, 6, 12), 6, 16,
+             "1d4", 1),
+    Creature("Goblin Dog", SizeClass.Medium, 1, (15, 13, 2, 12, 8, 15), 9, 13,
+             "1d6+2"),
+    Creature("Ogre", SizeClass.Large, 3, (21, 8, 6, 10, 7, 15), 30, 17,
+             "2d8+7", 3),
+    Creature("Giant Rat", SizeClass.Small, Fraction(1, 3),
+             (10, 17, 2, 13, 4, 13), 5, 14, "1d4", 0, AbilityClass.DEXTERITY),
+    Creature("Kobold", SizeClass.Small, Fraction(1, 4),
+             (9, 13, 10, 9, 8, 10), 5, 15, "1d6"),
+]
+
+
+class TestContent(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "content.t10")
+        self.items = [
+            Item("Rope", 5.0, desc="50 feet of hemp", tags=["gear", "rope"]),
+            ItemType("Longsword", 2.0, "A trusty blade, é"),
+            Item("Rations", 0.5, tags=["food"]),
+        ]
+        self.counts = write_content(
+            self.path, races=[Gnome, RaceEntry("Troll", size=SizeClass.Large)],
+            items=self.items, creatures=CREATURES)
+        self.content = ContentFile(self.path)
+
+    def tearDown(self):
+        self.content.close()
+        self.directory.cleanup()
+
+    def test_records(self):
+        """Tests that every record decodes back to its definition"""
+        content = self.content
+        self.assertEqual({"race": 2, "item": 3, "creature": 5}, self.counts)
+        self.assertEqual(5, content.count("creature"))
+        for index, creature in enumerate(CREATURES):
+            self.assertEqual(creature, content.creature(index))
+        self.assertEqual(Fraction(1, 3), content.creature(0).cr)
+        self.assertEqual(
+            RaceEntry("Gnome", 902, SizeClass.Small, [(-2, 0, 0, 0, 2, 2)]),
+            content.race(0))
+        self.assertEqual((), content.race(-1).ability_bonuses)
+        rope = content.item(0)
+        self.assertEqual(("Rope", 5.0, "50 feet of hemp"),
+                         (rope.name, rope.weight, rope.desc))
+        self.assertEqual(frozenset(("gear", "rope")), rope.tags)
+        self.assertEqual("A trusty blade, é", content.item(1).desc)
+        self.assertIsNone(content.item(2).desc)
+        with self.assertRaises(IndexError):
+            content.creature(5)
+        combatant = content.creature(2).combatant()
+        self.assertIsInstance(combatant, Combatant)
+        self.assertEqual(8, combatant.attack_bonus)
+
+    def test_interning(self):
+        """Tests that repeated strings are stored once"""
+        damage = self.content.column("creature_damage")
+        self.assertEqual(damage[0], damage[3])
+        strings = str(self.content.column("strings"), "utf-8")
+        self.assertEqual(1, strings.count("1d4"))
+
+    def test_indexes(self):
+        """Tests the name, size and CR lookups"""
+        content = self.content
+
+        def names(indices, kind="creature"):
+            return [content.name(kind, i) for i in indices]
+        self.assertEqual(["Goblin", "Goblin Dog"],
+                         names(content.by_name("creature", "gob")))
+        self.assertEqual(["Giant Rat", "Goblin", "Goblin Dog", "Kobold",
+                          "Ogre"], names(content.by_name("creature")))
+        self.assertEqual([], names(content.by_name("creature", "z")))
+        self.assertEqual(["Longsword"],
+                         names(content.by_name("item", "LONG"), "item"))
+        self.assertEqual(1, content.find("creature", "goblin dog"))
+        with self.assertRaises(KeyError):
+            content.find("creature", "gob")
+        self.assertEqual(["Goblin", "Giant Rat", "Kobold"],
+                         names(content.by_size("creature", SizeClass.Small)))
+        self.assertEqual([], names(content.by_size("creature",
+                                                   SizeClass.Huge)))
+        self.assertEqual(["Troll"],
+                         names(content.by_size("race", SizeClass.Large),
+                               "race"))
+        self.assertEqual(["Goblin", "Giant Rat"],
+                         names(content.by_cr("1/3")))
+        self.assertEqual(["Kobold", "Goblin", "Giant Rat", "Goblin Dog"],
+                         names(content.by_cr(0, 1)))
+        self.assertEqual([], names(content.by_cr(4, 30)))
+
+    def test_invalid(self):
+        """Tests rejecting bad definitions and files"""
+        with self.assertRaises(ValueError):
+            Creature("Blob", SizeClass.Medium, -1, (10,) * 6, 5, 10, "1d4")
+        with self.assertRaises(ValueError):
+            Creature("Blob", SizeClass.Medium, 1, (10,) * 5, 5, 10, "1d4")
+        with self.assertRaises(ValueError):
+            RaceEntry("Blob", ability_bonuses=[(1, 2)])
+        path = os.path.join(self.directory.name, "empty.t10")
+        write_content(path)
+        with ContentFile(path) as content:
+            self.assertEqual(0, content.count("race"))
+            self.assertEqual(0, len(content.by_cr(0, 30)))
+        with open(path, "wb") as out:
+            out.write(b"T10T" + bytes(1024))
+        with self.assertRaises(ValueError):
+            ContentFile(path)
+
+    def test_results_after_close(self):
+        """Tests keeping query results past the end of a with block"""
+        with ContentFile(self.path) as content:
+            by_cr = content.by_cr(0, 1)
+            by_name = content.by_name("creature")
+            small = content.by_size("creature", SizeClass.Small)
+            crs = content.column("creature_cr")
+        self.assertEqual([4, 0, 3, 1], list(by_cr))
+        self.assertEqual([3, 0, 1, 4, 2], list(by_name))
+        self.assertEqual([0, 3, 4], list(small))
+        self.assertEqual(3.0, crs[2])
+        content.close()
+        for result in (by_cr, by_name, small, crs):
+            result.release()
+
+    def test_malformed_file(self):
+        """Tests that sections outside the file raise ValueError"""
+        with open(self.path, "rb") as source:
+            data = source.read()
+        # The first section table entry is the string_offsets section
+        offset = 24
+        for bad in (data[:-3], data[:offset] + (1 << 40).to_bytes(8, "little")
+                    + data[offset + 8:],
+                    data[:offset + 8] + (3).to_bytes(8, "little")
+                    + data[offset + 16:]):
+            path = os.path.join(self.directory.name, "bad.t10")
+            with open(path, "wb") as out:
+                out.write(bad)
+            with self.assertRaises(ValueError):
+                ContentFile(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
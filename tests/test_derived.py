@@ -0,0 +1,130 @@
+"""
+.. module:: test_derived
+   :platform: Unix, Windows
+   :synopsis: Tests for incrementally derived statistics
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+import unittest
+
+from context import take10
+from take10 import derived
+from take10.abilities import AbilityClass, AbilityScores
+from take10.charactersheet import CharacterSheet
+from take10.derived import DerivedStats, Encumbrance
+from take10.inventory import Inventory
+from take10.item import Item
+from take10.skills import SkillClass, SkillSet
+
+
+def make_sheet() -> CharacterSheet:
+    return CharacterSheet(
+        "Amiri", None, CharacterSheet.Alignment.CHAOTIC_NEUTRAL, None,
+        CharacterSheet.Sex.FEMALE, AbilityScores(14, 13, 8, 12, 10, 16),
+        SkillSet(CLIMB=2, PERCEPTION=1))
+
+
+class TestDerived(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduled = []
+        self.sheet = make_sheet()
+        self.pack = Inventory("Backpack", 2.0)
+        self.stats = DerivedStats(self.sheet, self.pack,
+                                  scheduler=self.scheduled.append)
+        self.emitted = []
+        self.stats.changed.connect(self.emitted.append)
+
+    def run_scheduled(self):
+        while self.scheduled:
+            self.scheduled.pop(0)()
+
+    def test_carrying_capacity(self):
+        """Tests the carrying capacity table"""
+        self.assertEqual((3, 6, 10), derived.carrying_capacity(1))
+        self.assertEqual((58, 116, 175), derived.carrying_capacity(14))
+        self.assertEqual((533, 1066, 1600), derived.carrying_capacity(30))
+        self.assertEqual(Encumbrance.LIGHT, derived.encumbrance((3, 6, 10), 3))
+        self.assertEqual(Encumbrance.HEAVY, derived.encumbrance((3, 6, 10), 7))
+        self.assertEqual(Encumbrance.OVERLOADED,
+                         derived.encumbrance((3, 6, 10), 10.5))
+        with self.assertRaises(ValueError):
+            derived.carrying_capacity(-1)
+
+    def test_initial(self):
+        """Tests values computed from the sheet"""
+        self.assertEqual(2, self.stats.modifier(AbilityClass.STRENGTH))
+        self.assertEqual(4, self.stats.skill_total(SkillClass.CLIMB))
+        self.assertEqual(2, self.stats.skill_total(SkillClass.PERCEPTION))
+        self.assertEqual(-1, self.stats.skill_total(SkillClass.LINGUISTICS))
+        self.assertEqual((58, 116, 175), self.stats.carry_limits)
+        self.assertEqual(2.0, self.stats["carried_weight"])
+        self.assertEqual(Encumbrance.LIGHT, self.stats.encumbrance)
+
+    def test_coalesced(self):
+        """Tests that a burst of changes is flushed once"""
+        scores = self.sheet.ability_scores
+        scores.strength = 15
+        scores.strength = 16
+        scores.dexterity = 15
+        self.assertEqual(1, len(self.scheduled))
+        self.assertTrue(self.stats.pending)
+        self.run_scheduled()
+        self.assertEqual(1, len(self.emitted))
+        changed = self.emitted[0]
+        self.assertEqual(16, changed["strength"])
+        self.assertEqual(3, changed["strength_modifier"])
+        self.assertEqual(5, changed["climb"])
+        self.assertEqual(2, changed["acrobatics"])
+        self.assertEqual((76, 153, 230), changed["carry_limits"])
+        self.assertNotIn("perception", changed)
+        self.assertFalse(self.stats.pending)
+
+    def test_incremental(self):
+        """Tests that unchanged values stop the propagation"""
+        before = self.stats.recomputed
+        self.sheet.ability_scores.strength = 15
+        self.assertEqual({
+            "strength": 15, "carry_limits": (66, 133, 200),
+        }, self.stats.flush())
+        # strength, its modifier, carry limits and encumbrance
+        self.assertEqual(4, self.stats.recomputed - before)
+        self.assertEqual({}, self.stats.flush())
+
+    def test_skills(self):
+        """Tests rank changes"""
+        self.stats.set_skill_rank(SkillClass.PERCEPTION, 4)
+        self.assertEqual(5, self.stats.skill_total(SkillClass.PERCEPTION))
+        self.sheet.skills[SkillClass.SWIM] = 3
+        self.stats.skills_changed(SkillClass.SWIM)
+        self.assertEqual({"swim": 5}, self.stats.flush())
+
+    def test_inventory(self):
+        """Tests encumbrance following the carried weight"""
+        anvil = Item("Anvil", 70.0)
+        self.pack.add(anvil)
+        self.pack.add(Item("Rope", 10.0))
+        self.assertEqual(1, len(self.scheduled))
+        self.run_scheduled()
+        self.assertEqual(Encumbrance.MEDIUM, self.emitted[-1]["encumbrance"])
+        anvil.quantity = 2
+        self.assertEqual(Encumbrance.HEAVY, self.stats.encumbrance)
+        self.sheet.ability_scores.strength = 18
+        self.assertEqual(Encumbrance.MEDIUM, self.stats.encumbrance)
+        self.stats.detach()
+        self.sheet.ability_scores.strength = 3
+        self.pack.add(Item("Bedroll", 5.0))
+        self.assertFalse(self.stats.pending)
+
+    def test_requires_signals(self):
+        """Tests that plain ScoreBlocks are refused"""
+        sheet = make_sheet()
+        sheet.ability_scores = sheet.ability_scores.core
+        with self.assertRaises(TypeError):
+            DerivedStats(sheet)
+
+
+if __name__ == '__main__':
+    unittest.main()
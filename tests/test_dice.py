@@ -7,10 +7,13 @@
 
 """
 
+import itertools
 import unittest
+from unittest import mock
 
 from context import take10
 from take10 import dice
+from take10.dice import engine, expression
 
 
 class TestDice(unittest.TestCase):
@@ -39,6 +42,162 @@ class TestDice(unittest.TestCase):
             self.assertIsNone(next(dice.roll(0, 0)))
             self.assertIsNone(next(dice.roll(10, 0)))
 
+    def test_roll_routes_large_rolls(self):
+        """Tests that large rolls go through the batch engine"""
+        rolls = list(dice.roll(dice.BATCH_THRESHOLD, 6))
+        self.assertEqual(dice.BATCH_THRESHOLD, len(rolls))
+        self.assertTrue(all(1 <= r <= 6 for r in rolls))
+
+
+class TestRollMany(unittest.TestCase):
+
+    def test_roll_many_shape(self):
+        """Tests the shape and range of a batch roll"""
+        block = dice.roll_many(4, 6, 1000)
+        self.assertEqual(1000, len(block))
+        rows = list(block.rows())
+        self.assertEqual(1000, len(rows))
+        for row in rows:
+            self.assertEqual(4, len(row))
+            self.assertTrue(all(1 <= r <= 6 for r in row))
+
+    def test_reductions(self):
+        """Tests sum, keep and drop reductions against the raw rows"""
+        block = dice.roll_many(4, 6, 200)
+        rows = list(block.rows())
+        self.assertListEqual(
+            [sum(r) for r in rows], list(block.sum()))
+        self.assertListEqual(
+            [sum(sorted(r)[1:]) for r in rows], list(block.drop_lowest(1)))
+        self.assertListEqual(
+            [sum(sorted(r)[2:]) for r in rows], list(block.keep_highest(2)))
+        self.assertListEqual(
+            [sum(sorted(r)[:1]) for r in rows], list(block.keep_lowest(1)))
+        with self.assertRaises(ValueError):
+            block.keep_highest(5)
+
+    def test_slab_fallback(self):
+        """Tests the getrandbits fallback used without numpy"""
+        for sides in (1, 6, 20, 255, 256, 1000):
+            values = engine._draw_slab(5000, sides)
+            self.assertEqual(5000, len(values))
+            self.assertEqual(1, min(values))
+            self.assertLessEqual(max(values), sides)
+        block = dice.RollBlock(engine._draw_slab(30, 6), 10, 3)
+        rows = list(block.rows())
+        self.assertListEqual(
+            [sum(sorted(r)[1:]) for r in rows], list(block.drop_lowest()))
+
+    def test_roll_many_invalid(self):
+        """Tests for invalid batch roll values"""
+        with self.assertRaises(ValueError):
+            dice.roll_many(-1, 6, 10)
+        with self.assertRaises(ValueError):
+            dice.roll_many(1, 6, -10)
+        with self.assertRaises(ValueError):
+            dice.roll_many(1, 0, 10)
+        self.assertEqual(0, len(list(dice.roll_many(0, 6, 0).flat())))
+
+
+class TestExpression(unittest.TestCase):
+
+    def test_expression_range(self):
+        """Tests the range of compiled expressions"""
+        for text, low, high in (
+                ("4d6kh3+2d8+5", 10, 39),
+                ("4d6dl1", 3, 18),
+                ("2d20kl1", 1, 20),
+                ("3d6r1", 6, 18),
+                ("1d4ro<3", 1, 4),
+                ("-(1d4+2)*3", -18, -9),
+                ("d%", 1, 100),
+                ("10/3", 3, 3)):
+            totals = list(dice.evaluate(text, 500))
+            self.assertEqual(500, len(totals))
+            self.assertGreaterEqual(min(totals), low, text)
+            self.assertLessEqual(max(totals), high, text)
+
+    def test_reroll_and_explode(self):
+        """Tests that rerolled faces never show and exploding dice chain"""
+        self.assertNotIn(1, list(dice.evaluate("1d6r1", 1000)))
+        self.assertEqual({1, 2}, set(dice.evaluate("1d6r>=3", 1000)))
+        totals = list(dice.evaluate("1d2!", 1000))
+        self.assertNotIn(2, totals)
+        self.assertGreater(max(totals), 2)
+
+    def test_compile_cache(self):
+        """Tests that expressions compile once per normalized text"""
+        plan = dice.compile_expression("4d6kh3 + 2")
+        self.assertIs(plan, dice.compile_expression("4D6KH3+2"))
+        self.assertEqual(["4d6kh3"], [
+            "{}d{}kh{}".format(g.count, g.sides, g.keep)
+            for g in plan.groups()
+        ])
+        self.assertIsInstance(plan.roll_one(), int)
+
+    def test_rolled_zero_division(self):
+        """Tests that dividing by a rolled 0 raises with and without numpy"""
+        with self.assertRaises(ZeroDivisionError):
+            dice.evaluate("10/(1d2-1)", 200)
+        with mock.patch.object(expression, "numpy", None), \
+                mock.patch.object(engine, "numpy", None):
+            with self.assertRaises(ZeroDivisionError):
+                dice.evaluate("10/(1d2-1)", 200)
+            self.assertEqual([5] * 10, list(dice.evaluate("10/(1d1+1)", 10)))
+
+    def test_syntax_errors(self):
+        """Tests for invalid dice expressions"""
+        for text in ("", "4d6kh5", "1d6r<7", "2x3", "(1d6", "1/0", "1d6+"):
+            with self.assertRaises(dice.DiceSyntaxError):
+                dice.compile_expression(text)
+
+    def test_nesting_limit(self):
+        """Tests that deep nesting raises DiceSyntaxError, not a crash"""
+        depth = expression.MAX_DEPTH
+        for text in ("(" * 5000 + "1d6" + ")" * 5000, "-" * 5000 + "1d6",
+                     "+".join(["1d6"] * (depth + 1))):
+            with self.assertRaises(dice.DiceSyntaxError):
+                dice.compile_expression(text)
+        nested = "(" * (depth - 1) + "1d6" + ")" * (depth - 1)
+        self.assertTrue(1 <= dice.compile_expression(nested).roll_one() <= 6)
+        chain = "+".join(["1d6"] * depth)
+        self.assertTrue(depth <= dice.compile_expression(chain).roll_one()
+                        <= 6 * depth)
+
+
+class TestDistribution(unittest.TestCase):
+
+    def test_sum_distribution(self):
+        """Tests the exact distribution of a plain dice sum"""
+        dist = dice.distribution("3d6")
+        self.assertEqual((3, 18), (dist.minimum, dist.maximum))
+        self.assertAlmostEqual(27 / 216, dist.probability(10))
+        self.assertAlmostEqual(10.5, dist.mean)
+        self.assertAlmostEqual(1.0, dist.at_most(18))
+        self.assertAlmostEqual(0.5, dist.at_least(11))
+
+    def test_drop_lowest_distribution(self):
+        """Tests 4d6 drop lowest against brute force enumeration"""
+        counts = {}
+        for rolls in itertools.product(range(1, 7), repeat=4):
+            total = sum(sorted(rolls)[1:])
+            counts[total] = counts.get(total, 0) + 1
+        dist = dice.distribution("4d6dl1")
+        for total, count in counts.items():
+            self.assertAlmostEqual(count / 6 ** 4, dist.probability(total))
+        self.assertIs(dist, dice.distribution("4d6 DL1"))
+
+    def test_arithmetic_distribution(self):
+        """Tests distributions of arithmetic on dice"""
+        dist = dice.distribution("1d20-1d4+2")
+        self.assertEqual((-1, 21), (dist.minimum, dist.maximum))
+        self.assertAlmostEqual(10.0, dist.mean)
+        self.assertAlmostEqual(1 / 16, dice.distribution("1d4*1d4").
+                               probability(16))
+        self.assertAlmostEqual(4.2, dice.distribution("1d6!").mean)
+        self.assertAlmostEqual(0.0, dice.distribution("1d6r1").
+                               probability(1))
+
 
 if __name__ == "__main__":
     unittest.main()
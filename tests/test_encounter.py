@@ -0,0 +1,104 @@
+"""
+.. module:: test_encounter
+   :platform: Unix, Windows
+   :synopsis: Tests for the encounter simulator
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+import unittest
+
+from context import take10
+from take10 import _compat, encounter
+from take10.abilities import AbilityClass, AbilityScores
+from take10.charactersheet import CharacterSheet
+from take10.encounter import Combatant, Encounter
+from take10.rng import RollStream
+from take10.skills import SkillSet
+
+
+def fighter():
+    return Combatant("Fighter", (16, 12, 10, 10, 8, 14), 20, 18, "1d8+3",
+                     base_attack=2)
+
+
+def goblin():
+    return Combatant("Goblin", (11, 15, 10, 9, 6, 12), 6, 16, "1d6",
+                     base_attack=1, skills=SkillSet(STEALTH=4))
+
+
+class TestEncounter(unittest.TestCase):
+
+    def test_combatant(self):
+        """Tests deriving combat numbers from scores and skills"""
+        sheet = CharacterSheet(
+            "Valeros", None, CharacterSheet.Alignment.NEUTRAL_GOOD, None,
+            CharacterSheet.Sex.MALE, AbilityScores(16, 12, 10, 14, 8, 14),
+            SkillSet(PERCEPTION=3))
+        valeros = Combatant.from_sheet(sheet, 12, 17, "1d8 + 3", 1,
+                                       AbilityClass.DEXTERITY)
+        self.assertEqual(2, valeros.attack_bonus)
+        self.assertEqual(5, valeros.perception)
+        self.assertEqual(1, valeros.stealth)
+        self.assertEqual(1, valeros.initiative)
+        self.assertEqual("1d8+3", valeros.damage)
+        self.assertEqual(6, goblin().stealth)
+        with self.assertRaises(ValueError):
+            Combatant("Ghost", (10,) * 6, 0, 10, "1d4")
+        with self.assertRaises(ValueError):
+            Encounter([fighter()], [])
+
+    @unittest.skipIf(_compat.numpy is None, "numpy is not installed")
+    def test_simulate(self):
+        """Tests that outcomes add up and are reproducible"""
+        fight = Encounter([fighter()], [goblin(), goblin(), goblin()])
+        stats = encounter.simulate(fight, 3000, RollStream(1), workers=1,
+                                   chunk=1000)
+        self.assertEqual(3000, stats.encounters)
+        self.assertEqual(3000, sum(stats.wins) + stats.draws)
+        self.assertEqual(sum(stats.wins), sum(stats.rounds))
+        self.assertEqual(stats.wins[encounter.MONSTERS], stats.party_deaths)
+        self.assertGreater(stats.win_rate(), 0.6)
+        self.assertLess(stats.win_rate(), 0.95)
+        self.assertLess(stats.win_rate_error(), 0.01)
+        self.assertGreater(stats.mean_rounds(), 3)
+        again = encounter.simulate(fight, 3000, RollStream(1), workers=1,
+                                   chunk=1000)
+        self.assertEqual((stats.wins, stats.rounds),
+                         (again.wins, again.rounds))
+
+    @unittest.skipIf(_compat.numpy is None, "numpy is not installed")
+    def test_one_sided(self):
+        """Tests encounters with a certain outcome"""
+        giant = Combatant("Giant", (30, 10, 10, 10, 10, 30), 500, 40,
+                          "4d6+20", base_attack=10)
+        stats = encounter.simulate(Encounter([giant], [goblin()]), 500,
+                                   RollStream(2), workers=1)
+        self.assertEqual(500, stats.wins[encounter.PARTY])
+        self.assertEqual(0, stats.party_deaths)
+        stalemate = Encounter(
+            [Combatant("Wall", (1, 10, 10, 10, 10, 10), 50, 99, "1")],
+            [Combatant("Wall", (1, 10, 10, 10, 10, 10), 50, 99, "1")],
+            max_rounds=3)
+        stats = encounter.simulate(stalemate, 200, RollStream(3), workers=1)
+        self.assertEqual(200, stats.draws)
+        self.assertEqual(0.0, stats.mean_rounds())
+
+    @unittest.skipIf(_compat.numpy is None, "numpy is not installed")
+    def test_streaming_workers(self):
+        """Tests streaming partial totals from worker processes"""
+        fight = Encounter([fighter()], [goblin(), goblin()])
+        partial = [s.encounters for s in encounter.simulate_iter(
+            fight, 2000, RollStream(4), workers=2, chunk=500)]
+        self.assertEqual([500, 1000, 1500, 2000], partial)
+        pooled = encounter.simulate(fight, 2000, RollStream(4), workers=2,
+                                    chunk=500)
+        local = encounter.simulate(fight, 2000, RollStream(4), workers=1,
+                                   chunk=500)
+        self.assertEqual((local.wins, local.rounds),
+                         (pooled.wins, pooled.rounds))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+.. module:: test_imports
+   :platform: Unix, Windows
+   :synopsis: Tests that optional dependencies load lazily
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+from context import take10
+from take10 import _compat
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def loaded_modules(statement: str) -> set:
+    """Runs a statement in a fresh interpreter, returns sys.modules keys"""
+    output = subprocess.check_output(
+        [sys.executable, "-c",
+         statement + "; import sys; print(' '.join(sys.modules))"],
+        cwd=ROOT, universal_newlines=True)
+    return set(output.split())
+
+
+class TestImports(unittest.TestCase):
+
+    def test_lazy_dependencies(self):
+        """Tests that importing take10 modules loads no heavy dependency"""
+        modules = loaded_modules(
+            "import take10.dice, take10.abilities, take10.races, "
+            "take10.encounter, take10.scorestats")
+        for heavy in ("numpy", "PyQt5", "concurrent.futures",
+                      "take10._scoretable", "take10.dice.verifiable"):
+            self.assertNotIn(heavy, modules)
+        modules = loaded_modules(
+            "from take10.dice import RollVerifier, roll; roll(1, 6)")
+        self.assertIn("take10.dice.verifiable", modules)
+        self.assertNotIn("numpy", modules)
+        self.assertIn("PyQt5", loaded_modules(
+            "from take10.abilities import AbilityScores"))
+
+    @unittest.skipIf(_compat.numpy is None, "numpy is not installed")
+    def test_lazy_module(self):
+        """Tests the stand-in for a lazily imported module"""
+        self.assertIsNone(_compat.optional_module("take10_no_such_module"))
+        lazy = _compat.LazyModule("colorsys")
+        self.assertIn("lazy module 'colorsys'", repr(lazy))
+        self.assertEqual((0.0, 0.0, 1.0), lazy.rgb_to_hsv(1.0, 1.0, 1.0))
+        self.assertIn("rgb_to_hsv", vars(lazy))
+        numpy = _compat.require_numpy("test")
+        self.assertIs(numpy, sys.modules["numpy"])
+
+
+if __name__ == '__main__':
+    unittest.main()
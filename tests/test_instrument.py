@@ -0,0 +1,103 @@
+"""
+.. module:: test_instrument
+   :platform: Unix, Windows
+   :synopsis: Tests for hot path instrumentation
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+import unittest
+
+from context import take10
+from take10 import abilities, derived, instrument, skills
+from take10.abilities import AbilityScores
+from take10.dice import engine
+from take10.item import Item
+from take10.skills import SkillClass
+
+
+class TestInstrument(unittest.TestCase):
+
+    def setUp(self):
+        self.roll = engine.roll
+        self.setter = Item.__dict__["weight"]
+        self.generate = abilities.SCORE_GENERATORS["ClassicScoreGenerator"]
+
+    def tearDown(self):
+        instrument.disable()
+        instrument.reset()
+
+    def test_enable_disable(self):
+        """Tests that disabling puts every original back"""
+        instrument.enable()
+        self.assertTrue(instrument.enabled())
+        self.assertIsNot(self.roll, engine.roll)
+        self.assertIs(engine.roll, abilities.roll)
+        self.assertIsNot(self.setter, Item.__dict__["weight"])
+        self.assertIs(skills.get_skill_ability_class,
+                      derived.get_skill_ability_class)
+        self.assertTrue(hasattr(derived.get_skill_ability_class,
+                                "__wrapped__"))
+        instrument.disable()
+        self.assertFalse(instrument.enabled())
+        self.assertIs(self.roll, engine.roll)
+        self.assertIs(self.roll, abilities.roll)
+        self.assertIs(self.setter, Item.__dict__["weight"])
+        self.assertIs(self.generate,
+                      abilities.SCORE_GENERATORS["ClassicScoreGenerator"])
+        self.assertIs(self.generate,
+                      abilities.ClassicScoreGenerator.generate_scores)
+        with self.assertRaises(ValueError):
+            instrument.enable("dice.explode")
+
+    def test_counts(self):
+        """Tests counting calls of the selected targets"""
+        instrument.enable("generate_scores.ClassicScoreGenerator",
+                          "dice.roll", "AbilityScores.strength", "Item")
+        abilities.SCORE_GENERATORS["ClassicScoreGenerator"]()
+        abilities.HeroicScoreGenerator.generate_scores()
+        scores = AbilityScores(10, 10, 10, 10, 10, 10)
+        scores.strength = 12
+        scores.dexterity = 12
+        rope = Item("Rope", 5.0)
+        rope.weight = 4.0
+        with self.assertRaises(ValueError):
+            rope.quantity = -1
+        skills.get_skill_ability_class(SkillClass.SWIM)
+        data = instrument.snapshot()
+        self.assertEqual(1, data["generate_scores.ClassicScoreGenerator"][
+            "calls"])
+        self.assertNotIn("generate_scores.HeroicScoreGenerator", data)
+        self.assertNotIn("skills.get_skill_ability_class", data)
+        self.assertNotIn("AbilityScores.dexterity", data)
+        self.assertEqual(12, data["dice.roll"]["calls"])
+        self.assertEqual(1, data["AbilityScores.strength"]["calls"])
+        self.assertEqual(12, scores.strength)
+        self.assertEqual(4.0, rope.weight)
+        self.assertEqual((1, 1), (data["Item.quantity"]["calls"],
+                                  data["Item.quantity"]["errors"]))
+        buckets = data["dice.roll"]["buckets"]
+        self.assertEqual(12, buckets["+Inf"])
+        self.assertEqual(sorted(buckets.values()), list(buckets.values()))
+        instrument.reset()
+        self.assertEqual(0, instrument.snapshot()["dice.roll"]["calls"])
+
+    def test_prometheus(self):
+        """Tests the Prometheus text export"""
+        instrument.enable("dice.roll")
+        engine.roll(3, 6)
+        text = instrument.prometheus()
+        self.assertIn("# TYPE take10_calls_total counter\n", text)
+        self.assertIn('take10_calls_total{target="dice.roll"} 1\n', text)
+        self.assertIn("# TYPE take10_call_duration_seconds histogram\n",
+                      text)
+        self.assertIn('take10_call_duration_seconds_bucket{target="dice.roll"'
+                      ',le="+Inf"} 1\n', text)
+        self.assertIn('take10_call_duration_seconds_count{target="dice.roll"'
+                      '} 1\n', text)
+        self.assertTrue(text.endswith("\n"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+.. module:: test_inventory
+   :platform: Unix, Windows
+   :synopsis: Inventory tests
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+import unittest
+
+from context import take10
+from take10.inventory import Inventory
+from take10.item import Item
+
+
+class TestInventory(unittest.TestCase):
+
+    def setUp(self):
+        self.character = Inventory("Character")
+        self.backpack = Inventory("Backpack", 2.0, tags=["bag"])
+        self.holding = Inventory("Bag of Holding", 7.5,
+                                 weightless_contents=True)
+        self.arrows = Item("Arrow", 0.05, 100, tags=["ammo"])
+        self.rope = Item("Rope", 5.0)
+        self.gold = Item("Gold", 0.01, 1000, tags=["coin"])
+        self.character.add(self.backpack)
+        self.character.add(self.rope)
+        self.backpack.add(self.holding)
+        self.backpack.add(self.arrows)
+        self.holding.add(self.gold)
+
+    def test_running_totals(self):
+        """Tests that totals follow item quantity and weight changes"""
+        self.assertAlmostEqual(19.5, self.character.total_weight())
+        self.arrows.quantity = 20
+        self.assertAlmostEqual(1.0, self.backpack.item_weight)
+        self.assertAlmostEqual(20, self.backpack.item_quantity)
+        self.assertAlmostEqual(15.5, self.character.total_weight())
+        self.rope.weight = 3.0
+        self.assertAlmostEqual(13.5, self.character.total_weight())
+
+    def test_nested_containers(self):
+        """Tests weightless contents and nested container weights"""
+        self.gold.quantity = 5000
+        self.assertAlmostEqual(57.5, self.holding.total_weight())
+        self.assertAlmostEqual(19.5, self.character.total_weight())
+        self.holding.weight = 15.0
+        self.assertAlmostEqual(27.0, self.character.total_weight())
+        self.backpack.remove(self.holding)
+        self.assertAlmostEqual(12.0, self.character.total_weight())
+        # A container inside itself, and one already held elsewhere
+        with self.assertRaises(ValueError):
+            self.backpack.add(self.character)
+        with self.assertRaises(ValueError):
+            self.holding.add(self.backpack)
+        self.holding.add(self.character)
+        self.assertAlmostEqual(15.0, self.holding.carried_weight())
+
+    def test_indexes(self):
+        """Tests name and tag lookups"""
+        self.assertListEqual([self.arrows], self.backpack.find("Arrow"))
+        self.assertListEqual([], self.character.find("Arrow"))
+        self.assertListEqual(
+            [self.arrows], self.character.find("Arrow", recursive=True))
+        self.assertListEqual([self.backpack], self.character.tagged("bag"))
+        self.arrows.name = "Bolt"
+        self.assertListEqual([self.arrows], self.backpack.find("Bolt"))
+        self.assertListEqual([], self.backpack.find("Arrow"))
+        self.assertListEqual([self.arrows], self.backpack.tagged("ammo"))
+        with self.assertRaises(ValueError):
+            self.character.add(self.arrows)
+
+    def test_listeners(self):
+        """Tests change notifications between reads of the total weight"""
+        calls = []
+        self.character.add_listener(lambda: calls.append(1))
+        self.character.total_weight()
+        self.arrows.quantity = 50
+        self.rope.weight = 4.0
+        self.assertEqual(1, len(calls))
+        self.gold.quantity = 10
+        self.character.total_weight()
+        self.assertEqual(1, len(calls))
+        self.backpack.weight = 3.0
+        self.assertEqual(2, len(calls))
+
+
+if __name__ == "__main__":
+    unittest.main()
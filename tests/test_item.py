@@ -21,5 +21,33 @@ class TestItem(unittest.TestCase):
             item.Item("Test", 1, -1)
 
 
+class TestItemStack(unittest.TestCase):
+
+    def test_item_type_interning(self):
+        """Tests that equal prototypes are shared and immutable"""
+        arrow = item.ItemType("Arrow", 0.05, "Pointy")
+        self.assertIs(arrow, item.ItemType("Arrow", 0.05, "Pointy"))
+        self.assertIsNot(arrow, item.ItemType("Arrow", 0.05))
+        with self.assertRaises(AttributeError):
+            arrow.weight = 1
+        with self.assertRaises(ValueError):
+            item.ItemType("Arrow", -1)
+
+    def test_load_item_stacks(self):
+        """Tests that the bulk loader deduplicates prototypes"""
+        stacks = item.load_item_stacks([
+            ("Rope", 5.0, 1, "Hemp"),
+            ("Rope", 5.0, 2, "Hemp"),
+            ("Torch", 1.0, 3, None),
+        ])
+        self.assertIs(stacks[0].type, stacks[1].type)
+        self.assertEqual(10.0, stacks[1].total_weight())
+        self.assertEqual("Torch", stacks[2].name)
+        with self.assertRaises(ValueError):
+            stacks[2].quantity = -1
+        stack = item.ItemStack.from_item(item.Item("Rope", 5.0, 4, "Hemp"))
+        self.assertIs(stacks[0].type, stack.type)
+
+
 if __name__ == "__main__":
     unittest.main()
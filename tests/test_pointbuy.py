@@ -0,0 +1,86 @@
+"""
+.. module:: test_pointbuy
+   :platform: Unix, Windows
+   :synopsis: Tests for point-buy allocation
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+import itertools
+import unittest
+
+from context import take10
+from take10.abilities import AbilityClass, PointBuyScoreGenerator
+from take10.pointbuy import POINT_BUY_COSTS, PointBuy
+from take10.rng import RollStream
+
+
+#: Cheaper scores only, to keep the brute force quick
+COSTS = {s: c for s, c in POINT_BUY_COSTS.items() if s <= 14}
+
+
+def brute_force(budgets):
+    arrays = {budget: [] for budget in budgets}
+    for scores in itertools.product(sorted(COSTS), repeat=6):
+        cost = sum(COSTS[s] for s in scores)
+        for (budget, exact), found in arrays.items():
+            if cost == budget or (not exact and cost <= budget):
+                found.append(scores)
+    return arrays
+
+
+class TestPointBuy(unittest.TestCase):
+
+    def test_matches_brute_force(self):
+        """Tests counting and listing against every possible array"""
+        arrays = brute_force([(0, True), (6, False), (15, True)])
+        for (budget, exact), expected in arrays.items():
+            buy = PointBuy(budget, COSTS, exact)
+            self.assertEqual(len(expected), buy.count())
+            self.assertListEqual(expected, list(buy.allocations()))
+        buy = PointBuy(15, COSTS, exact=True)
+        self.assertEqual(expected[1234], buy.allocation(1234))
+        with self.assertRaises(IndexError):
+            buy.allocation(len(expected))
+
+    def test_constraints(self):
+        """Tests listing arrays within minimum and maximum scores"""
+        buy = PointBuy(20)
+        wizards = list(buy.allocations(
+            minimums={AbilityClass.INTELLIGENCE: 17},
+            maximums={AbilityClass.STRENGTH: 8}))
+        self.assertEqual(len(wizards), buy.count(
+            minimums={AbilityClass.INTELLIGENCE: 17},
+            maximums={AbilityClass.STRENGTH: 8}))
+        self.assertTrue(all(s[2] >= 17 and s[0] <= 8 and buy.cost(s) <= 20
+                            for s in wizards))
+        self.assertIn((7, 14, 17, 10, 8, 10), wizards)
+        self.assertEqual(0, PointBuy(10).count(
+            minimums={a: 12 for a in AbilityClass}))
+        with self.assertRaises(ValueError):
+            PointBuy(10).random(minimums={AbilityClass.WISDOM: 19})
+        with self.assertRaises(ValueError):
+            buy.cost((10, 10, 10, 10, 10, 20))
+        with self.assertRaises(ValueError):
+            PointBuy(-1)
+
+    def test_generator(self):
+        """Tests drawing point-buy scores"""
+        scores = PointBuyScoreGenerator.generate_scores(
+            rng=RollStream(3), budget=25,
+            minimums={AbilityClass.CHARISMA: 16})
+        self.assertEqual(25, PointBuy().cost(scores))
+        self.assertGreaterEqual(scores.charisma, 16)
+        self.assertEqual(scores.as_tuple(),
+                         PointBuyScoreGenerator.generate_scores(
+                             rng=RollStream(3), budget=25,
+                             minimums={AbilityClass.CHARISMA: 16}).as_tuple())
+        custom = {8: 0, 10: 1}
+        scores = PointBuyScoreGenerator.generate_scores(budget=6,
+                                                        costs=custom)
+        self.assertEqual((10,) * 6, scores.as_tuple())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+.. module:: test_rng
+   :platform: Unix, Windows
+   :synopsis: Tests for deterministic random streams
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+import pickle
+import unittest
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from context import take10
+from take10 import _compat, abilities, dice, rng
+from take10.dice import engine, expression
+from take10.rng import RollStream
+
+
+class TestRollStream(unittest.TestCase):
+
+    def test_reproducible(self):
+        """Tests that equal seeds and counters give equal values"""
+        a = RollStream(42)
+        b = RollStream(42)
+        self.assertEqual(list(a.draw(100, 6)), list(b.draw(100, 6)))
+        self.assertEqual(a, b)
+        self.assertNotEqual(list(RollStream(43).draw(100, 6)),
+                            list(RollStream(42).draw(100, 6)))
+        self.assertNotEqual(RollStream().key, RollStream().key)
+
+    def test_replay(self):
+        """Tests replaying draws from a counter and from pickles"""
+        stream = RollStream("table")
+        stream.draw(10, 20)
+        counter = stream.counter
+        expected = list(stream.draw(5, 20))
+        self.assertEqual(expected, list(stream.at(counter).draw(5, 20)))
+        copy = pickle.loads(pickle.dumps(stream.at(counter)))
+        self.assertEqual(expected, list(copy.draw(5, 20)))
+        shared = RollStream.from_key(stream.key, counter)
+        self.assertEqual(expected, list(shared.draw(5, 20)))
+
+    def test_split(self):
+        """Tests that child streams depend only on key and labels"""
+        parent = RollStream(7)
+        child = parent.split("peer", 3)
+        parent.draw(1000, 6)
+        self.assertEqual(child, parent.split("peer", 3))
+        self.assertNotEqual(child, parent.split("peer", 4))
+        self.assertNotEqual(child, parent.split("peer", "3"))
+        self.assertNotEqual(child.key, parent.key)
+        with self.assertRaises(TypeError):
+            parent.split(1.5)
+
+    def test_backends(self):
+        """Tests that draws match with and without numpy"""
+        for span in (1, 6, 20, 100, 1000, 70000, 2 ** 40):
+            with_numpy = RollStream(span)
+            values = list(with_numpy.draw(300, span))
+            with mock.patch.object(rng, "numpy", None):
+                without = RollStream(span)
+                self.assertEqual(values, list(without.draw(300, span)))
+            self.assertEqual(with_numpy.counter, without.counter)
+
+    def test_uniform(self):
+        """Tests that draws cover the range evenly"""
+        counts = Counter(RollStream(1).integers(1, 6, endpoint=True,
+                                                size=60000).tolist())
+        self.assertEqual(set(range(1, 7)), set(counts))
+        for count in counts.values():
+            self.assertAlmostEqual(10000, count, delta=500)
+        self.assertEqual(0, max(RollStream(1).integers(1, size=5)))
+        with self.assertRaises(ValueError):
+            RollStream(1).integers(5, 5)
+
+    @unittest.skipIf(_compat.numpy is None, "numpy is not installed")
+    def test_shape(self):
+        """Tests that draws are shaped like numpy's"""
+        self.assertEqual((3, 4), RollStream(1).integers(9, size=(3, 4)).shape)
+
+    def test_threads(self):
+        """Tests per-thread child streams without shared state"""
+        root = RollStream("threads")
+
+        def work(index: int):
+            return list(root.split("thread", index).draw(5000, 20))
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            threaded = list(pool.map(work, range(8)))
+        self.assertEqual([work(i) for i in range(8)], threaded)
+
+    def test_dice(self):
+        """Tests rolling dice and expressions from streams"""
+        stream = RollStream(5)
+        self.assertEqual(dice.roll(1, 20, RollStream(5)),
+                         dice.roll(1, 20, stream))
+        self.assertEqual(list(dice.roll(4, 6, RollStream(6))),
+                         list(dice.roll(4, 6, RollStream(6))))
+        block = dice.roll_many(4, 6, 100, RollStream(8))
+        self.assertEqual(block.rows().__next__(),
+                         next(dice.roll_many(4, 6, 100, RollStream(8)).rows()))
+        with mock.patch.object(engine, "numpy", None), \
+                mock.patch.object(rng, "numpy", None):
+            fallback = dice.roll_many(4, 6, 100, RollStream(8))
+        self.assertEqual(list(block.rows()), list(fallback.rows()))
+        self.assertEqual(
+            dice.evaluate("4d6kh3!+1d8ro1", 50, RollStream(9)).tolist(),
+            dice.evaluate("4d6kh3!+1d8ro1", 50, RollStream(9)).tolist())
+        plan = dice.compile_expression("2d20kh1")
+        self.assertEqual(plan.roll_one(RollStream(3)),
+                         plan.roll_one(RollStream(3)))
+
+    def test_expression_backends(self):
+        """Tests that expressions roll the same with and without numpy"""
+        for text in ("2d6", "4d6kh3!+1d8ro1", "3d6r1-2d4", "5d10dl2*2"):
+            plan = dice.compile_expression(text)
+            totals = plan.roll(40, RollStream(5)).tolist()
+            with mock.patch.object(expression, "numpy", None), \
+                    mock.patch.object(engine, "numpy", None), \
+                    mock.patch.object(rng, "numpy", None):
+                self.assertEqual(totals, list(plan.roll(40, RollStream(5))),
+                                 text)
+
+    def test_generators(self):
+        """Tests reproducible ability score generation"""
+        for name, generate in abilities.SCORE_GENERATORS.items():
+            self.assertEqual(generate(rng=RollStream(name)).as_tuple(),
+                             generate(rng=RollStream(name)).as_tuple())
+
+    @unittest.skipIf(_compat.numpy is None, "numpy is not installed")
+    def test_population(self):
+        """Tests reproducible population generation"""
+        stream = RollStream(11)
+        population = abilities.generate_population(
+            "StandardScoreGenerator", 1000, rng=stream)
+        self.assertEqual(
+            population.tolist(),
+            abilities.generate_population(
+                "StandardScoreGenerator", 1000, rng=stream).tolist())
+        self.assertTrue(((population >= 3) & (population <= 18)).all())
+        with self.assertRaises(ValueError):
+            abilities.generate_population(
+                "StandardScoreGenerator", 10, seed=1, rng=stream)
+
+
+if __name__ == '__main__':
+    unittest.main()
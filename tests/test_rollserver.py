@@ -0,0 +1,183 @@
+"""
+.. module:: test_rollserver
+   :platform: Unix, Windows
+   :synopsis: Tests for the batching dice roll service
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+import asyncio
+import json
+import unittest
+
+from context import take10
+from take10.dice import DiceSyntaxError
+from take10.rng import RollStream
+from take10.rollserver import RollBatcher, RollClient, RollServer
+
+
+class TestRollBatcher(unittest.IsolatedAsyncioTestCase):
+
+    async def test_batching(self):
+        """Tests that concurrent requests are drawn in one batch"""
+        batcher = RollBatcher()
+        results = await asyncio.gather(
+            *(batcher.roll("1d20+5", 1 + i % 3) for i in range(100)),
+            batcher.roll("4d6dl1", 6), batcher.roll_one("3"))
+        self.assertEqual((101 + 1, 1), (batcher.requests, batcher.batches))
+        for i, totals in enumerate(results[:100]):
+            self.assertEqual(1 + i % 3, len(totals))
+            self.assertTrue(all(6 <= t <= 25 for t in totals))
+        self.assertEqual(6, len(results[100]))
+        self.assertEqual(3, results[101])
+        self.assertEqual(0, batcher.pending)
+
+    async def test_max_batch(self):
+        """Tests that full batches are drawn right away"""
+        batcher = RollBatcher(max_batch=10, max_delay=60)
+        futures = [batcher.submit("1d6") for _ in range(25)]
+        self.assertEqual((2, 5), (batcher.batches, batcher.pending))
+        batcher.flush()
+        await asyncio.gather(*futures)
+        self.assertEqual((3, 25), (batcher.batches, batcher.requests))
+
+    async def test_seeded(self):
+        """Tests that a seeded batcher draws reproducible totals"""
+        async def draw():
+            batcher = RollBatcher(rng=RollStream(42))
+            return await asyncio.gather(
+                *(batcher.roll("2d8+1d4", 2) for _ in range(20)))
+        self.assertEqual(await draw(), await draw())
+
+    async def test_invalid(self):
+        """Tests rejecting invalid requests when they are submitted"""
+        batcher = RollBatcher()
+        with self.assertRaises(DiceSyntaxError):
+            batcher.submit("2d")
+        for count in (0, 10001, 1.5, True):
+            with self.assertRaises(ValueError):
+                batcher.submit("1d6", count)
+        self.assertEqual(0, batcher.pending)
+        with self.assertRaises(ValueError):
+            RollBatcher(max_batch=0)
+        with self.assertRaises(ValueError):
+            RollBatcher(max_dice=0)
+
+    async def test_dice_budget(self):
+        """Tests the dice limits per request and per batch"""
+        batcher = RollBatcher(max_delay=60, max_dice=1000)
+        for expression, count in (("100001d6", 1), ("11d6", 10000),
+                                  ("50d6+50d4", 1001)):
+            with self.assertRaises(ValueError):
+                batcher.submit(expression, count)
+        self.assertEqual(0, batcher.pending)
+        futures = [batcher.submit("4d6", 100) for _ in range(5)]
+        self.assertEqual((2, 1), (batcher.batches, batcher.pending))
+        futures.append(batcher.submit("2000", 600))
+        self.assertEqual((3, 0), (batcher.batches, batcher.pending))
+        futures.append(batcher.submit("1d6", 400))
+        self.assertEqual((3, 1), (batcher.batches, batcher.pending))
+        batcher.flush()
+        results = await asyncio.gather(*futures)
+        self.assertEqual([100] * 5 + [600, 400], list(map(len, results)))
+
+
+class TestRollServer(unittest.IsolatedAsyncioTestCase):
+
+    async def test_client(self):
+        """Tests rolling through a client connected over TCP"""
+        async with RollServer() as server:
+            await server.start()
+            async with await RollClient.connect(server.address) as client:
+                results = await asyncio.gather(
+                    *(client.roll("1d20", 2) for _ in range(50)))
+                self.assertTrue(all(len(r) == 2 and 1 <= min(r) <= max(r)
+                                    <= 20 for r in results))
+                self.assertEqual(12, await client.roll_one("2*6"))
+                with self.assertRaises(ValueError):
+                    await client.roll("2d")
+                with self.assertRaises(ValueError):
+                    await client.roll("1d6", 0)
+            self.assertLess(server.batcher.batches, 50)
+
+    async def test_protocol(self):
+        """Tests the raw line protocol and its error replies"""
+        async with RollServer() as server:
+            await server.start()
+            reader, writer = await asyncio.open_connection(*server.address)
+            writer.write(b'{"id": 1, "roll": "3d1"}\n\n{"id": "a"}\n'
+                         b'not json\n{"id": 2, "roll": "1", "count": 2}\n')
+            replies = {}
+            for _ in range(4):
+                reply = json.loads(await reader.readline())
+                replies[reply["id"]] = reply
+            self.assertEqual([3], replies[1]["totals"])
+            self.assertEqual([1, 1], replies[2]["totals"])
+            self.assertIn("roll", replies["a"]["error"])
+            self.assertIn("error", replies[None])
+            writer.write(b"1" * 5000)
+            self.assertIn("error", json.loads(await reader.readline()))
+            self.assertEqual(b"", await reader.read())
+            writer.close()
+
+    async def test_nested_requests(self):
+        """Tests that deeply nested requests get an error reply"""
+        async with RollServer() as server:
+            await server.start()
+            reader, writer = await asyncio.open_connection(*server.address)
+            paren = json.dumps({"id": 1, "roll": "(" * 2000 + "1d6" +
+                                ")" * 2000})
+            writer.write(paren.encode("ascii") + b"\n" +
+                         b"[" * 3000 + b"\n" +
+                         b'{"id": 2, "roll": "1d1"}\n')
+            replies = {}
+            for _ in range(3):
+                reply = json.loads(await reader.readline())
+                replies[reply["id"]] = reply
+            self.assertIn("nested", replies[1]["error"])
+            self.assertIn("error", replies[None])
+            self.assertEqual([1], replies[2]["totals"])
+            writer.close()
+
+    async def test_long_lines(self):
+        """Tests that a long line is rejected even when it is complete"""
+        async with RollServer() as server:
+            await server.start()
+            reader, writer = await asyncio.open_connection(*server.address)
+            writer.write(b'{"id": 1, "roll": "1d6"}\n' + b" " * 5000 +
+                         b'{"id": 2, "roll": "1d6"}\n')
+            reply = json.loads(await reader.readline())
+            self.assertIn("too long", reply["error"])
+            self.assertEqual(b"", await reader.read())
+            writer.close()
+
+    async def test_backpressure(self):
+        """Tests that a connection stops being read with too much in flight"""
+        batcher = RollBatcher(max_delay=60)
+        async with RollServer(batcher, max_pending=4) as server:
+            await server.start()
+            async with await RollClient.connect(server.address) as client:
+                rolls = [asyncio.ensure_future(client.roll("1d6"))
+                         for _ in range(20)]
+                await asyncio.sleep(0.1)
+                self.assertEqual(4, batcher.pending)
+                while not all(r.done() for r in rolls):
+                    batcher.flush()
+                    await asyncio.sleep(0.01)
+                self.assertEqual(20, batcher.requests)
+
+    async def test_full_batches(self):
+        """Tests pipelined requests filling batches while being read"""
+        batcher = RollBatcher(max_batch=3)
+        async with RollServer(batcher, max_pending=5) as server:
+            await server.start()
+            async with await RollClient.connect(server.address) as client:
+                results = await asyncio.gather(
+                    *(client.roll_one("1d4") for _ in range(50)))
+                self.assertTrue(all(1 <= r <= 4 for r in results))
+                self.assertGreaterEqual(batcher.batches, 17)
+
+
+if __name__ == '__main__':
+    unittest.main()
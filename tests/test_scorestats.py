@@ -0,0 +1,90 @@
+"""
+.. module:: test_scorestats
+   :platform: Unix, Windows
+   :synopsis: Tests for score generator statistics
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+import unittest
+
+from context import take10
+from take10 import scorestats
+from take10._compat import numpy
+from take10._scoretable import TABLE
+from take10.abilities import ClassicScoreGenerator
+from take10.rng import RollStream
+from take10.scorestats import score_stats
+
+
+class UnorderedClassic(ClassicScoreGenerator):
+    """Classic without an expression, so it has to be sampled"""
+
+    expression = None
+
+
+class TestScoreStats(unittest.TestCase):
+
+    def test_exact(self):
+        """Tests the exact statistics of the built in generators"""
+        classic = score_stats("ClassicScoreGenerator")
+        self.assertTrue(classic.exact)
+        self.assertAlmostEqual(1 / 216, classic.stat.probability(18))
+        self.assertAlmostEqual(1 - (215 / 216) ** 6, classic.at_least(18))
+        self.assertAlmostEqual((1 / 216) ** 6, classic.at_least(18, 6))
+        self.assertAlmostEqual(1 - (1 - 1 / 216) ** 6, classic.at_most(3))
+        heroic = score_stats("HeroicScoreGenerator")
+        self.assertEqual(8, heroic.stat.minimum)
+        self.assertEqual((8, 8), (heroic.order[5].minimum,
+                                  heroic.order[0].minimum))
+        standard = score_stats("StandardScoreGenerator")
+        self.assertAlmostEqual(12.2446, standard.stat.mean, places=4)
+        self.assertAlmostEqual(1 - (1 - 21 / 1296) ** 6,
+                               standard.at_least(18))
+        self.assertGreater(heroic.at_least(18), standard.at_least(18))
+        self.assertEqual((0.5, 0.5), standard.interval(0.5))
+        with self.assertRaises(ValueError):
+            standard.at_least(18, 7)
+        with self.assertRaises(KeyError):
+            score_stats("LuckyScoreGenerator")
+
+    def test_table(self):
+        """Tests that the shipped table matches a fresh computation"""
+        for name, (expression, minimum, pmf, orders) in TABLE.items():
+            fresh = scorestats._exact(name, expression)
+            self.assertEqual(fresh.stat.minimum, minimum)
+            for a, b in zip((fresh.stat,) + fresh.order, (pmf,) + orders):
+                for p, q in zip(a.pmf, b):
+                    self.assertAlmostEqual(p, q, places=12)
+
+    def test_joint(self):
+        """Tests the joint distribution of sorted arrays"""
+        heroic = score_stats("HeroicScoreGenerator")
+        joint = heroic.joint()
+        self.assertAlmostEqual(1.0, sum(joint.values()))
+        self.assertAlmostEqual((1 / 36) ** 6, joint[(18,) * 6])
+        self.assertAlmostEqual(
+            heroic.at_least(16, 2),
+            sum(p for array, p in joint.items() if array[1] >= 16))
+        self.assertTrue(all(list(a) == sorted(a, reverse=True)
+                            for a in joint))
+
+    @unittest.skipIf(numpy is None, "Sampling requires numpy")
+    def test_sampled(self):
+        """Tests sampling generators without an expression"""
+        sampled = score_stats(UnorderedClassic, 20000, RollStream(5))
+        self.assertFalse(sampled.exact)
+        self.assertIs(sampled, score_stats(UnorderedClassic, 20000,
+                                           RollStream(5)))
+        exact = score_stats(ClassicScoreGenerator)
+        for score in (14, 16, 17):
+            low, high = sampled.interval(sampled.at_least(score), 0.999)
+            self.assertLessEqual(low, exact.at_least(score))
+            self.assertGreaterEqual(high, exact.at_least(score))
+        with self.assertRaises(ValueError):
+            sampled.joint()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+"""
+.. module:: test_serialization
+   :platform: Unix, Windows
+   :synopsis: Tests for binary CharacterSheet formats
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+import os
+import tempfile
+import unittest
+
+from context import take10
+from take10 import serialization
+from take10.abilities import AbilityClass, AbilityScores
+from take10.charactersheet import CharacterSheet
+from take10.races import Race, RACES
+from take10.skills import SkillClass, SkillSet
+
+
+class Dwarf(Race):
+    race_id = 901
+
+    def get_starting_ability_bonus(self):
+        return ()
+
+    def get_starting_skill_bonus(self):
+        return ()
+
+
+def make_sheet(i: int=0) -> CharacterSheet:
+    return CharacterSheet(
+        "Gimble #{}".format(i),
+        "Stout and grumpy, é" if i % 2 else None,
+        CharacterSheet.Alignment(i % 9),
+        Dwarf() if i % 3 else None,
+        CharacterSheet.Sex(i % 3),
+        AbilityScores(10 + i % 8, 12, 14, 8, 13, 15),
+        SkillSet(CLIMB=i % 5, PERCEPTION=-1) if i % 4 else None
+    )
+
+
+class TestSerialization(unittest.TestCase):
+
+    def assertSheetEqual(self, expected, actual):
+        self.assertEqual(expected.char_name, actual.char_name)
+        self.assertEqual(expected.char_desc, actual.char_desc)
+        self.assertEqual(expected.alignment, actual.alignment)
+        self.assertEqual(expected.sex, actual.sex)
+        self.assertEqual(type(expected.race), type(actual.race))
+        self.assertEqual(expected.ability_scores.as_tuple(),
+                         actual.ability_scores.as_tuple())
+        self.assertEqual(expected.skills, actual.skills)
+
+    def test_race_registry(self):
+        """Tests that races with a race_id are registered once"""
+        self.assertIs(Dwarf, RACES[901])
+        with self.assertRaises(ValueError):
+            type("Duergar", (Dwarf,), {})
+
+    def test_record_round_trip(self):
+        """Tests encoding and decoding single sheets"""
+        for i in range(12):
+            sheet = make_sheet(i)
+            data = serialization.encode_sheet(sheet)
+            self.assertSheetEqual(
+                sheet, serialization.decode_sheet(memoryview(data)))
+
+    def test_record_errors(self):
+        """Tests that malformed records are rejected"""
+        data = serialization.encode_sheet(make_sheet(1))
+        with self.assertRaises(ValueError):
+            serialization.decode_sheet(data[:8])
+        with self.assertRaises(ValueError):
+            serialization.decode_sheet(b"XXXX" + data[4:])
+        with self.assertRaises(ValueError):
+            serialization.decode_sheet(data, races={})
+
+    def test_truncated_records(self):
+        """Tests that a record cut anywhere raises ValueError"""
+        for i in (0, 1, 5):
+            data = serialization.encode_sheet(make_sheet(i))
+            for end in range(len(data)):
+                with self.assertRaises(ValueError):
+                    serialization.decode_sheet(data[:end])
+
+    def test_encode_out_of_range(self):
+        """Tests that values too large for the record raise ValueError"""
+        sheet = make_sheet(1)
+        sheet.ability_scores = AbilityScores(300, 12, 14, 8, 13, 15)
+        with self.assertRaises(ValueError):
+            serialization.encode_sheet(sheet)
+        sheet = make_sheet(1)
+        sheet.char_name = "x" * 70000
+        with self.assertRaises(ValueError):
+            serialization.encode_sheet(sheet)
+
+    def test_sheet_file(self):
+        """Tests writing and memory-mapping a columnar sheet file"""
+        sheets = [make_sheet(i) for i in range(50)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sheets.t10")
+            self.assertEqual(50, serialization.write_sheets(path, sheets))
+            with serialization.SheetFile(path) as loaded:
+                self.assertEqual(50, len(loaded))
+                for i in (0, 1, 7, 49, -1):
+                    self.assertSheetEqual(sheets[i], loaded[i])
+                self.assertEqual("Gimble #3", loaded.name(3))
+                self.assertEqual(
+                    [10 + i % 8 for i in range(50)],
+                    list(loaded.ability_column(AbilityClass.STRENGTH)))
+                self.assertEqual(
+                    [i % 5 if i % 4 else 0 for i in range(50)],
+                    list(loaded.skill_column(SkillClass.CLIMB)))
+                self.assertEqual(
+                    [901 if i % 3 else 0 for i in range(50)],
+                    list(loaded.column("race_id")))
+                with self.assertRaises(IndexError):
+                    loaded[50]
+
+    def test_columns_after_close(self):
+        """Tests keeping columns past the end of a with block"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sheets.t10")
+            serialization.write_sheets(path, [make_sheet(i) for i in range(5)])
+            with serialization.SheetFile(path) as loaded:
+                strength = loaded.ability_column(AbilityClass.STRENGTH)
+                climb = loaded.skill_column(SkillClass.CLIMB)
+                race_ids = loaded.column("race_id")
+            self.assertEqual([10, 11, 12, 13, 14], list(strength))
+            self.assertEqual([0, 1, 2, 3, 0], list(climb))
+            self.assertEqual([0, 901, 901, 0, 901], list(race_ids))
+            loaded.close()
+            for column in (strength, climb, race_ids):
+                column.release()
+
+    def test_malformed_sheet_file(self):
+        """Tests that bad magic, versions and truncation raise ValueError"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sheets.t10")
+            serialization.write_sheets(path, [make_sheet(i) for i in range(5)])
+            with open(path, "rb") as source:
+                data = source.read()
+            for bad in (b"XXXX" + data[4:], data[:4] + b"\x09" + data[5:],
+                        data[:20], data[:-3]):
+                with open(path, "wb") as out:
+                    out.write(bad)
+                with self.assertRaises(ValueError):
+                    serialization.SheetFile(path)
+
+    def test_empty_sheet_file(self):
+        """Tests a sheet file holding no sheets"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "empty.t10")
+            serialization.write_sheets(path, [])
+            with serialization.SheetFile(path) as loaded:
+                self.assertEqual(0, len(loaded))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+"""
+.. module:: test_sizes
+   :platform: Unix, Windows
+   :synopsis: Size tests
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+import unittest
+
+from context import take10
+from take10 import _compat, sizes
+from take10.sizes import SizeClass
+
+
+class TestSizes(unittest.TestCase):
+
+    @unittest.skipIf(_compat.numpy is None, "numpy is not installed")
+    def test_typical_ranges(self):
+        """Tests the typical height/weight tables in both unit systems"""
+        self.assertEqual((4, 8), sizes.typical_height(SizeClass.Medium))
+        low, high = sizes.typical_height(SizeClass.Medium, metric=True)
+        self.assertAlmostEqual(1.2192, low)
+        self.assertAlmostEqual(2.4384, high)
+        low, high = sizes.typical_weight(SizeClass.Small, metric=True)
+        self.assertAlmostEqual(8 * 0.45359237, low)
+        self.assertEqual(
+            [[2, 4], [64, float("inf")]],
+            sizes.typical_heights(
+                [SizeClass.Small, SizeClass.Colossal]).tolist())
+
+    @unittest.skipIf(_compat.numpy is None, "numpy is not installed")
+    def test_classify_size(self):
+        """Tests vectorized size classification and checks"""
+        self.assertListEqual(
+            [1, 5, 6, 9],
+            sizes.classify_size([0.2, 5, 8, 100]).tolist())
+        self.assertListEqual(
+            [5, 6], sizes.classify_size([5, 5], [150, 600]).tolist())
+        self.assertListEqual(
+            [True, False],
+            sizes.is_typical_size([5, 5], [6, 6], [150, 600]).tolist())
+        with self.assertRaises(ValueError):
+            sizes.typical_weights([0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+.. module:: test_skills
+   :platform: Unix, Windows
+   :synopsis: Tests for skill definitions
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+import unittest
+
+from context import take10
+from take10 import _compat, skills
+from take10.abilities import AbilityClass
+from take10.abilitytable import AbilityScoreTable
+from take10.skills import SkillClass
+
+
+class TestSkills(unittest.TestCase):
+
+    def test_skill_ability_class(self):
+        """Tests the skill to ability class index"""
+        self.assertEqual(len(SkillClass), len(skills.SKILL_ABILITY_INDEX))
+        self.assertEqual(
+            AbilityClass.STRENGTH,
+            skills.get_skill_ability_class(SkillClass.CLIMB))
+        self.assertEqual(
+            AbilityClass.WISDOM,
+            skills.get_skill_ability_class(SkillClass.PERCEPTION))
+        self.assertEqual(
+            AbilityClass.INTELLIGENCE,
+            skills.get_skill_ability_class(SkillClass.KNOWLEDGE_PLANES))
+
+    @unittest.skipIf(_compat.numpy is None, "numpy is not installed")
+    def test_compute_skill_modifiers(self):
+        """Tests batched skill totals against the per-skill lookup"""
+        scores = [[16, 10, 8, 12, 11, 14], [9, 18, 13, 10, 7, 12]]
+        ranks = [[i % 4 for i in range(len(SkillClass))], [0] * 35]
+        table = AbilityScoreTable.from_array(scores)
+        for source in (scores, table):
+            totals = skills.compute_skill_modifiers(source, ranks)
+            self.assertEqual((2, len(SkillClass)), totals.shape)
+            for row, (character, character_ranks) in enumerate(
+                    zip(scores, ranks)):
+                for skill in SkillClass:
+                    ability = skills.get_skill_ability_class(skill)
+                    expected = character_ranks[skill.value] \
+                        + (character[ability.value] - 10) // 2
+                    self.assertEqual(expected, totals[row, skill.value])
+        with self.assertRaises(ValueError):
+            skills.compute_skill_modifiers(scores, [[0] * 35])
+        self.assertIs(skills._skill_ability_array(),
+                      skills._skill_ability_array())
+
+
+class TestSkillSet(unittest.TestCase):
+
+    def test_dense_and_sparse(self):
+        """Tests that dense and sparse skill sets behave the same"""
+        for sparse in (False, True):
+            ranks = skills.SkillSet(sparse=sparse, SWIM=2, PERCEPTION=4)
+            self.assertEqual(sparse, ranks.is_sparse)
+            self.assertEqual(2, ranks.SWIM)
+            self.assertEqual(4, ranks[SkillClass.PERCEPTION])
+            self.assertEqual(0, ranks.CLIMB)
+            self.assertEqual(len(SkillClass), len(list(ranks)))
+            ranks.CLIMB = 1
+            ranks.SWIM = 0
+            self.assertEqual(
+                {SkillClass.CLIMB: 1, SkillClass.PERCEPTION: 4},
+                dict(ranks.items()))
+            with self.assertRaises(ValueError):
+                ranks.STEALTH = 200
+
+    def test_stacking_bonuses(self):
+        """Tests element-wise, in place stacking of skill bonuses"""
+        character = skills.SkillSet(SWIM=1, STEALTH=3)
+        racial = skills.SkillSet(sparse=True, STEALTH=2, PERCEPTION=2)
+        total = character + racial
+        self.assertEqual(5, total.STEALTH)
+        self.assertEqual(3, character.STEALTH)
+        character += racial
+        self.assertEqual(total, character)
+        self.assertTrue((racial + racial).is_sparse)
+
+    def test_serialization(self):
+        """Tests encoding and decoding skill sets"""
+        dense = skills.SkillSet(*range(len(SkillClass)))
+        sparse = skills.SkillSet(sparse=True, HEAL=-1, RIDE=7)
+        for ranks in (dense, sparse):
+            decoded = skills.SkillSet.from_bytes(ranks.to_bytes())
+            self.assertEqual(ranks, decoded)
+            self.assertEqual(ranks.is_sparse, decoded.is_sparse)
+        self.assertEqual(5, len(sparse.to_bytes()))
+        with self.assertRaises(ValueError):
+            skills.SkillSet.from_bytes(b"\x00\x01")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+"""
+.. module:: test_sync
+   :platform: Unix, Windows
+   :synopsis: Tests for delta-encoded state sync
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+import asyncio
+import unittest
+
+from context import take10
+from take10 import sync
+from take10.qtabilities import AbilityScores
+
+SCORES = (10, 12, 14, 8, 13, 15)
+
+
+def table(peers: int, latency: float=0.0):
+    network = sync.LoopbackNetwork(latency)
+    sessions = []
+    scores = []
+    for peer_id in range(1, peers + 1):
+        session = network.session(peer_id, interval=0.001)
+        sheet = AbilityScores(*SCORES)
+        session.track(7, sheet)
+        sessions.append(session)
+        scores.append(sheet)
+    return network, sessions, scores
+
+
+async def settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+class TestSync(unittest.TestCase):
+
+    def test_batch_round_trip(self):
+        """Tests encoding and decoding batches"""
+        deltas = [(0, 0, 18), (7, 5, -3), (100000, 2, 300)]
+        batch = sync.encode_batch(3, 900, 70000, deltas)
+        self.assertEqual((3, 900, 70000, deltas), sync.decode_batch(batch))
+        self.assertEqual(6, len(sync.encode_batch(1, 1, 1, [(7, 0, 18)])))
+        with self.assertRaises(ValueError):
+            sync.decode_batch(batch[:-1])
+        with self.assertRaises(ValueError):
+            sync.decode_batch(batch + b"\x00")
+
+    def test_coalesce(self):
+        """Tests that changes within one tick are sent as one delta each"""
+        sent = []
+        session = sync.SyncSession(1, sent.append)
+        scores = AbilityScores(*SCORES)
+        session.track(0, scores)
+        self.assertIsNone(session.flush())
+        scores.strength = 11
+        scores.strength = 16
+        scores.wisdom = 9
+        session.flush()
+        self.assertEqual(1, len(sent))
+        self.assertEqual(
+            (1, 1, 1, [(0, 0, 16), (0, 3, 9)]), sync.decode_batch(sent[0]))
+        self.assertEqual({1: 1}, session.version_vector)
+        session.untrack(0)
+        scores.strength = 3
+        self.assertIsNone(session.flush())
+
+    def test_loopback(self):
+        """Tests that changes reach every peer of a loopback network"""
+        async def run():
+            network, sessions, scores = table(6)
+            scores[0].strength = 18
+            scores[4].charisma = 5
+            sessions[0].flush()
+            sessions[4].flush()
+            await settle()
+            for sheet in scores:
+                self.assertEqual((18, 12, 14, 8, 5, 15), sheet.as_tuple())
+            for session in sessions[1:4]:
+                self.assertEqual({1: 1, 5: 1}, session.version_vector)
+            # Applying remote values must not echo them back
+            for session in sessions:
+                self.assertIsNone(session.flush())
+        asyncio.run(run())
+
+    def test_tick(self):
+        """Tests the flush task started on the event loop"""
+        async def run():
+            network, sessions, scores = table(2)
+            for session in sessions:
+                session.start()
+            scores[1].dexterity = 17
+            await asyncio.sleep(0.05)
+            for session in sessions:
+                session.stop()
+            self.assertEqual(17, scores[0].dexterity)
+        asyncio.run(run())
+
+    def test_concurrent_writes(self):
+        """Tests that concurrent writes to one field converge"""
+        async def run():
+            network, sessions, scores = table(3)
+            for i, sheet in enumerate(scores):
+                sheet.wisdom = 10 + i
+            for session in sessions:
+                session.flush()
+            await settle()
+            self.assertEqual({12}, {s.wisdom for s in scores})
+        asyncio.run(run())
+
+    def test_out_of_order(self):
+        """Tests duplicate and out-of-order batches"""
+        sent = []
+        source = sync.SyncSession(1, sent.append)
+        source_scores = AbilityScores(*SCORES)
+        source.track(0, source_scores)
+        for score in (11, 12, 13):
+            source_scores.strength = score
+            source.flush()
+        target = sync.SyncSession(2, lambda data: None)
+        target_scores = AbilityScores(*SCORES)
+        target.track(0, target_scores)
+        target.receive(sent[2])
+        target.receive(sent[1])
+        self.assertEqual(10, target_scores.strength)
+        self.assertEqual({}, target.version_vector)
+        target.receive(sent[0])
+        target.receive(sent[0])
+        self.assertEqual(13, target_scores.strength)
+        self.assertEqual({1: 3}, target.version_vector)
+        self.assertEqual(3, target.deltas_applied)
+
+    def test_invalid_delta(self):
+        """Tests that a rejected delta does not stall its peer"""
+        target = sync.SyncSession(2, lambda data: None)
+        scores = AbilityScores(*SCORES)
+        target.track(0, scores)
+        with self.assertRaises(ValueError):
+            target.receive(sync.encode_batch(
+                1, 1, 1, [(0, 0, -4), (0, 1, 16)]))
+        self.assertEqual((10, 16), (scores.strength, scores.dexterity))
+        self.assertEqual({1: 1}, target.version_vector)
+        target.receive(sync.encode_batch(1, 2, 2, [(0, 0, 17)]))
+        self.assertEqual(17, scores.strength)
+        self.assertEqual({1: 2}, target.version_vector)
+        self.assertEqual(2, target.deltas_applied)
+
+        # An invalid value received before tracking never reaches the object
+        with self.assertRaises(ValueError):
+            target.receive(sync.encode_batch(1, 3, 3, [(5, 2, -1)]))
+        other = AbilityScores(*SCORES)
+        target.track(5, other)
+        self.assertEqual(SCORES, other.as_tuple())
+
+    def test_late_track(self):
+        """Tests that values received before tracking are applied on track"""
+        sent = []
+        source = sync.SyncSession(1, sent.append)
+        scores = AbilityScores(*SCORES)
+        source.track(4, scores)
+        scores.constitution = 6
+        source.flush()
+        target = sync.SyncSession(2, lambda data: None)
+        target.receive(sent[0])
+        late = AbilityScores(*SCORES)
+        target.track(4, late)
+        self.assertEqual(6, late.constitution)
+        self.assertIsNone(target.flush())
+        with self.assertRaises(ValueError):
+            target.track(4, late)
+
+
+if __name__ == '__main__':
+    unittest.main()
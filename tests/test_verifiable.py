@@ -0,0 +1,153 @@
+"""
+.. module:: test_verifiable
+   :platform: Unix, Windows
+   :synopsis: Tests for commit-reveal dice rolls
+
+.. moduleauthor:: <fluffymuffin27@posteo.de>
+
+"""
+
+import unittest
+
+from context import take10
+from take10.dice import verifiable
+from take10.dice.verifiable import (
+    Reveal, RollCommitment, RollVerifier, VerificationError
+)
+from take10.rng import RollStream
+
+
+def play(commitment: RollCommitment, rounds: int, per_round: int):
+    reveals = []
+    rolled = []
+    for r in range(rounds):
+        for i in range(per_round):
+            rolled.append(commitment.roll("1d20+5", nonce=bytes([r, i])))
+        reveals.append(commitment.reveal())
+    return rolled, reveals
+
+
+def expected(rolled: list) -> tuple:
+    """The nonces and expressions a verifier handed out for rolled"""
+    return [r.nonce for r in rolled], ["1d20+5"] * len(rolled)
+
+
+class TestVerifiable(unittest.TestCase):
+
+    def test_round_trip(self):
+        """Tests that honest reveals verify and reproduce the totals"""
+        commitment = RollCommitment(64, RollStream(1))
+        verifier = RollVerifier(commitment.commitment())
+        rolled, reveals = play(commitment, 8, 3)
+        for i, reveal in enumerate(reveals):
+            verifier.verify(reveal.to_bytes(),
+                            *expected(rolled[i * 3:i * 3 + 3]))
+        self.assertEqual([r.total for r in rolled],
+                         [r.total for r in verifier.rolls])
+        self.assertTrue(all(6 <= r.total <= 25 for r in rolled))
+        self.assertEqual(40, commitment.remaining)
+
+    def test_batched(self):
+        """Tests verifying several reveals at once"""
+        commitment = RollCommitment(100, RollStream(2))
+        self.assertEqual(128, commitment.size)
+        rolled, reveals = play(commitment, 20, 5)
+        verifier = RollVerifier(commitment.commitment())
+        verified = verifier.verify_many(reveals, *expected(rolled))
+        self.assertEqual([r.total for r in rolled],
+                         [r.total for r in verified])
+        self.assertEqual(0, len(commitment.reveal()))
+
+    def test_proof_size(self):
+        """Tests that proofs only carry nodes not already authenticated"""
+        commitment = RollCommitment(1024, RollStream(3))
+        rolled, reveals = play(commitment, 256, 4)
+        nodes = sum(len(r.proof) for r in reveals)
+        self.assertLess(nodes, 1024)
+        first = len(reveals[0].proof)
+        self.assertEqual(commitment.depth - 2, first)
+        size = sum(len(r.to_bytes()) for r in reveals) / len(rolled)
+        self.assertLess(size, 48)
+        verifier = RollVerifier(commitment.commitment())
+        self.assertEqual(1024, len(verifier.verify_many(
+            (r.to_bytes() for r in reveals), *expected(rolled))))
+
+    def test_tampering(self):
+        """Tests that altered reveals are rejected"""
+        commitment = RollCommitment(16, RollStream(4))
+        rolled, reveals = play(commitment, 2, 2)
+        commitment_bytes = commitment.commitment()
+        first = reveals[0]
+        nonces, expressions = expected(rolled[:2])
+
+        tampered = Reveal(first.first, list(first.rolls), list(first.proof))
+        expression, secret, nonce = tampered.rolls[0]
+        tampered.rolls[0] = (expression, bytes(16), nonce)
+        with self.assertRaises(VerificationError):
+            RollVerifier(commitment_bytes).verify(tampered, nonces,
+                                                  expressions)
+
+        verifier = RollVerifier(commitment_bytes)
+        with self.assertRaises(VerificationError):
+            verifier.verify(reveals[1], *expected(rolled[2:]))
+        with self.assertRaises(VerificationError):
+            verifier.verify(Reveal(0, first.rolls, first.proof[:-1]),
+                            nonces, expressions)
+        with self.assertRaises(VerificationError):
+            verifier.verify(first.to_bytes()[:-1], nonces, expressions)
+        self.assertEqual([], verifier.rolls)
+        verifier.verify(first, nonces, expressions)
+        with self.assertRaises(VerificationError):
+            verifier.verify(first, nonces, expressions)
+        self.assertEqual(2, len(verifier.rolls))
+
+        other = RollCommitment(16, RollStream(5))
+        with self.assertRaises(VerificationError):
+            RollVerifier(other.commitment()).verify(first, nonces,
+                                                    expressions)
+
+    def test_expected_rolls(self):
+        """Tests that rolls must use the verifier's nonces and expressions"""
+        commitment = RollCommitment(16, RollStream(7))
+        rolled, reveals = play(commitment, 1, 2)
+        nonces, expressions = expected(rolled)
+        commitment_bytes = commitment.commitment()
+        for args in ((nonces, ["1d20+5", "1d20+6"]),
+                     ([nonces[0], b"\x09"], expressions),
+                     (nonces[:1], expressions[:1]),
+                     (nonces + [b"\x09"], expressions + ["1d20"])):
+            with self.assertRaises(VerificationError):
+                RollVerifier(commitment_bytes).verify(reveals[0], *args)
+
+        # A roller choosing its own nonce is caught even with the right
+        # secret and a valid proof
+        ground = RollCommitment(16, RollStream(7))
+        ground.roll("1d20+5", b"\x09")
+        ground.roll("1d20+5", nonces[1])
+        with self.assertRaises(VerificationError):
+            RollVerifier(commitment_bytes).verify(ground.reveal(), nonces,
+                                                  expressions)
+        verifier = RollVerifier(commitment_bytes)
+        self.assertEqual(2, len(verifier.verify(
+            reveals[0], nonces, [" 1d20 + 5", "1d20+5"])))
+        with self.assertRaises(ValueError):
+            commitment.roll("1d20", b"")
+        with self.assertRaises(TypeError):
+            commitment.roll("1d20")
+
+    def test_exhausted(self):
+        """Tests that a commitment covers a fixed number of rolls"""
+        commitment = RollCommitment(1, RollStream(6))
+        commitment.roll("1d6", b"\x01")
+        with self.assertRaises(ValueError):
+            commitment.roll("1d6", b"\x02")
+        verifier = RollVerifier(commitment.commitment())
+        self.assertEqual(1, len(verifier.verify(
+            commitment.reveal(), [b"\x01"], ["1d6"])))
+        with self.assertRaises(VerificationError):
+            RollVerifier(b"\x00")
+        self.assertEqual(16, verifiable.DIGEST_SIZE)
+
+
+if __name__ == '__main__':
+    unittest.main()